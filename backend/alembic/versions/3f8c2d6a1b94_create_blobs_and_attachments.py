@@ -0,0 +1,111 @@
+"""create blobs and attachments
+
+Revision ID: 3f8c2d6a1b94
+Revises: 6e2b8f4c9d17
+Create Date: 2026-10-18 18:02:15.337204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8c2d6a1b94'
+down_revision: Union[str, Sequence[str], None] = '6e2b8f4c9d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# storage_path of a ufdr_files row whose file is a blob (app.services.storage.blob_key)
+BLOB_KEY = "substr(sha256, 1, 2) || '/' || substr(sha256, 3, 2) || '/' || sha256"
+
+
+def _refcount_function(name: str, refs: str, old_refs: str) -> str:
+    # `refs`/`old_refs` select (sha256, size) of the blob references in new_rows/old_rows.
+    # Statement-level, so a bulk insert upserts each distinct blob once. The upsert and the
+    # decrement lock the blob row until commit, which orders writers against the collector.
+    return f"""
+        CREATE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO blobs (sha256, size, refcount, created_at, updated_at)
+                SELECT sha256, max(size), count(*), now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'
+                FROM ({refs}) r GROUP BY sha256
+                ON CONFLICT (sha256) DO UPDATE
+                    SET refcount = blobs.refcount + EXCLUDED.refcount, updated_at = EXCLUDED.updated_at;
+            ELSE
+                UPDATE blobs b SET refcount = b.refcount - r.n, updated_at = now() AT TIME ZONE 'utc'
+                FROM (SELECT sha256, count(*) AS n FROM ({old_refs}) o GROUP BY sha256) r
+                WHERE b.sha256 = r.sha256;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('refcount', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index(op.f('ix_blobs_updated_at'), 'blobs', ['updated_at'], unique=False)
+    op.create_table('attachments',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('artifact_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('ufdr_file_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('content_type', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['artifact_id'], ['artifacts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['ufdr_file_id'], ['ufdr_files.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_attachments_artifact_id'), 'attachments', ['artifact_id'], unique=False)
+    op.create_index(op.f('ix_attachments_ufdr_file_id'), 'attachments', ['ufdr_file_id'], unique=False)
+    op.create_index(op.f('ix_attachments_sha256'), 'attachments', ['sha256'], unique=False)
+
+    op.execute(_refcount_function(
+        'attachments_blob_refs',
+        "SELECT sha256, size FROM new_rows",
+        "SELECT sha256 FROM old_rows",
+    ))
+    # only rows stored through app.services.storage reference a blob; older rows keep a
+    # plain file path
+    op.execute(_refcount_function(
+        'ufdr_files_blob_refs',
+        f"SELECT sha256, (meta->>'size')::bigint AS size FROM new_rows WHERE storage_path = {BLOB_KEY}",
+        f"SELECT sha256 FROM old_rows WHERE storage_path = {BLOB_KEY}",
+    ))
+    for table in ('attachments', 'ufdr_files'):
+        op.execute(
+            f"CREATE TRIGGER {table}_blob_refs_insert AFTER INSERT ON {table} "
+            f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {table}_blob_refs()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_blob_refs_delete AFTER DELETE ON {table} "
+            f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {table}_blob_refs()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('attachments', 'ufdr_files'):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_blob_refs_delete ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_blob_refs_insert ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_blob_refs()")
+    op.drop_index(op.f('ix_attachments_sha256'), table_name='attachments')
+    op.drop_index(op.f('ix_attachments_ufdr_file_id'), table_name='attachments')
+    op.drop_index(op.f('ix_attachments_artifact_id'), table_name='attachments')
+    op.drop_table('attachments')
+    op.drop_index(op.f('ix_blobs_updated_at'), table_name='blobs')
+    op.drop_table('blobs')
@@ -0,0 +1,52 @@
+"""add keyset index on artifacts
+
+Revision ID: 41813d472122
+Revises: 65682bac2028
+Create Date: 2026-10-18 15:57:22.480196
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '41813d472122'
+down_revision: Union[str, Sequence[str], None] = '65682bac2028'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the keyset compares (created_at, id) and a row comparison with NULL is never true, so
+    # rows without created_at would be skipped by every page: backfill, then forbid NULLs.
+    # Older rows take their file's upload time, so they sort with the rest of that file.
+    op.execute(
+        "UPDATE artifacts a SET created_at = coalesce(f.uploaded_at, now() at time zone 'utc') "
+        "FROM ufdr_files f WHERE a.created_at IS NULL AND f.id = a.ufdr_file_id"
+    )
+    op.execute("UPDATE artifacts SET created_at = now() at time zone 'utc' WHERE created_at IS NULL")
+    # a validated CHECK lets SET NOT NULL skip its own scan under the ACCESS EXCLUSIVE lock
+    op.execute(
+        "ALTER TABLE artifacts ADD CONSTRAINT artifacts_created_at_not_null "
+        "CHECK (created_at IS NOT NULL) NOT VALID"
+    )
+    op.execute("ALTER TABLE artifacts VALIDATE CONSTRAINT artifacts_created_at_not_null")
+    op.alter_column('artifacts', 'created_at', existing_type=sa.DateTime(), nullable=False)
+    op.drop_constraint('artifacts_created_at_not_null', 'artifacts', type_='check')
+
+    # (ufdr_file_id, created_at, id) serves per-file listing in keyset order
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_artifacts_ufdr_file_id_created_at_id', 'artifacts',
+            ['ufdr_file_id', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_artifacts_ufdr_file_id_created_at_id', table_name='artifacts')
+    op.alter_column('artifacts', 'created_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,43 @@
+"""add hnsw index on artifact embeddings
+
+Revision ID: 47c6260e52fb
+Revises: 2f58b06fca2d
+Create Date: 2026-10-18 13:52:30.661847
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '47c6260e52fb'
+down_revision: Union[str, Sequence[str], None] = '2f58b06fca2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_artifacts_ufdr_file_id'), 'artifacts', ['ufdr_file_id'], unique=False)
+    op.create_index(op.f('ix_artifacts_case_id'), 'artifacts', ['case_id'], unique=False)
+    # building HNSW over millions of vectors takes a while; don't hold a write lock meanwhile
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_artifacts_embedding_hnsw',
+            'artifacts',
+            ['embedding'],
+            unique=False,
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_artifacts_embedding_hnsw', table_name='artifacts')
+    op.drop_index(op.f('ix_artifacts_case_id'), table_name='artifacts')
+    op.drop_index(op.f('ix_artifacts_ufdr_file_id'), table_name='artifacts')
@@ -0,0 +1,52 @@
+"""add full-text and trigram search to artifacts
+
+Revision ID: 65682bac2028
+Revises: 47c6260e52fb
+Create Date: 2026-10-18 14:48:09.372615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '65682bac2028'
+down_revision: Union[str, Sequence[str], None] = '47c6260e52fb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # 'simple' config: no stemming or stop words, so names, handles and numbers stay searchable
+    op.add_column(
+        'artifacts',
+        sa.Column(
+            'text_tsv',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', coalesce(extracted_text, ''))", persisted=True),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_artifacts_text_tsv', 'artifacts', ['text_tsv'],
+            unique=False, postgresql_using='gin', postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_artifacts_extracted_text_trgm', 'artifacts', ['extracted_text'],
+            unique=False, postgresql_using='gin',
+            postgresql_ops={'extracted_text': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_artifacts_extracted_text_trgm', table_name='artifacts')
+    op.drop_index('ix_artifacts_text_tsv', table_name='artifacts')
+    op.drop_column('artifacts', 'text_tsv')
@@ -0,0 +1,85 @@
+"""create artifact_type_counts
+
+Revision ID: 6e2b8f4c9d17
+Revises: 7b1d4e9a2c63
+Create Date: 2026-10-18 19:40:27.118530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2b8f4c9d17'
+down_revision: Union[str, Sequence[str], None] = '7b1d4e9a2c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# must match app.services.dashboard.UNASSIGNED / the "unknown" type label
+CASE_KEY = "coalesce(case_id::text, 'unassigned')"
+TYPE_KEY = "coalesce(type, 'unknown')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('artifact_type_counts',
+    sa.Column('case_key', sa.String(length=36), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.PrimaryKeyConstraint('case_key', 'type')
+    )
+    # statement-level with transition tables, like table_counters_apply(): one upsert per
+    # (case, type) per statement. Deletes upsert negative deltas so both directions lock
+    # counter rows in the same (sorted) order and concurrent ingests can't deadlock.
+    # case_id and type are written once at insert; nothing updates them.
+    op.execute(f"""
+        CREATE FUNCTION artifact_type_counts_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                DELETE FROM artifact_type_counts;
+            ELSIF TG_OP = 'INSERT' THEN
+                INSERT INTO artifact_type_counts (case_key, type, value)
+                SELECT {CASE_KEY}, {TYPE_KEY}, count(*) FROM new_rows GROUP BY 1, 2 ORDER BY 1, 2
+                ON CONFLICT (case_key, type) DO UPDATE
+                    SET value = artifact_type_counts.value + EXCLUDED.value;
+            ELSE
+                INSERT INTO artifact_type_counts (case_key, type, value)
+                SELECT {CASE_KEY}, {TYPE_KEY}, -count(*) FROM old_rows GROUP BY 1, 2 ORDER BY 1, 2
+                ON CONFLICT (case_key, type) DO UPDATE
+                    SET value = artifact_type_counts.value + EXCLUDED.value;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute(
+        "CREATE TRIGGER artifacts_type_count_insert AFTER INSERT ON artifacts "
+        "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION artifact_type_counts_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER artifacts_type_count_delete AFTER DELETE ON artifacts "
+        "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION artifact_type_counts_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER artifacts_type_count_truncate AFTER TRUNCATE ON artifacts "
+        "FOR EACH STATEMENT EXECUTE FUNCTION artifact_type_counts_apply()"
+    )
+    # seeded after the triggers exist; CREATE TRIGGER holds off writers until commit
+    op.execute(
+        f"INSERT INTO artifact_type_counts (case_key, type, value) "
+        f"SELECT {CASE_KEY}, {TYPE_KEY}, count(*) FROM artifacts GROUP BY 1, 2"
+    )
+    # recent uploads and the per-day window scan this instead of sorting all of ufdr_files
+    op.create_index(op.f('ix_ufdr_files_uploaded_at'), 'ufdr_files', ['uploaded_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ufdr_files_uploaded_at'), table_name='ufdr_files')
+    op.execute("DROP TRIGGER IF EXISTS artifacts_type_count_truncate ON artifacts")
+    op.execute("DROP TRIGGER IF EXISTS artifacts_type_count_delete ON artifacts")
+    op.execute("DROP TRIGGER IF EXISTS artifacts_type_count_insert ON artifacts")
+    op.execute("DROP FUNCTION IF EXISTS artifact_type_counts_apply()")
+    op.drop_table('artifact_type_counts')
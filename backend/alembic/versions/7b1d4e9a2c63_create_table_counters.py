@@ -0,0 +1,77 @@
+"""create table_counters
+
+Revision ID: 7b1d4e9a2c63
+Revises: 9c3e7a1f5b20
+Create Date: 2026-10-18 17:08:44.520913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1d4e9a2c63'
+down_revision: Union[str, Sequence[str], None] = '9c3e7a1f5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTED_TABLES = ('users', 'ufdr_files', 'artifacts')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('table_counters',
+    sa.Column('name', sa.String(length=63), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # statement-level triggers with transition tables: one counter update per INSERT/DELETE
+    # statement (or COPY), however many rows it touched
+    op.execute("""
+        CREATE FUNCTION table_counters_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            delta bigint;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                UPDATE table_counters SET value = 0 WHERE name = TG_TABLE_NAME;
+                RETURN NULL;
+            ELSIF TG_OP = 'INSERT' THEN
+                SELECT count(*) INTO delta FROM new_rows;
+            ELSE
+                SELECT -count(*) INTO delta FROM old_rows;
+            END IF;
+            IF delta <> 0 THEN
+                UPDATE table_counters SET value = value + delta WHERE name = TG_TABLE_NAME;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    for table in COUNTED_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_count_insert AFTER INSERT ON {table} "
+            f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION table_counters_apply()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_count_delete AFTER DELETE ON {table} "
+            f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION table_counters_apply()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_count_truncate AFTER TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION table_counters_apply()"
+        )
+        # seeded after the triggers exist; CREATE TRIGGER holds off writers until commit,
+        # so no row is missed or counted twice
+        op.execute(f"INSERT INTO table_counters (name, value) SELECT '{table}', count(*) FROM {table}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in COUNTED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_count_truncate ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_count_delete ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_count_insert ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS table_counters_apply()")
+    op.drop_table('table_counters')
@@ -0,0 +1,99 @@
+"""partition audit_logs by month
+
+Revision ID: 9c3e7a1f5b20
+Revises: 41813d472122
+Create Date: 2026-10-18 16:42:09.317754
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e7a1f5b20'
+down_revision: Union[str, Sequence[str], None] = '41813d472122'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# monthly partitions created past the current month; later ones come from
+# app.services.audit_partitions
+MONTHS_AHEAD = 3
+
+
+def _add_months(d: date, n: int) -> date:
+    m = d.month - 1 + n
+    return date(d.year + m // 12, m % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('audit_logs', 'audit_logs_unpartitioned')
+    op.execute("ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey")
+
+    # the partition key has to be part of the primary key
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id UUID NOT NULL,
+            method VARCHAR(10) NOT NULL,
+            path VARCHAR NOT NULL,
+            status_code INTEGER NOT NULL,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            user_agent VARCHAR,
+            user_id UUID,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    # defined on the parent, so every partition (current and future) gets its own copy
+    op.create_index('ix_audit_logs_timestamp_id', 'audit_logs',
+                    [sa.text('timestamp DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_audit_logs_user_id_timestamp', 'audit_logs',
+                    ['user_id', sa.text('timestamp DESC')], unique=False)
+    op.create_index('ix_audit_logs_status_code_timestamp', 'audit_logs',
+                    ['status_code', sa.text('timestamp DESC')], unique=False)
+    # catches anything outside the monthly ranges (e.g. clock skew) instead of failing the insert
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    oldest = op.get_bind().execute(sa.text("SELECT min(timestamp) FROM audit_logs_unpartitioned")).scalar()
+    start = date.today().replace(day=1)
+    if oldest is not None and oldest.date() < start:
+        start = oldest.date().replace(day=1)
+    end = _add_months(date.today().replace(day=1), MONTHS_AHEAD + 1)
+    month = start
+    while month < end:
+        nxt = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_y{month.year:04d}m{month.month:02d} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{nxt.isoformat()}')"
+        )
+        month = nxt
+
+    op.execute("""
+        INSERT INTO audit_logs (id, method, path, status_code, timestamp, user_agent)
+        SELECT id, method, path, status_code, coalesce(timestamp, now() AT TIME ZONE 'utc'), user_agent
+        FROM audit_logs_unpartitioned
+    """)
+    op.drop_table('audit_logs_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('audit_logs', 'audit_logs_partitioned')
+    op.create_table('audit_logs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('method', sa.String(length=10), nullable=False, server_default='UNKNOWN'),
+    sa.Column('path', sa.String(), nullable=False, server_default='/'),
+    sa.Column('user_agent', sa.String(), nullable=True),
+    sa.Column('status_code', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id', name='audit_logs_unpartitioned_pkey')
+    )
+    op.execute("""
+        INSERT INTO audit_logs (id, timestamp, method, path, user_agent, status_code)
+        SELECT id, timestamp, method, path, user_agent, status_code FROM audit_logs_partitioned
+    """)
+    # drops every partition with it
+    op.drop_table('audit_logs_partitioned')
+    op.execute("ALTER TABLE audit_logs RENAME CONSTRAINT audit_logs_unpartitioned_pkey TO audit_logs_pkey")
@@ -0,0 +1,38 @@
+"""track pending artifact embeddings
+
+Revision ID: bdf26e1a1bbc
+Revises: d2dfc37ab2a3
+Create Date: 2026-10-18 11:26:15.734502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bdf26e1a1bbc'
+down_revision: Union[str, Sequence[str], None] = 'd2dfc37ab2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingest_jobs', sa.Column('artifacts_embedded', sa.Integer(), nullable=False, server_default='0'))
+    # partial index: only rows still waiting for an embedding, so the embedding stage
+    # finds its next batch without walking already-embedded artifacts
+    op.create_index(
+        'ix_artifacts_embedding_pending',
+        'artifacts',
+        ['ufdr_file_id', 'id'],
+        unique=False,
+        postgresql_where=sa.text("embedding IS NULL AND extracted_text IS NOT NULL AND extracted_text <> ''"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_artifacts_embedding_pending', table_name='artifacts')
+    op.drop_column('ingest_jobs', 'artifacts_embedded')
@@ -0,0 +1,33 @@
+"""create embedding_claims
+
+Revision ID: c7a2e5f1d804
+Revises: 3f8c2d6a1b94
+Create Date: 2026-10-18 22:14:06.512873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a2e5f1d804'
+down_revision: Union[str, Sequence[str], None] = '3f8c2d6a1b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('embedding_claims',
+    sa.Column('artifact_id', sa.UUID(), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['artifact_id'], ['artifacts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('artifact_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('embedding_claims')
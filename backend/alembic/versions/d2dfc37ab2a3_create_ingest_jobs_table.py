@@ -0,0 +1,42 @@
+"""create ingest_jobs table
+
+Revision ID: d2dfc37ab2a3
+Revises: f5ab5e50afee
+Create Date: 2026-10-18 10:03:47.201914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2dfc37ab2a3'
+down_revision: Union[str, Sequence[str], None] = 'f5ab5e50afee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ingest_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('ufdr_file_id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('artifacts_processed', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['ufdr_file_id'], ['ufdr_files.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingest_jobs_ufdr_file_id'), 'ingest_jobs', ['ufdr_file_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ingest_jobs_ufdr_file_id'), table_name='ingest_jobs')
+    op.drop_table('ingest_jobs')
@@ -0,0 +1,33 @@
+"""add sha256 column to ufdr_files
+
+Revision ID: f5ab5e50afee
+Revises: dc4dc7249fdd
+Create Date: 2026-10-18 09:12:04.518230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5ab5e50afee'
+down_revision: Union[str, Sequence[str], None] = 'dc4dc7249fdd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ufdr_files', sa.Column('sha256', sa.String(length=64), nullable=True))
+    # backfill from the hash previously kept in the JSON meta blob
+    op.execute("UPDATE ufdr_files SET sha256 = meta->>'hash' WHERE sha256 IS NULL AND meta IS NOT NULL")
+    # not unique: older rows may already contain re-uploads of the same evidence
+    op.create_index(op.f('ix_ufdr_files_sha256'), 'ufdr_files', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ufdr_files_sha256'), table_name='ufdr_files')
+    op.drop_column('ufdr_files', 'sha256')
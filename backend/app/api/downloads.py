@@ -0,0 +1,86 @@
+# app/api/downloads.py
+"""
+Responses for downloading stored files (UFDR images, attachments).
+
+Blobs are immutable and named by their SHA-256, so the digest is a strong ETag: a matching
+If-None-Match gets a bodiless 304. On the local backend the file goes out through
+FileResponse, which answers Range/If-Range with 206 partial content (Starlette >= 0.39)
+and hands the file to the server's sendfile when it supports the ASGI pathsend extension.
+With the S3 backend the client is redirected to a short-lived presigned URL, and the object
+store serves ranges itself.
+"""
+import os
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.storage import is_blob_key, storage
+
+# a URL always serves the same bytes; "private" keeps shared caches out of evidence
+CACHE_CONTROL = "private, max-age=86400"
+
+
+def check_file_access(current_user, meta) -> None:
+    """
+    Admins, or the user who uploaded the file. Fails closed: files with no recorded
+    uploader (uploaded before it was recorded) are admin-only.
+    """
+    role = getattr(current_user, "role", None)
+    if getattr(role, "value", role) == "admin":
+        return
+    uploaded_by = meta.get("uploaded_by") if isinstance(meta, dict) else None
+    if not uploaded_by or str(uploaded_by) != str(current_user.id):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as RFC 9110 prescribes for If-None-Match
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def stored_file_response(
+    request: Request,
+    storage_path: str,
+    sha256: str | None,
+    filename: str,
+    content_type: str | None = None,
+    disposition: str = "attachment",
+) -> Response:
+    """Serve a stored file: a blob key, or the plain path of a file stored before blobs."""
+    if is_blob_key(storage_path):
+        sha256 = storage_path.rsplit("/", 1)[-1]
+    headers = {"cache-control": CACHE_CONTROL}
+    if sha256:
+        etag = f'"{sha256.lower()}"'
+        headers["etag"] = etag
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+    if is_blob_key(storage_path):
+        path = storage.local_path(sha256)
+        if path is None:
+            url = await storage.presigned_url(
+                sha256, filename=filename, content_type=content_type,
+                disposition=disposition, expires=settings.S3_PRESIGN_EXPIRES,
+            )
+            # the URL expires; don't let clients cache the redirect
+            return RedirectResponse(url, status_code=307, headers={"cache-control": "no-store"})
+    else:
+        path = storage_path
+
+    if not await run_in_threadpool(os.path.isfile, path):
+        raise HTTPException(status_code=404, detail="Stored file is missing")
+    # without a digest FileResponse falls back to its own mtime/size ETag
+    return FileResponse(
+        path,
+        media_type=content_type,
+        filename=filename,
+        headers=headers,
+        content_disposition_type=disposition,
+    )
@@ -1,58 +1,137 @@
 # app/api/routes/artifacts.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import or_
+from sqlalchemy import tuple_
 
+from app.api.downloads import check_file_access, stored_file_response
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.serializers import FastJSONResponse, dumps, rows_to_dicts
 from app.db.deps import get_db
+from app.db.session import SessionLocal
 from app.core.security import get_current_user
 from app.models.artifact import Artifact
+from app.models.attachment import Attachment
 from app.models.ufdrfile import UFDRFile
 from app.models.user import User
+from app.services.storage import storage
+from app.services.search import build_tsquery, substring_matches, text_matches
 
 router = APIRouter(prefix="/artifacts", tags=["Artifacts"])
 
+STREAM_BATCH_SIZE = 2000
+
 @router.get("/list/{ufdr_file_id}")
 async def list_artifacts(
     ufdr_file_id: str,
     q: str | None = Query(None, description="Optional keyword to filter artifacts"),
+    match: str = Query("fts", pattern="^(fts|substring)$", description="fts: words/\"phrases\"/prefix*; substring: raw text fragment"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # ensure UFDR file exists
-    result = await db.execute(select(UFDRFile).where(UFDRFile.id == ufdr_file_id))
-    ufdr = result.scalars().first()
+    result = await db.execute(select(UFDRFile.id, UFDRFile.meta).where(UFDRFile.id == ufdr_file_id))
+    ufdr = result.first()
     if not ufdr:
         raise HTTPException(status_code=404, detail="UFDR file not found")
 
-    # authorization: allow admin or uploader only
-    if getattr(current_user, "role", None) != "admin":
-        # uploaded_by may be stored in meta or separate column; if not present, skip strict check
-        uploaded_by = ufdr.meta.get("uploaded_by") if isinstance(ufdr.meta, dict) else None
-        if uploaded_by:
-            from uuid import UUID
-            try:
-                if str(uploaded_by) != str(current_user.id):
-                    raise HTTPException(status_code=403, detail="Not authorized")
-            except Exception:
-                pass
+    # authorization: admin or uploader only
+    check_file_access(current_user, ufdr.meta)
 
     # fetch artifacts; optionally filter by keyword in extracted_text
-    stmt = select(Artifact).where(Artifact.ufdr_file_id == ufdr_file_id)
+    # only the columns the response needs -- never raw/embedding
+    stmt = (
+        select(Artifact.id, Artifact.type, Artifact.extracted_text, Artifact.created_at, Artifact.ufdr_file_id)
+        .where(Artifact.ufdr_file_id == ufdr.id)
+        .order_by(Artifact.created_at, Artifact.id)
+    )
     if q:
-        q_like = f"%{q}%"
-        stmt = stmt.where(Artifact.extracted_text.ilike(q_like))
-
-    result = await db.execute(stmt)
-    arts = result.scalars().all()
-
-    return [
-        {
-            "id": str(a.id),
-            "type": a.type,
-            "extracted_text": a.extracted_text,
-            "created_at": a.created_at.isoformat() if a.created_at else None,
-            "ufdr_file_id": str(a.ufdr_file_id) if a.ufdr_file_id else None,
-        }
-        for a in arts
-    ]
+        if match == "substring":
+            stmt = stmt.where(substring_matches(q))          # pg_trgm GIN index
+        else:
+            tsquery = build_tsquery(q, match_all=True)
+            if tsquery is None:
+                return FastJSONResponse({"items": [], "next_cursor": None})
+            stmt = stmt.where(text_matches(tsquery))         # text_tsv GIN index
+    if cursor:
+        after_ts, after_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Artifact.created_at, Artifact.id) > tuple_(after_ts, after_id))
+
+    if format == "ndjson":
+        # whole result set, streamed from a server-side cursor with bounded memory
+        return StreamingResponse(_stream_ndjson(stmt), media_type="application/x-ndjson")
+
+    result = await db.execute(stmt.limit(limit + 1))
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return FastJSONResponse({"items": rows_to_dicts(rows), "next_cursor": next_cursor})
+
+
+def _parse_id(value: str, detail: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise HTTPException(status_code=404, detail=detail)
+
+
+@router.get("/{artifact_id}/attachments")
+async def list_attachments(
+    artifact_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    artifact = (await db.execute(
+        select(Artifact.id, UFDRFile.meta)
+        .join(UFDRFile, UFDRFile.id == Artifact.ufdr_file_id)
+        .where(Artifact.id == _parse_id(artifact_id, "Artifact not found"))
+    )).first()
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    check_file_access(current_user, artifact.meta)
+
+    result = await db.execute(
+        select(Attachment.id, Attachment.filename, Attachment.sha256, Attachment.size, Attachment.content_type)
+        .where(Attachment.artifact_id == artifact.id)
+        .order_by(Attachment.filename)
+    )
+    return FastJSONResponse({"items": rows_to_dicts(result.all())})
+
+
+@router.get("/attachments/{attachment_id}/download")
+async def download_attachment(
+    attachment_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """The attachment's bytes, inline. Supports Range (video seeking) and If-None-Match."""
+    row = (await db.execute(
+        select(Attachment.filename, Attachment.sha256, Attachment.content_type, UFDRFile.meta)
+        .join(UFDRFile, UFDRFile.id == Attachment.ufdr_file_id)
+        .where(Attachment.id == _parse_id(attachment_id, "Attachment not found"))
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    check_file_access(current_user, row.meta)
+    return await stored_file_response(
+        request, storage.key(row.sha256), row.sha256, row.filename.rsplit("/", 1)[-1],
+        content_type=row.content_type, disposition="inline",
+    )
+
+
+async def _stream_ndjson(stmt):
+    # the request-scoped session is closed once the handler returns, so the stream owns one
+    async with SessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield b"".join(dumps(r._asdict()) + b"\n" for r in rows)
@@ -1,35 +1,83 @@
 # app/api/routes/audit.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timezone
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.core.security import get_current_user
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.serializers import FastJSONResponse, rows_to_dicts
 from app.db.deps import get_db
 from app.models.user import User
 from app.models.auditlog import AuditLog
+from app.services.audit_writer import audit_writer
 
 router = APIRouter(prefix="/audit", tags=["Audit"])
 
+
+def _naive_utc(ts: datetime) -> datetime:
+    # audit_logs.timestamp is a naive UTC column
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
 @router.get("/logs")
 async def list_audit_logs(
+    path: str | None = Query(None, description="Path prefix, e.g. /ufdr"),
+    status_code: int | None = Query(None, ge=100, le=599),
+    user_id: UUID | None = Query(None),
+    since: datetime | None = Query(None, description="Inclusive lower bound (UTC)"),
+    until: datetime | None = Query(None, description="Exclusive upper bound (UTC)"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admins only")
 
-    result = await db.execute(select(AuditLog).order_by(AuditLog.timestamp.desc()).limit(50))
-    logs = result.scalars().all()
-
-    return [
-        {
-            "id": str(l.id),
-            "method": l.method,
-            "path": l.path,
-            "status_code": l.status_code,
-            "timestamp": l.timestamp,
-            "user_agent": l.user_agent,
-        }
-        for l in logs
-    ]
+    # newest first; (timestamp, id) desc is served by the per-partition index, and
+    # since/until let the planner prune whole months
+    stmt = (
+        select(
+            AuditLog.id, AuditLog.method, AuditLog.path, AuditLog.status_code,
+            AuditLog.timestamp, AuditLog.user_agent, AuditLog.user_id,
+        )
+        .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+    )
+    if path:
+        escaped = path.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(AuditLog.path.like(f"{escaped}%", escape="\\"))
+    if status_code is not None:
+        stmt = stmt.where(AuditLog.status_code == status_code)
+    if user_id is not None:
+        stmt = stmt.where(AuditLog.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(AuditLog.timestamp >= _naive_utc(since))
+    if until is not None:
+        stmt = stmt.where(AuditLog.timestamp < _naive_utc(until))
+    if cursor:
+        before_ts, before_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(AuditLog.timestamp, AuditLog.id) < tuple_(before_ts, before_id))
+
+    result = await db.execute(stmt.limit(limit + 1))
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+    return FastJSONResponse({"items": rows_to_dicts(rows), "next_cursor": next_cursor})
+
+
+@router.get("/writer")
+async def audit_writer_stats(current_user: User = Depends(get_current_user)):
+    """Backpressure view of the audit queue: depth, drops and flush latency."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admins only")
+    return audit_writer.snapshot()
@@ -5,7 +5,13 @@ from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserRead, UserOut
 from app.schemas.token import Token
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import (
+    create_access_token,
+    hash_password_async,
+    password_hash_pool,
+    require_admin,
+    verify_and_update_password,
+)
 from fastapi.security import OAuth2PasswordRequestForm
 from app.core.deps import get_db
 from app.db.deps import get_db
@@ -26,7 +32,7 @@ async def signup(
     new_user = User(
         username=user_in.username,
         email=user_in.email,
-        hashed_password=hash_password(user_in.password),
+        hashed_password=await hash_password_async(user_in.password),
         role=user_in.role,
     )
     db.add(new_user)
@@ -40,8 +46,15 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
     result = await db.execute(select(User).where(User.username == form_data.username))
     user = result.scalars().first()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user:
         raise HTTPException(status_code=400, detail="Invalid username or password")
+    valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid username or password")
+    if new_hash:
+        # stored hash predates the current BCRYPT_ROUNDS; upgrade it while we have the password
+        user.hashed_password = new_hash
+        await db.commit()
 
     # Create access token (this is the line you asked about)
     access_token = create_access_token(
@@ -49,3 +62,9 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get("/hash-pool")
+async def hash_pool_stats(current_user = Depends(require_admin)):
+    """Password hashing pool: queue depth, rejections and latency of the last hash."""
+    return password_hash_pool.snapshot()
@@ -2,6 +2,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from app.api.serializers import FastJSONResponse, rows_to_dicts
 from app.db.deps import get_db
 from app.core.security import get_current_user
 from app.models.user import User
@@ -27,16 +28,8 @@ async def list_cases(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    q = await db.execute(select(Case).order_by(Case.created_at.desc()))
-    cases = q.scalars().all()
-    out = [
-        {
-            "id": str(c.id),
-            "title": c.title,
-            "description": c.description,
-            "created_at": c.created_at.isoformat() if c.created_at else None,
-            "created_by": str(c.created_by) if c.created_by else None,
-        }
-        for c in cases
-    ]
-    return out
+    q = await db.execute(
+        select(Case.id, Case.title, Case.description, Case.created_at, Case.created_by)
+        .order_by(Case.created_at.desc())
+    )
+    return FastJSONResponse(rows_to_dicts(q.all()))
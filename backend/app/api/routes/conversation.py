@@ -2,13 +2,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import or_
 
+from app.api.downloads import check_file_access
 from app.db.deps import get_db
 from app.core.security import get_current_user
-from app.models.artifact import Artifact
 from app.models.ufdrfile import UFDRFile
 from app.models.user import User
+from app.services.search import embed_query, hybrid_search, lexical_search, vector_search
 
 router = APIRouter(prefix="/chat", tags=["Conversation"])
 
@@ -17,37 +17,45 @@ async def conv_query(
     ufdr_file_id: str,
     q: str = Query(..., min_length=2),
     limit: int = Query(5, ge=1, le=25),
+    mode: str = Query("hybrid", pattern="^(hybrid|keyword|vector)$"),
+    ef_search: int | None = Query(None, ge=1, le=1000, description="HNSW candidate list size (vector/hybrid)"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # ensure file exists
-    result = await db.execute(select(UFDRFile).where(UFDRFile.id == ufdr_file_id))
-    ufdr = result.scalars().first()
+    result = await db.execute(select(UFDRFile.id, UFDRFile.meta).where(UFDRFile.id == ufdr_file_id))
+    ufdr = result.first()
     if not ufdr:
         raise HTTPException(status_code=404, detail="UFDR file not found")
+    # authorization: admin or uploader only
+    check_file_access(current_user, ufdr.meta)
 
-    # simple keyword search: look for artifacts containing any query terms (case-insensitive)
-    q_terms = [t.strip() for t in q.split() if t.strip()]
-    if not q_terms:
+    if not q.strip():
         raise HTTPException(status_code=400, detail="Empty query after tokenization")
 
-    # build OR-like ilike conditions for terms against extracted_text
-    conds = [Artifact.extracted_text.ilike(f"%{term}%") for term in q_terms]
-    stmt = select(Artifact).where(Artifact.ufdr_file_id == ufdr_file_id).where(or_(*conds)).limit(limit)
-    result = await db.execute(stmt)
-    matches = result.scalars().all()
-
-    # If no matches, fallback: return top few artifacts for context
-    if not matches:
-        stmt2 = select(Artifact).where(Artifact.ufdr_file_id == ufdr_file_id).limit(limit)
-        result2 = await db.execute(stmt2)
-        matches = result2.scalars().all()
+    if mode == "hybrid":
+        # full-text and vector retrieval concurrently, fused by reciprocal rank
+        hits = await hybrid_search(q, k=limit, ufdr_file_id=ufdr.id, ef_search=ef_search)
+    elif mode == "vector":
+        query_vector = await embed_query(q)
+        hits = await vector_search(db, query_vector, k=limit, ufdr_file_id=ufdr.id, ef_search=ef_search)
+    else:
+        # full-text search over any of the query terms, best ts_rank first
+        hits = await lexical_search(db, q, k=limit, ufdr_file_id=ufdr.id, match_all=False)
 
     # Build a simple response by concatenating extracts (trim for size)
-    snippets = []
-    for a in matches:
-        text = (a.extracted_text or "")[:800]  # limit snippet length
-        snippets.append(f"[{a.type}] {text}")
+    results = [
+        {
+            "id": str(h.id),
+            "type": h.type,
+            "score": round(h.score, 4),
+            "lexical_rank": h.lexical_rank,
+            "vector_rank": h.vector_rank,
+            "snippet": (h.extracted_text or "")[:800],
+        }
+        for h in hits
+    ]
+    snippets = [f"[{r['type']}] {r['snippet']}" for r in results]
 
     # Simple synthesis: echo query and include matched snippets
     answer = f"I searched the UFDR file for: '{q}'.\nFound {len(snippets)} relevant artifacts:\n\n" + "\n\n".join(snippets)
@@ -55,6 +63,8 @@ async def conv_query(
     return {
         "query": q,
         "ufdr_file_id": ufdr_file_id,
+        "mode": mode,
         "answer": answer,
         "num_matches": len(snippets),
+        "results": results,
     }
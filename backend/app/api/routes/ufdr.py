@@ -1,111 +1,262 @@
 # app/api/routes/ufdr.py
 import os
-import hashlib
 import uuid
 from datetime import datetime
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, status
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.api.downloads import check_file_access, stored_file_response
+from app.api.uploads import receive_file
+from app.core.config import settings
 from app.core.security import get_current_user
 from app.db.deps import get_db
 from app.models.user import User
 from app.models.ufdrfile import UFDRFile   # <-- import model directly
-from app.models.artifact import Artifact   # <-- import model directly
+from app.models.ingestjob import IngestJob
+from app.schemas.ufdr import UploadPreflight, UploadSessionCreate
+from app.services.ingest_worker import submit_ingest_job
+from app.services.storage import storage
+from app.services.upload_sessions import UploadSessionStore
 
 # ... rest of file unchanged
 
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# in-progress resumable uploads are assembled on the same filesystem as the blob store,
+# so publishing a finished upload is a rename
+upload_sessions = UploadSessionStore(os.path.join(settings.LOCAL_STORAGE_PATH, ".sessions"))
 
 router = APIRouter(prefix="/ufdr", tags=["UFDR"])
 
-def sha256sum_from_path(file_path: str) -> str:
-    h = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-async def save_upload_file(upload_file: UploadFile, dest_path: str):
-    # Save streamed content to disk
-    contents = await upload_file.read()
-    with open(dest_path, "wb") as f:
-        f.write(contents)
-
-@router.post("/upload")
-async def upload_ufdr(
-    file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
+def _sanitize_filename(name: str) -> str:
     # Basic filename sanitization (simple)
-    filename = file.filename.replace("/", "_").replace("\\", "_")
-    unique_suffix = uuid.uuid4().hex[:8]
-    stored_filename = f"{unique_suffix}_{filename}"
-    file_path = os.path.join(UPLOAD_DIR, stored_filename)
+    return name.replace("/", "_").replace("\\", "_")
 
-    # Save file to disk
-    await save_upload_file(file, file_path)
+async def _find_by_hash(db: AsyncSession, file_hash: str) -> UFDRFile | None:
+    # served by ix_ufdr_files_sha256
+    result = await db.execute(
+        select(UFDRFile).where(UFDRFile.sha256 == file_hash.lower()).limit(1)
+    )
+    return result.scalars().first()
 
-    # Compute SHA256
-    file_hash = sha256sum_from_path(file_path)
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
 
+async def _register_upload(
+    db: AsyncSession, filename: str, staged_path: str, file_hash: str, file_size: int, uploaded_by
+) -> dict:
+    """
+    Store a fully received file as a blob, create its UFDRFile row and queue its ingestion.
+    `staged_path` is consumed.
+    """
     # Check duplicates by hash
-    result = await db.execute(
-        select(UFDRFile).where(UFDRFile.meta.op("->>")("hash") == file_hash)
-    )
-    existing = result.scalars().first()
+    existing = await _find_by_hash(db, file_hash)
     if existing:
-        # Remove saved duplicate file
-        try:
-            os.remove(file_path)
-        except Exception:
-            pass
+        await run_in_threadpool(_discard, staged_path)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File already uploaded (same hash)")
 
     # Create DB record for UFDRFile
     ufdr = UFDRFile(
         case_id=None,
         filename=filename,
-        storage_path=file_path,
-        meta={"hash": file_hash},
+        storage_path=storage.key(file_hash),
+        sha256=file_hash,
+        # the uploader is the only non-admin allowed to read the file (app.api.downloads)
+        meta={"hash": file_hash, "size": file_size, "uploaded_by": str(uploaded_by)},
         uploaded_at=datetime.utcnow()
     )
     db.add(ufdr)
-    await db.commit()
+    try:
+        # the row goes in first: its trigger takes the blob reference (and row lock), so the
+        # garbage collector can't remove the blob between put_file and commit
+        await db.flush()
+        await storage.put_file(staged_path, file_hash)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        await run_in_threadpool(_discard, staged_path)
+        raise
     await db.refresh(ufdr)
 
-    # Create a few demo artifacts so endpoints have data immediately
-    demo_texts = [
-        f"Extracted message sample for {filename}: phone number +91-99999xxxx",
-        f"Contact entry found in {filename}: John Doe, +1-555-0123",
-        f"Log snippet from {filename}: login at 2025-09-01T12:00:00Z"
-    ]
-    demo_types = ["message", "contact", "log"]
-
-    created_artifact_ids = []
-    for t, txt in zip(demo_types, demo_texts):
-        art = Artifact(
-            case_id=None,
-            ufdr_file_id=ufdr.id,
-            type=t,
-            extracted_text=txt,
-            raw={"demo": True},
-            # embedding left null for now; pgvector accepts None
-            created_at=datetime.utcnow()
-        )
-        db.add(art)
-        await db.flush()  # get PK populated (SQLAlchemy)
-        created_artifact_ids.append(str(art.id))
-
-    await db.commit()
+    # Parsing happens in the background ingest workers
+    job = await submit_ingest_job(db, ufdr.id)
 
     return {
         "id": str(ufdr.id),
         "filename": ufdr.filename,
         "hash": file_hash,
         "uploaded_at": ufdr.uploaded_at.isoformat(),
-        "demo_artifact_ids": created_artifact_ids,
+        "job_id": str(job.id),
+        "status": job.status,
     }
+
+@router.post("/preflight")
+async def preflight_upload(
+    payload: UploadPreflight,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Hash-first dedup: clients send the SHA-256 before any bytes. If the evidence is already
+    stored, the existing record is returned and the upload can be skipped entirely.
+    """
+    existing = await _find_by_hash(db, payload.sha256)
+    if not existing:
+        return {"exists": False, "sha256": payload.sha256.lower()}
+    return {
+        "exists": True,
+        "sha256": existing.sha256,
+        "id": str(existing.id),
+        "filename": existing.filename,
+        "case_id": str(existing.case_id) if existing.case_id else None,
+        "uploaded_at": existing.uploaded_at.isoformat() if existing.uploaded_at else None,
+    }
+
+@router.post(
+    "/upload",
+    status_code=202,
+    # the body is parsed by receive_file, not FastAPI, so describe the form for the docs
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"],
+    }}}}},
+)
+async def upload_ufdr(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    staged_path = storage.staging_path()
+
+    # Stream the file part to disk, computing SHA256 on the way
+    try:
+        filename, file_hash, file_size = await receive_file(request, staged_path)
+    except BaseException:
+        await run_in_threadpool(_discard, staged_path)
+        raise
+
+    return await _register_upload(
+        db, _sanitize_filename(filename), staged_path, file_hash, file_size, current_user.id
+    )
+
+
+# ---- Resumable chunked uploads ----
+# init -> PUT chunks (any order, retry freely) -> GET status to find gaps -> complete
+
+@router.post("/uploads", status_code=201)
+async def init_upload_session(
+    payload: UploadSessionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if payload.sha256:
+        existing = await _find_by_hash(db, payload.sha256)
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "File already uploaded (same hash)", "id": str(existing.id)},
+            )
+
+    session = await upload_sessions.create(
+        owner_id=str(current_user.id),
+        filename=_sanitize_filename(payload.filename),
+        total_size=payload.total_size,
+        chunk_size=payload.chunk_size,
+        sha256=payload.sha256,
+    )
+    return await upload_sessions.describe(session)
+
+@router.get("/uploads/{upload_id}")
+async def get_upload_session(
+    upload_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    session = await upload_sessions.load(upload_id, owner_id=str(current_user.id))
+    return await upload_sessions.describe(session)
+
+@router.put("/uploads/{upload_id}/chunks/{index}")
+async def put_upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: str | None = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    """Raw request body is the chunk; optional X-Chunk-SHA256 header is verified."""
+    session = await upload_sessions.load(upload_id, owner_id=str(current_user.id))
+    return await upload_sessions.write_chunk(session, index, request.stream(), x_chunk_sha256)
+
+@router.post("/uploads/{upload_id}/complete", status_code=202)
+async def complete_upload_session(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    session = await upload_sessions.load(upload_id, owner_id=str(current_user.id))
+    data_path, file_hash, file_size = await upload_sessions.finalize(session)
+
+    try:
+        return await _register_upload(
+            db, session["filename"], data_path, file_hash, file_size, current_user.id
+        )
+    finally:
+        await upload_sessions.discard(upload_id)
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def abort_upload_session(
+    upload_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    await upload_sessions.load(upload_id, owner_id=str(current_user.id))
+    await upload_sessions.discard(upload_id)
+
+
+@router.get("/jobs/{job_id}")
+async def get_ingest_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        job = await db.get(IngestJob, uuid.UUID(job_id))
+    except ValueError:
+        job = None
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return {
+        "id": str(job.id),
+        "ufdr_file_id": str(job.ufdr_file_id),
+        "status": job.status,
+        "artifacts_processed": job.artifacts_processed,
+        "artifacts_embedded": job.artifacts_embedded,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+@router.get("/{ufdr_id}/download")
+async def download_ufdr(
+    ufdr_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The stored evidence file. Supports Range (seeking in large files) and If-None-Match."""
+    try:
+        row = (await db.execute(
+            select(UFDRFile.filename, UFDRFile.storage_path, UFDRFile.sha256, UFDRFile.meta)
+            .where(UFDRFile.id == uuid.UUID(ufdr_id))
+        )).first()
+    except ValueError:
+        row = None
+    if not row:
+        raise HTTPException(status_code=404, detail="UFDR file not found")
+    check_file_access(current_user, row.meta)
+    return await stored_file_response(request, row.storage_path, row.sha256, row.filename)
@@ -0,0 +1,45 @@
+# app/api/serializers.py
+"""
+Shared response serialization for read paths.
+
+Handlers return rows from column-projected queries as plain dicts and hand them to
+FastJSONResponse, which renders UUIDs and datetimes natively (orjson when installed)
+instead of going through jsonable_encoder and per-row isoformat()/str() calls.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback; same output, slower
+    orjson = None
+
+
+def _default(obj: Any):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (UUID, Decimal)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        # orjson only handles exact uuid.UUID; asyncpg returns a subclass, which goes to _default
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def rows_to_dicts(rows: Iterable) -> list[dict]:
+    """Row objects from a column-projected select -> dicts keyed by column label."""
+    return [row._asdict() for row in rows]
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
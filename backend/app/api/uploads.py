@@ -0,0 +1,154 @@
+# app/api/uploads.py
+"""
+Receiving multipart file uploads without spooling.
+
+FastAPI's `UploadFile = File(...)` has Starlette parse the whole form first, copying the file
+into a SpooledTemporaryFile (on disk past 1 MB) before the endpoint runs; the endpoint then
+reads that copy back. For multi-gigabyte evidence images that doubles the disk I/O. Here the
+request body is fed straight into python-multipart's push parser and the file part's bytes
+go to their destination, hashed on the way, as they arrive from the socket.
+"""
+import codecs
+import hashlib
+
+from fastapi import HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import python_multipart as multipart
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    import multipart
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import parse_options_header
+
+# Large writes keep syscall/hash overhead low while peak memory stays at one chunk
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _write_and_hash(f, h, chunk: bytes) -> None:
+    # hashlib and file writes both release the GIL, so this runs well in the threadpool
+    h.update(chunk)
+    f.write(chunk)
+
+
+def _decode(value: bytes, charset: str) -> str:
+    try:
+        return value.decode(charset)
+    except (UnicodeDecodeError, LookupError):
+        return value.decode("latin-1")
+
+
+class _FilePartSink:
+    """
+    Parser callbacks collecting the first part named `field` that carries a filename.
+    Other parts are skipped. Callbacks run synchronously inside `parser.write`; the
+    collected bytes are written out by the caller between writes, off the event loop.
+    """
+
+    def __init__(self, field: str, charset: str):
+        self.field = field
+        self.charset = charset
+        self.filename: str | None = None
+        self.done = False
+        self.buffer = bytearray()
+        self._capturing = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        name = _decode(options.get(b"name", b""), self.charset)
+        self._capturing = (
+            not self.done and self.filename is None
+            and name == self.field and b"filename" in options
+        )
+        if self._capturing:
+            self.filename = _decode(options[b"filename"], self.charset)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._capturing:
+            self.buffer += data[start:end]
+
+    def on_part_end(self) -> None:
+        if self._capturing:
+            self._capturing = False
+            self.done = True
+
+
+async def receive_file(request: Request, dest_path: str, field: str = "file") -> tuple[str, str, int]:
+    """
+    Stream the multipart file field `field` of the request body into `dest_path`, hashing
+    bytes as they are written. Returns (client filename, sha256 hexdigest, size in bytes).
+    The file is written once and never re-read; the caller removes `dest_path` on errors.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Expected a multipart/form-data body")
+    charset = params.get(b"charset", b"utf-8").decode("latin-1")
+    try:
+        charset = codecs.lookup(charset).name
+    except LookupError:
+        charset = "latin-1"
+
+    sink = _FilePartSink(field, charset)
+    parser = multipart.MultipartParser(params[b"boundary"], sink.callbacks())
+    h = hashlib.sha256()
+    size = 0
+    f = await run_in_threadpool(open, dest_path, "wb")
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except FormParserError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail="Invalid multipart data")
+            if len(sink.buffer) >= UPLOAD_CHUNK_SIZE or (sink.done and sink.buffer):
+                data = bytes(sink.buffer)
+                sink.buffer.clear()
+                await run_in_threadpool(_write_and_hash, f, h, data)
+                size += len(data)
+        try:
+            parser.finalize()
+        except FormParserError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Invalid multipart data")
+    finally:
+        await run_in_threadpool(f.close)
+
+    if sink.filename is not None and not sink.done:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Incomplete multipart body")
+    if not sink.done:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"Missing file field '{field}'")
+    return sink.filename, h.hexdigest(), size
@@ -9,7 +9,7 @@ from pydantic import BaseModel
 # backend/app/core/deps.py
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import SessionLocal  # adjust import if database.py is elsewhere
+from app.db.session import SessionLocal  # the shared engine's session factory
 
 async def get_db() -> AsyncSession:
     async with SessionLocal() as session:
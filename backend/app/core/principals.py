@@ -0,0 +1,158 @@
+# app/core/principals.py
+"""
+Cached JWT subject -> user resolution.
+
+`get_current_user` returns a `Principal`, an immutable snapshot of the user columns the API
+needs, instead of a live ORM `User`. Snapshots are kept in a bounded in-process LRU with a
+short TTL and, when REDIS_URL is set, in Redis so all workers share one warm copy. The local
+tier then uses the shorter AUTH_CACHE_LOCAL_TTL: an invalidation only deletes the Redis key
+and this worker's entry, so other workers' copies must age out quickly.
+
+Changing a user's role, password, username or email through the ORM (or deleting the user)
+invalidates its snapshot once the transaction commits. Bulk `update(User)` statements bypass
+ORM events; call `principal_cache.invalidate(user_id)` after those.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "cognis:principal:"
+
+# changes to these columns invalidate the cached snapshot: everything it carries, plus the
+# password so a reset cuts off a compromised account's snapshot at once
+_INVALIDATING_ATTRS = ("role", "hashed_password", "username", "email")
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: uuid.UUID
+    username: str
+    email: str
+    role: UserRole
+
+    def to_json(self) -> str:
+        return json.dumps({"id": str(self.id), "username": self.username,
+                           "email": self.email, "role": self.role.value})
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Principal":
+        data = json.loads(raw)
+        return cls(id=uuid.UUID(data["id"]), username=data["username"],
+                   email=data["email"], role=UserRole(data["role"]))
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int, ttl: float, local_ttl: float, redis_url: str | None = None):
+        self.ttl = ttl
+        self._redis = None
+        if redis_url:
+            import redis.asyncio as redis  # only needed when REDIS_URL is configured
+
+            self._redis = redis.from_url(redis_url, decode_responses=True)
+            local_ttl = min(local_ttl, ttl)
+        else:
+            local_ttl = ttl
+        self._lru = LRUCache(maxsize, ttl=local_ttl)
+        self.stats = {"lru_hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0}
+
+    async def get(self, sub: str) -> Principal | None:
+        principal = self._lru.get(sub)
+        if principal is not None:
+            self.stats["lru_hits"] += 1
+            return principal
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(REDIS_KEY_PREFIX + sub)
+            except Exception:
+                # a cache outage must never turn into an auth outage
+                logger.warning("principal cache: redis get failed", exc_info=True)
+                raw = None
+            if raw is not None:
+                principal = Principal.from_json(raw)
+                self._lru.set(sub, principal)
+                self.stats["redis_hits"] += 1
+                return principal
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, sub: str, principal: Principal) -> None:
+        self._lru.set(sub, principal)
+        if self._redis is not None:
+            try:
+                await self._redis.set(REDIS_KEY_PREFIX + sub, principal.to_json(), ex=max(1, int(self.ttl)))
+            except Exception:
+                logger.warning("principal cache: redis set failed", exc_info=True)
+
+    async def invalidate(self, user_id) -> None:
+        self._forget_local(user_id)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(REDIS_KEY_PREFIX + str(user_id))
+            except Exception:
+                logger.warning("principal cache: redis delete failed", exc_info=True)
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def _forget_local(self, user_id) -> None:
+        self._lru.pop(str(user_id))
+        self.stats["invalidations"] += 1
+
+    def invalidate_soon(self, user_id) -> None:
+        """Invalidate from synchronous code (ORM events): local now, Redis on the loop."""
+        if self._redis is None:
+            self._forget_local(user_id)
+            return
+        try:
+            asyncio.get_running_loop().create_task(self.invalidate(user_id))
+        except RuntimeError:
+            # no loop (scripts, sync sessions): the Redis entry ages out with its TTL
+            self._forget_local(user_id)
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.AUTH_CACHE_SIZE,
+    ttl=settings.AUTH_CACHE_TTL,
+    local_ttl=settings.AUTH_CACHE_LOCAL_TTL,
+    redis_url=settings.REDIS_URL,
+)
+
+
+# ---- invalidation on commit ----
+_PENDING_KEY = "principal_cache_invalidate"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context) -> None:
+    changed = session.info.setdefault(_PENDING_KEY, set())
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in _INVALIDATING_ATTRS):
+                changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate_soon(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,29 +1,100 @@
 # app/core/security.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional, Callable, List
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.core.config import settings
+from app.core.metrics import Gauge, timed_phase
+from app.core.principals import Principal, principal_cache
 from app.db.session import get_db
 from app.models.user import User
 
 # ---- Password hashing ----
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost comes from settings; hashes with another cost are "deprecated" and get
+# transparently rehashed on the next successful login (see verify_and_update_password)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
-def hash_password(password: str) -> str:
+def _truncate(password: str) -> str:
     # bcrypt only supports 72 bytes max
     if len(password.encode("utf-8")) > 72:
         password = password[:72]
-    return pwd_context.hash(password)
+    return password
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(_truncate(password))
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    if len(plain_password.encode("utf-8")) > 72:
-        plain_password = plain_password[:72]
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context.verify(_truncate(plain_password), hashed_password)
+
+
+class PasswordHashPool:
+    """
+    Runs bcrypt on a dedicated thread pool so a login never blocks the event loop (bcrypt
+    releases the GIL, so workers hash in parallel). At most `workers` hashes run at once;
+    beyond `max_waiting` queued callers the request is shed with a 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_waiting: int):
+        self.workers = workers
+        self.max_waiting = max_waiting
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(workers)
+        self.waiting = 0
+        self.running = 0
+        self.stats = {"completed": 0, "rejected": 0, "last_wait_ms": 0.0, "last_run_ms": 0.0}
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "waiting": self.waiting, "running": self.running,
+                "workers": self.workers, "max_waiting": self.max_waiting}
+
+    async def run(self, fn, *args):
+        if self.waiting >= self.max_waiting:
+            self.stats["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.running -= 1
+            self._slots.release()
+            self.stats["completed"] += 1
+            self.stats["last_wait_ms"] = round((started - queued) * 1000, 3)
+            self.stats["last_run_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+
+password_hash_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_waiting=settings.PASSWORD_HASH_MAX_WAITING,
+)
+Gauge("password_hash_waiting", "Callers queued for a bcrypt slot", callback=lambda: password_hash_pool.waiting)
+
+async def hash_password_async(password: str) -> str:
+    return await password_hash_pool.run(hash_password, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Off-loop verify. Returns (valid, new_hash); new_hash is set when the stored hash uses an
+    outdated scheme or cost and should be replaced.
+    """
+    return await password_hash_pool.run(pwd_context.verify_and_update, _truncate(plain_password), hashed_password)
 
 
 # ---- OAuth2 scheme ----
@@ -61,9 +132,19 @@ def decode_access_token(token: str) -> Dict[str, Any]:
 
 # ---- Current user dependency ----
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)   # ✅ use the one from session.py
-):
+) -> Principal:
+    """Resolve the bearer token to a cached `Principal` snapshot (not a live ORM User)."""
+    with timed_phase("auth"):
+        user = await _resolve_user(token, db)
+    # request.state lives in the ASGI scope, where AuditMiddleware picks it up
+    request.state.user_id = user.id
+    return user
+
+
+async def _resolve_user(token: str, db: AsyncSession) -> Principal:
     try:
         payload = jwt.decode(
             token,
@@ -82,13 +163,20 @@ async def get_current_user(
             detail="Invalid authentication credentials",
         )
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
+    # the one query every endpoint would pay for; served from the principal cache
+    user = await principal_cache.get(user_id)
+    if user is None:
+        result = await db.execute(
+            select(User.id, User.username, User.email, User.role).where(User.id == user_id)
         )
+        row = result.first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+        user = Principal(id=row.id, username=row.username, email=row.email, role=row.role)
+        await principal_cache.set(user_id, user)
     return user
 
 
@@ -102,9 +190,10 @@ def require_role(*roles: str) -> Callable:
             ...
     """
     async def role_dependency(current_user = Depends(get_current_user)):
-        # `role` might be stored as enum/str on the model — compare strings
+        # `role` is a UserRole (str enum) on principals; str() of it is "UserRole.admin",
+        # so compare the value
         user_role = getattr(current_user, "role", None)
-        if user_role is None or str(user_role) not in roles:
+        if user_role is None or getattr(user_role, "value", user_role) not in roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Operation not permitted",
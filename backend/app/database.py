@@ -1,17 +1,4 @@
 # backend/app/database.py
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
-
-# Async database engine
-engine = create_async_engine(settings.DATABASE_URL, echo=True, future=True)
-
-# SessionLocal factory
-SessionLocal = sessionmaker(
-    bind=engine,
-    autocommit=False,
-    autoflush=False,
-    expire_on_commit=False,
-    class_=AsyncSession,
-)
+# Kept for older imports: there is exactly one engine and session factory, in app.db.session.
+from app.db.session import SessionLocal, engine  # noqa: F401
@@ -7,4 +7,10 @@ from app.models.user import User
 from app.models.case import Case
 from app.models.ufdrfile import UFDRFile
 from app.models.artifact import Artifact
-from app.models.auditlog import AuditLog
\ No newline at end of file
+from app.models.auditlog import AuditLog
+from app.models.ingestjob import IngestJob
+from app.models.embeddingcache import EmbeddingCacheEntry
+from app.models.embeddingclaim import EmbeddingClaim
+from app.models.tablecounter import TableCounter, ArtifactTypeCount
+from app.models.blob import Blob
+from app.models.attachment import Attachment
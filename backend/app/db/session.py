@@ -1,13 +1,119 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+# app/db/session.py
+"""
+The application's one database engine.
+
+Everything (routes, services, app.database, app.core.deps) shares `engine`/`SessionLocal`
+from here. Pool sizing, pre-ping/recycle and the asyncpg prepared-statement caches come from
+DB_* settings. Processes that can't share the pool (ingest workers, scripts) build their own
+engine with `build_engine(poolclass=NullPool)` so they get the same tuning and logging.
+
+Every statement's duration also goes to the `db_query_seconds` histogram and the current
+request's stats (app.core.metrics), and pooled checkouts are timed by `InstrumentedPool`.
+
+SQL is not echoed. Statements slower than DB_SLOW_QUERY_MS are logged as warnings on the
+`app.db.sql` logger; a DB_LOG_SAMPLE_RATE fraction of the rest is logged at DEBUG.
+"""
+import logging
+import random
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import Gauge, Histogram, request_stats
+
+sql_logger = logging.getLogger("app.db.sql")
+
+# longest statement text written to the log
+MAX_LOGGED_SQL = 2000
+
+
+DB_QUERY_SECONDS = Histogram("db_query_seconds", "SQL statement execution time")
+DB_POOL_WAIT_SECONDS = Histogram("db_pool_checkout_wait_seconds", "Time waiting for a pooled connection")
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """QueuePool that times how long each checkout waits for (or opens) a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            DB_POOL_WAIT_SECONDS.observe(waited)
+            stats = request_stats.get()
+            if stats is not None:
+                stats.pool_wait_seconds += waited
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    DB_QUERY_SECONDS.observe(elapsed)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= settings.DB_SLOW_QUERY_MS:
+        sql_logger.warning("slow query (%.1f ms): %s", elapsed_ms, statement[:MAX_LOGGED_SQL])
+    elif settings.DB_LOG_SAMPLE_RATE and random.random() < settings.DB_LOG_SAMPLE_RATE:
+        sql_logger.debug("query (%.1f ms): %s", elapsed_ms, statement[:MAX_LOGGED_SQL])
+
+
+def _on_error(context):
+    # after_cursor_execute doesn't run for failed statements; drop their start time
+    if context.connection is not None:
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+
+def build_engine(**overrides) -> AsyncEngine:
+    """Create an engine with the configured tuning; `overrides` go to create_async_engine."""
+    kwargs = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if "poolclass" not in overrides:
+        # sizing only applies to the default QueuePool
+        kwargs.update(
+            poolclass=InstrumentedPool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    if make_url(settings.DATABASE_URL).get_driver_name() == "asyncpg":
+        kwargs["connect_args"] = {
+            # SQLAlchemy's per-connection cache of prepared statements
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+            # asyncpg's own statement cache; both must be 0 behind pgbouncer (transaction mode)
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    kwargs.update(overrides)
+
+    new_engine = create_async_engine(settings.DATABASE_URL, **kwargs)
+    event.listen(new_engine.sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(new_engine.sync_engine, "after_cursor_execute", _after_execute)
+    event.listen(new_engine.sync_engine, "handle_error", _on_error)
+    return new_engine
+
 
 # Create engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    future=True,
-)
+engine = build_engine()
+
+Gauge("db_pool_checked_out", "Connections currently checked out of the pool",
+      callback=lambda: engine.pool.checkedout())
+Gauge("db_pool_size", "Connections currently held by the pool (idle and checked out)",
+      callback=lambda: engine.pool.checkedout() + engine.pool.checkedin())
 
 # Session factory
 SessionLocal = sessionmaker(
@@ -1,17 +1,48 @@
 # app/main.py
 import app.db.base # noqa: F401
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.principals import principal_cache
 from app.middleware.audit import AuditMiddleware
+from app.middleware.metrics import MetricsMiddleware
 # Now import routers (they can safely import models directly)
-from app.api.routes import auth, users, ufdr, health, artifacts, conversation, dashboard, audit
+from app.api.routes import auth, users, ufdr, health, artifacts, conversation, dashboard, audit, metrics
 from app.api.routes import cases as cases_router
-app = FastAPI(title="Cognis Backend")
+from app.services.audit_partitions import maintenance_loop as audit_partition_maintenance
+from app.services.audit_writer import audit_writer
+from app.services.embeddings import embedding_pool
+from app.services.ingest_queue import ingest_queue
+from app.services.ingest_worker import ingest_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # background UFDR ingestion consumers and the embedding model processes
+    embedding_pool.start()
+    await ingest_pool.start()
+    await audit_writer.start()
+    partitions_task = asyncio.create_task(audit_partition_maintenance())
+    yield
+    partitions_task.cancel()
+    await ingest_pool.stop()
+    await ingest_queue.close()
+    await principal_cache.close()
+    embedding_pool.stop()
+    # last, so audit events from shutdown-time requests are flushed too
+    await audit_writer.stop()
+
+
+app = FastAPI(title="Cognis Backend", lifespan=lifespan)
 
 # Add audit middleware
 app.add_middleware(AuditMiddleware)
+# outside the audit middleware, so its cost is part of the measured latency
+app.add_middleware(MetricsMiddleware)
 
 # CORS — loosened for development; change later
 app.add_middleware(
@@ -32,3 +63,4 @@ app.include_router(conversation.router)
 app.include_router(dashboard.router)
 app.include_router(audit.router)
 app.include_router(health.router)
+app.include_router(metrics.router)
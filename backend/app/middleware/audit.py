@@ -1,25 +1,46 @@
 #backend/app/middleware/audit.py
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.db.session import get_db
-from app.models.auditlog import AuditLog
-import uuid
-from datetime import datetime
-
-class AuditMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-
-        async for db in get_db():   
-            log = AuditLog(
-                id=uuid.uuid4(),
-                method=request.method,
-                path=request.url.path,
-                status_code=response.status_code,
-                timestamp=datetime.utcnow(),
-                user_agent=request.headers.get("user-agent"),
-            )
-            db.add(log)
-            await db.commit()
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.audit_writer import audit_writer
+
+class AuditMiddleware:
+    """
+    Raw ASGI audit middleware. The status is read off `http.response.start` and the event is
+    queued once the response is done; body messages pass straight through, so streaming
+    responses (downloads, NDJSON) are never buffered.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500  # if the app raises before sending a response
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            user_agent = None
+            for name, value in scope.get("headers", ()):
+                if name == b"user-agent":
+                    user_agent = value.decode("latin-1")
+                    break
+            # queued only; the audit writer persists events in batches off the request path
+            audit_writer.submit(
+                method=scope["method"],
+                path=scope["path"],
+                status_code=status_code,
+                user_agent=user_agent,
+                # set by get_current_user on authenticated requests
+                user_id=scope.get("state", {}).get("user_id"),
+            )
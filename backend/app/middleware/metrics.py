@@ -0,0 +1,78 @@
+#backend/app/middleware/metrics.py
+
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram, RequestStats, request_stats
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+HTTP_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements per request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+HTTP_DB_SECONDS = Histogram("http_request_db_seconds", "Total SQL time per request", ["route"])
+HTTP_OVER_QUERY_BUDGET = Counter(
+    "http_requests_over_query_budget_total", "Requests that ran more than QUERY_BUDGET statements", ["route"],
+)
+
+
+def _route_label(scope: Scope) -> str:
+    # the route template (/artifacts/list/{ufdr_file_id}), never the raw path: bounded cardinality
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Raw ASGI middleware recording per-route latency and the request's SQL statement count,
+    DB time and pool wait (collected through `request_stats`). The totals so far are also
+    returned in a Server-Timing header, so one response shows whether auth, the database or
+    the handler itself took the time.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timings = [
+                    f"db;desc=\"{stats.queries} queries\";dur={stats.db_seconds * 1000:.1f}",
+                    f"pool;dur={stats.pool_wait_seconds * 1000:.1f}",
+                    *(f"{name};dur={secs * 1000:.1f}" for name, secs in stats.phases.items()),
+                    f"app;dur={(time.perf_counter() - started) * 1000:.1f}",
+                ]
+                MutableHeaders(scope=message).append("Server-Timing", ", ".join(timings))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_stats.reset(token)
+            route = _route_label(scope)
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status_code)
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=scope["method"], route=route)
+            HTTP_DB_QUERIES.observe(stats.queries, route=route)
+            HTTP_DB_SECONDS.observe(stats.db_seconds, route=route)
+            if settings.QUERY_BUDGET and stats.queries > settings.QUERY_BUDGET:
+                HTTP_OVER_QUERY_BUDGET.inc(route=route)
+                logger.warning("%s %s ran %d SQL statements (budget %d)",
+                               scope["method"], route, stats.queries, settings.QUERY_BUDGET)
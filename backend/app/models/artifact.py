@@ -1,6 +1,7 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Computed, String, DateTime, ForeignKey, JSON, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 from datetime import datetime
 from app.db.base_class import Base
 from pgvector.sqlalchemy import Vector
@@ -8,10 +9,37 @@ from pgvector.sqlalchemy import Vector
 class Artifact(Base):
     __tablename__ = "artifacts"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"))
-    ufdr_file_id = Column(UUID(as_uuid=True), ForeignKey("ufdr_files.id", ondelete="CASCADE"), nullable=True)
+    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), index=True)
+    ufdr_file_id = Column(UUID(as_uuid=True), ForeignKey("ufdr_files.id", ondelete="CASCADE"), nullable=True, index=True)
     type = Column(String(50))  # 'message', 'call', 'contact'
     extracted_text = Column(String)
-    raw = Column(JSON)
-    embedding = Column(Vector(384))  # 384 dims for all-MiniLM-L6-v2
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    # heavy columns are deferred: read paths select what they return explicitly
+    raw = deferred(Column(JSON))
+    embedding = deferred(Column(Vector(384)))  # 384 dims for all-MiniLM-L6-v2
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # keyset sort key: never NULL
+    # maintained by Postgres; deferred so entity loads don't drag it along
+    text_tsv = deferred(Column(TSVECTOR, Computed("to_tsvector('simple', coalesce(extracted_text, ''))", persisted=True)))
+
+    __table_args__ = (
+        # keyset pagination of a file's artifacts on (created_at, id)
+        Index("ix_artifacts_ufdr_file_id_created_at_id", "ufdr_file_id", "created_at", "id"),
+        # rows the embedding stage still has to process
+        Index(
+            "ix_artifacts_embedding_pending", "ufdr_file_id", "id",
+            postgresql_where=text("embedding IS NULL AND extracted_text IS NOT NULL AND extracted_text <> ''"),
+        ),
+        # keyword search: full-text (ranked) and trigram (substring ilike)
+        Index("ix_artifacts_text_tsv", "text_tsv", postgresql_using="gin"),
+        Index(
+            "ix_artifacts_extracted_text_trgm", "extracted_text",
+            postgresql_using="gin",
+            postgresql_ops={"extracted_text": "gin_trgm_ops"},
+        ),
+        # ANN index for cosine top-k (see app/services/search.py)
+        Index(
+            "ix_artifacts_embedding_hnsw", "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
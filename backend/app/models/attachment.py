@@ -0,0 +1,16 @@
+import uuid
+from sqlalchemy import Column, String, DateTime, ForeignKey, BigInteger
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.db.base_class import Base
+
+class Attachment(Base):
+    __tablename__ = "attachments"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    artifact_id = Column(UUID(as_uuid=True), ForeignKey("artifacts.id", ondelete="CASCADE"), nullable=False, index=True)
+    ufdr_file_id = Column(UUID(as_uuid=True), ForeignKey("ufdr_files.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String, nullable=False)      # path inside the UFDR archive
+    sha256 = Column(String(64), nullable=False, index=True)  # blob key, see app.services.storage
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String(255))
+    created_at = Column(DateTime, default=datetime.utcnow)
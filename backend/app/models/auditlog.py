@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer
+from sqlalchemy import Column, String, DateTime, Integer, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -6,10 +6,19 @@ from app.db.base_class import Base
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # range-partitioned by month on timestamp; partitions are managed by
+    # app.services.audit_partitions, so the partition key is part of the primary key
+    __table_args__ = (
+        Index("ix_audit_logs_timestamp_id", text("timestamp DESC"), text("id DESC")),
+        Index("ix_audit_logs_user_id_timestamp", "user_id", text("timestamp DESC")),
+        Index("ix_audit_logs_status_code_timestamp", "status_code", text("timestamp DESC")),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     method = Column(String(10), nullable=False)            # GET/POST/PUT/DELETE
     path = Column(String, nullable=False)                  # /api/v1/...
     status_code = Column(Integer, nullable=False)          # 200, 404, etc.
-    timestamp = Column(DateTime, default=datetime.utcnow)  # time of request
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)  # time of request
     user_agent = Column(String, nullable=True)             # browser or client info
+    user_id = Column(UUID(as_uuid=True), nullable=True)    # authenticated user, if any
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime, BigInteger, text
+from datetime import datetime
+from app.db.base_class import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+    # content-addressed file in app.services.storage. refcount is maintained by triggers on
+    # the referencing tables (attachments, blob-stored ufdr_files); 0 means collectable
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger)
+    refcount = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from app.db.base_class import Base
+from pgvector.sqlalchemy import Vector
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+    # sha256 of model name + normalized text, see app/services/embedding_cache.py
+    text_hash = Column(String(64), primary_key=True)
+    embedding = Column(Vector(384), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
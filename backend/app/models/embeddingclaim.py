@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.db.base_class import Base
+
+class EmbeddingClaim(Base):
+    # artifacts an embedder has taken and is encoding outside any transaction; a claim older
+    # than EMBEDDING_CLAIM_SECONDS belongs to an embedder that died and can be taken over
+    __tablename__ = "embedding_claims"
+    artifact_id = Column(UUID(as_uuid=True), ForeignKey("artifacts.id", ondelete="CASCADE"), primary_key=True)
+    claimed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
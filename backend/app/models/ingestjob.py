@@ -0,0 +1,19 @@
+import uuid
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.db.base_class import Base
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    ufdr_file_id = Column(UUID(as_uuid=True), ForeignKey("ufdr_files.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued/running/embedding/done/failed
+    artifacts_processed = Column(Integer, nullable=False, default=0)
+    artifacts_embedded = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    # refreshed by the consumer holding the job; a stale value means its worker died
+    heartbeat_at = Column(DateTime)
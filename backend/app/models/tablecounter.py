@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, BigInteger
+from app.db.base_class import Base
+
+class TableCounter(Base):
+    __tablename__ = "table_counters"
+    # row counts kept exact by statement-level triggers on the counted tables
+    # (see migration 7b1d4e9a2c63); read instead of count(*)
+    name = Column(String(63), primary_key=True)   # table name
+    value = Column(BigInteger, nullable=False, default=0)
+
+class ArtifactTypeCount(Base):
+    __tablename__ = "artifact_type_counts"
+    # artifacts per (case, type), kept by the same kind of triggers on artifacts
+    # (see migration 6e2b8f4c9d17); serves the dashboard breakdown without a GROUP BY
+    case_key = Column(String(36), primary_key=True)  # case id, or "unassigned"
+    type = Column(String(50), primary_key=True)      # artifact type, or "unknown"
+    value = Column(BigInteger, nullable=False, default=0)
@@ -10,5 +10,6 @@ class UFDRFile(Base):
     case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"))
     filename = Column(String, nullable=False)
     storage_path = Column(String, nullable=False)
+    sha256 = Column(String(64), index=True)  # indexed for hash-first dedup
     meta = Column(JSON)
-    uploaded_at = Column(DateTime, default=datetime.utcnow)
+    uploaded_at = Column(DateTime, default=datetime.utcnow, index=True)  # recent uploads, per-day breakdown
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+
+# ---------- Hash-first dedup ----------
+class UploadPreflight(BaseModel):
+    sha256: str = Field(..., min_length=64, max_length=64)
+    filename: str | None = None
+    size: int | None = Field(None, ge=0)
+
+
+# ---------- Resumable upload sessions ----------
+class UploadSessionCreate(BaseModel):
+    filename: str
+    total_size: int = Field(..., gt=0)
+    chunk_size: int | None = Field(None, gt=0)
+    sha256: str | None = Field(None, min_length=64, max_length=64)
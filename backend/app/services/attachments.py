@@ -0,0 +1,128 @@
+# app/services/attachments.py
+"""
+Attachment files referenced by extracted artifacts.
+
+Messages in report.xml name their attachments by path inside the UFDR archive. After a file's
+artifacts are written, the ingest worker hands the (artifact id, name) references here; each
+matching archive member is copied into blob storage (app.services.storage) and gets an
+`attachments` row. The same picture forwarded across chats or devices is stored once.
+
+Runs inside the ingest process, so the blocking zip reads are fine here.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import uuid
+import zipfile
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.attachment import Attachment
+from app.services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+# attachment rows (and staged files) per transaction
+ATTACHMENT_BATCH_SIZE = 500
+
+
+def _member_index(zf: zipfile.ZipFile) -> tuple[dict[str, zipfile.ZipInfo], dict[str, zipfile.ZipInfo]]:
+    by_name, by_base = {}, {}
+    for info in zf.infolist():
+        if info.is_dir():
+            continue
+        by_name[info.filename] = info
+        by_base.setdefault(os.path.basename(info.filename), info)
+    return by_name, by_base
+
+
+def _stage_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> tuple[str, str, int]:
+    """Copy one member to a staging file, hashing on the way. Returns (path, sha256, size)."""
+    path = storage.staging_path()
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with zf.open(info) as src, open(path, "wb") as dst:
+            for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+                h.update(chunk)
+                dst.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, h.hexdigest(), size
+
+
+async def _store_batch(db: AsyncSession, rows: list[dict], staged: dict[str, str]) -> None:
+    # rows first (their trigger references the blobs), then the files, then commit
+    try:
+        await db.execute(insert(Attachment.__table__), rows)
+        for sha256, path in staged.items():
+            await storage.put_file(path, sha256)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        for path in staged.values():
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+
+async def store_attachments(
+    db: AsyncSession, path: str, ufdr_file_id, refs: list[tuple[uuid.UUID, str]]
+) -> int:
+    """
+    Store the archive members named in `refs` ((artifact id, attachment name) pairs) and
+    link them to their artifacts. Names are matched exactly, then by basename; names with no
+    matching member are skipped. Returns the number of attachment rows written.
+    """
+    if not refs or not zipfile.is_zipfile(path):
+        return 0
+
+    written = 0
+    missing = 0
+    with zipfile.ZipFile(path) as zf:
+        by_name, by_base = _member_index(zf)
+        # member name -> (sha256, size) of members already copied out of this archive
+        seen: dict[str, tuple[str, int]] = {}
+        rows: list[dict] = []
+        staged: dict[str, str] = {}
+
+        for artifact_id, name in refs:
+            info = by_name.get(name) or by_name.get(name.lstrip("/")) or by_base.get(os.path.basename(name))
+            if info is None:
+                missing += 1
+                continue
+            if info.filename not in seen:
+                staged_path, sha256, size = _stage_member(zf, info)
+                if sha256 in staged:
+                    os.remove(staged_path)  # same bytes under another name in this batch
+                else:
+                    staged[sha256] = staged_path
+                seen[info.filename] = (sha256, size)
+            sha256, size = seen[info.filename]
+            rows.append({
+                "id": uuid.uuid4(),
+                "artifact_id": artifact_id,
+                "ufdr_file_id": ufdr_file_id,
+                "filename": info.filename,
+                "sha256": sha256,
+                "size": size,
+                "content_type": mimetypes.guess_type(info.filename)[0],
+                "created_at": datetime.utcnow(),
+            })
+            if len(rows) >= ATTACHMENT_BATCH_SIZE:
+                await _store_batch(db, rows, staged)
+                written += len(rows)
+                rows, staged = [], {}
+        if rows:
+            await _store_batch(db, rows, staged)
+            written += len(rows)
+
+    if missing:
+        logger.info("%d attachment references had no matching file in the archive", missing)
+    return written
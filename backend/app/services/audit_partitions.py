@@ -0,0 +1,124 @@
+# app/services/audit_partitions.py
+"""
+Monthly partitions of `audit_logs`.
+
+Partitions are named `audit_logs_yYYYYmMM` and cover [first of month, first of next month).
+Maintenance keeps AUDIT_PARTITIONS_AHEAD future months created and drops whole partitions
+older than AUDIT_RETENTION_MONTHS, which is a metadata operation instead of a huge DELETE.
+Rows that landed in `audit_logs_default` (no matching partition at insert time) are moved
+into the new partition when it is created.
+
+It runs in the app lifespan every AUDIT_MAINTENANCE_INTERVAL seconds, or from cron:
+
+    python -m app.services.audit_partitions
+"""
+import asyncio
+import logging
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PARENT = "audit_logs"
+DEFAULT_PARTITION = "audit_logs_default"
+# serializes maintenance across app instances
+_LOCK_KEY = 7240016
+_PARTITION_NAME = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+
+
+def add_months(d: date, n: int) -> date:
+    m = d.month - 1 + n
+    return date(d.year + m // 12, m % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+async def list_partitions(db) -> dict[date, str]:
+    """Monthly partitions currently attached to audit_logs, keyed by their first day."""
+    result = await db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:parent AS regclass)"
+    ), {"parent": PARENT})
+    months = {}
+    for (name,) in result.all():
+        m = _PARTITION_NAME.match(name)
+        if m:
+            months[date(int(m.group(1)), int(m.group(2)), 1)] = name
+    return months
+
+
+async def create_partition(db, month: date) -> None:
+    name, lo, hi = partition_name(month), month.isoformat(), add_months(month, 1).isoformat()
+    # built detached and attached afterwards, so rows already sitting in the default
+    # partition for this range can be moved in first (ATTACH would fail otherwise)
+    await db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+    await db.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE timestamp >= '{lo}' AND timestamp < '{hi}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    await db.execute(text(
+        f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{lo}') TO ('{hi}')"
+    ))
+
+
+async def maintain_partitions(
+    months_ahead: int | None = None,
+    retention_months: int | None = None,
+    today: date | None = None,
+) -> dict:
+    """Create missing upcoming partitions and drop expired ones. Returns what changed."""
+    months_ahead = settings.AUDIT_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    retention_months = settings.AUDIT_RETENTION_MONTHS if retention_months is None else retention_months
+    current = (today or date.today()).replace(day=1)
+    created, dropped = [], []
+
+    async with SessionLocal() as db:
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+        existing = await list_partitions(db)
+        for i in range(months_ahead + 1):
+            month = add_months(current, i)
+            if month not in existing:
+                await create_partition(db, month)
+                created.append(partition_name(month))
+
+        if retention_months > 0:
+            # keep the current month plus `retention_months` full months before it
+            cutoff = add_months(current, -retention_months)
+            for month, name in sorted(existing.items()):
+                if month < cutoff:
+                    await db.execute(text(f"DROP TABLE {name}"))
+                    dropped.append(name)
+            await db.execute(
+                text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"),
+                {"cutoff": cutoff},
+            )
+        await db.commit()
+
+    if created or dropped:
+        logger.info("audit partitions: created %s, dropped %s", created, dropped)
+    return {"created": created, "dropped": dropped}
+
+
+async def maintenance_loop() -> None:
+    while True:
+        try:
+            await maintain_partitions()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("audit partition maintenance failed")
+        await asyncio.sleep(settings.AUDIT_MAINTENANCE_INTERVAL)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(maintain_partitions())
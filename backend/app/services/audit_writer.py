@@ -0,0 +1,163 @@
+# app/services/audit_writer.py
+"""
+Batched, non-blocking audit log writer.
+
+Requests only drop an event on a bounded in-memory queue. A background task drains it and
+writes each batch with a single multi-row INSERT, whenever AUDIT_BATCH_SIZE events are
+waiting or AUDIT_FLUSH_INTERVAL seconds have passed. When the queue is full, events are
+dropped and counted rather than slowing requests down. Whatever is queued is flushed on
+shutdown.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+from app.db.session import SessionLocal
+from app.models.auditlog import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=maxsize)
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+        self.stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "queue_depth": self.depth, "queue_capacity": self.maxsize}
+
+    def submit(self, method: str, path: str, status_code: int, user_agent: str | None = None, **extra) -> None:
+        """Queue one audit event; never blocks and never raises."""
+        event = {
+            "id": uuid.uuid4(),
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+            "timestamp": datetime.utcnow(),
+            "user_agent": user_agent,
+            **extra,
+        }
+        try:
+            self._queue.put_nowait(event)
+            self.stats["enqueued"] += 1
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush the batch being built and everything still queued, then return."""
+        if self._task is not None:
+            # not cancelled: the task holds dequeued events that only it can write
+            self._stopping.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._drain()
+
+    async def _drain(self) -> None:
+        while not self._queue.empty():
+            await self._flush(self._take(self.batch_size))
+
+    def _take(self, n: int) -> list[dict]:
+        batch = []
+        while len(batch) < n and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _get(self, timeout: float | None) -> dict | None:
+        """The next event, or None on timeout or once stop() was called."""
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+        if self._stopping.is_set():
+            return None
+        getter = asyncio.ensure_future(self._queue.get())
+        stopper = asyncio.ensure_future(self._stopping.wait())
+        try:
+            await asyncio.wait((getter, stopper), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopper.cancel()
+            # Queue.get is cancellation-safe: a getter cancelled before it finished leaves
+            # the item queued
+            getter.cancel()
+        if getter.done() and not getter.cancelled():
+            return getter.result()
+        return None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            first = await self._get(None)
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                batch.extend(self._take(self.batch_size - len(batch)))
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                event = await self._get(remaining)
+                if event is None:
+                    break
+                batch.append(event)
+            await self._flush(batch)
+        await self._drain()
+
+    async def _write(self, batch: list[dict]) -> None:
+        async with SessionLocal() as db:
+            await db.execute(insert(AuditLog).values(batch))
+            await db.commit()
+
+    async def _flush(self, batch: list[dict]) -> None:
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            await self._write(batch)
+            self.stats["written"] += len(batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stats["failed"] += len(batch)
+            logger.exception("failed to write %d audit events", len(batch))
+        self.stats["batches"] += 1
+        self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+
+audit_writer = AuditWriter(
+    maxsize=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+)
+
+Gauge("audit_queue_depth", "Audit events waiting to be written", callback=lambda: audit_writer.depth)
+Counter("audit_events_dropped_total", "Audit events dropped because the queue was full",
+        callback=lambda: audit_writer.stats["dropped"])
+Counter("audit_events_failed_total", "Audit events lost to failed batch inserts",
+        callback=lambda: audit_writer.stats["failed"])
+Gauge("audit_last_flush_seconds", "Duration of the last audit batch insert",
+      callback=lambda: audit_writer.stats["last_flush_ms"] / 1000)
@@ -0,0 +1,74 @@
+# app/services/bulk.py
+"""
+Bulk artifact writer.
+
+Artifacts are buffered and written a batch at a time: through asyncpg's binary COPY
+(`copy_records_to_table`) when the engine runs on asyncpg, otherwise through one
+executemany INSERT that SQLAlchemy packs into multi-row VALUES statements. Primary keys
+are generated client-side, so every flush returns its ids without a RETURNING round trip.
+"""
+import json
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.artifact import Artifact
+
+# embedding is filled later by the embedding stage
+ARTIFACT_COLUMNS = ("id", "case_id", "ufdr_file_id", "type", "extracted_text", "raw", "created_at")
+
+
+class ArtifactBulkWriter:
+    def __init__(self, db: AsyncSession, batch_size: int | None = None, **defaults):
+        """`defaults` (e.g. case_id, ufdr_file_id) apply to every row that doesn't set them."""
+        self.db = db
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.defaults = defaults
+        self.written = 0
+        self._rows: list[dict] = []
+
+    @property
+    def full(self) -> bool:
+        return len(self._rows) >= self.batch_size
+
+    def add(self, payload: dict) -> uuid.UUID:
+        row = {**self.defaults, **payload}
+        row.setdefault("id", uuid.uuid4())
+        row.setdefault("created_at", datetime.utcnow())
+        self._rows.append(row)
+        return row["id"]
+
+    async def flush(self) -> list[uuid.UUID]:
+        """Write buffered rows in the session's transaction; returns their ids."""
+        rows, self._rows = self._rows, []
+        if not rows:
+            return []
+
+        conn = await self.db.connection()
+        if conn.dialect.driver == "asyncpg":
+            raw = await conn.get_raw_connection()
+            if not raw.driver_connection.is_in_transaction():
+                # the asyncpg adapter opens its transaction lazily on the first statement;
+                # make sure COPY runs inside it so it commits/rolls back with the session
+                await conn.exec_driver_sql("SELECT 1")
+            records = [
+                tuple(
+                    json.dumps(r.get("raw")) if c == "raw" and r.get("raw") is not None else r.get(c)
+                    for c in ARTIFACT_COLUMNS
+                )
+                for r in rows
+            ]
+            await raw.driver_connection.copy_records_to_table(
+                Artifact.__tablename__, records=records, columns=ARTIFACT_COLUMNS
+            )
+        else:
+            await conn.execute(
+                insert(Artifact.__table__),
+                [{c: r.get(c) for c in ARTIFACT_COLUMNS} for r in rows],
+            )
+
+        self.written += len(rows)
+        return [r["id"] for r in rows]
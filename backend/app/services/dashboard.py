@@ -0,0 +1,190 @@
+# app/services/dashboard.py
+"""
+Dashboard summary.
+
+Totals come from `table_counters`, which triggers keep exact on every INSERT/DELETE/COPY
+into users, ufdr_files and artifacts, so no request ever runs count(*) over artifacts.
+`approximate=True` reads the planner's `pg_class.reltuples` estimate instead (no counter
+row lock traffic at all; accurate to the last ANALYZE). The assembled summary is cached for
+DASHBOARD_CACHE_TTL seconds and concurrent misses share one computation.
+
+The independent parts of a summary run concurrently, each on its own pooled connection (an
+AsyncSession can only run one statement at a time), so a cold summary costs the slowest
+query rather than the sum. Artifacts by type per case are trigger-maintained too
+(`artifact_type_counts`); uploads per day is one GROUP BY over the DASHBOARD_UPLOAD_DAYS
+window, found through the uploaded_at index. Neither scans a whole table.
+
+If counters are ever suspected to have drifted (e.g. rows loaded with triggers disabled):
+
+    python -m app.services.dashboard --recount
+"""
+import asyncio
+import logging
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.artifact import Artifact
+from app.models.tablecounter import ArtifactTypeCount, TableCounter
+from app.models.ufdrfile import UFDRFile
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# response key -> counted table
+COUNTED = {
+    "total_users": User.__tablename__,
+    "total_ufdr_files": UFDRFile.__tablename__,
+    "total_artifacts": Artifact.__tablename__,
+}
+
+UNASSIGNED = "unassigned"  # breakdown key for rows without a case
+
+_cache = LRUCache(maxsize=256, ttl=settings.DASHBOARD_CACHE_TTL)
+_locks: dict[tuple, asyncio.Lock] = {}
+
+
+async def exact_counts(db: AsyncSession) -> dict[str, int]:
+    result = await db.execute(
+        select(TableCounter.name, TableCounter.value).where(TableCounter.name.in_(COUNTED.values()))
+    )
+    by_table = dict(result.all())
+    return {key: int(by_table.get(table, 0)) for key, table in COUNTED.items()}
+
+
+async def approximate_counts(db: AsyncSession) -> dict[str, int]:
+    result = await db.execute(
+        text("SELECT relname, reltuples::bigint FROM pg_class WHERE oid = ANY(CAST(:tables AS regclass[]))"),
+        {"tables": list(COUNTED.values())},
+    )
+    by_table = dict(result.all())
+    if any(by_table.get(table, -1) < 0 for table in COUNTED.values()):
+        # -1: never vacuumed/analyzed, the planner has no estimate yet
+        return await exact_counts(db)
+    return {key: int(by_table[table]) for key, table in COUNTED.items()}
+
+
+async def recent_uploads(db: AsyncSession, limit: int = 5) -> list:
+    result = await db.execute(
+        select(UFDRFile.filename, UFDRFile.uploaded_at).order_by(UFDRFile.uploaded_at.desc()).limit(limit)
+    )
+    return result.all()
+
+
+async def artifacts_by_type(db: AsyncSession, case_id: uuid.UUID | None = None) -> list:
+    # counters of emptied (case, type) pairs stay behind at 0
+    stmt = select(
+        ArtifactTypeCount.case_key, ArtifactTypeCount.type, ArtifactTypeCount.value.label("count")
+    ).where(ArtifactTypeCount.value > 0)
+    if case_id is not None:
+        stmt = stmt.where(ArtifactTypeCount.case_key == str(case_id))
+    return (await db.execute(stmt)).all()
+
+
+async def uploads_per_day(db: AsyncSession, case_id: uuid.UUID | None = None, days: int | None = None) -> list:
+    days = days or settings.DASHBOARD_UPLOAD_DAYS
+    day = func.date_trunc("day", UFDRFile.uploaded_at).label("day")
+    stmt = (
+        select(UFDRFile.case_id, day, func.count().label("count"))
+        .where(UFDRFile.uploaded_at >= datetime.utcnow() - timedelta(days=days))
+        .group_by(UFDRFile.case_id, day)
+        .order_by(day)
+    )
+    if case_id is not None:
+        stmt = stmt.where(UFDRFile.case_id == case_id)
+    return (await db.execute(stmt)).all()
+
+
+async def _in_session(query, *args):
+    async with SessionLocal() as db:
+        return await query(db, *args)
+
+
+def _case_key(case_id) -> str:
+    return str(case_id) if case_id is not None else UNASSIGNED
+
+
+async def _build_summary(approximate: bool, case_id: uuid.UUID | None, breakdown: bool) -> dict:
+    parts = [
+        _in_session(approximate_counts if approximate else exact_counts),
+        _in_session(recent_uploads),
+    ]
+    if breakdown:
+        parts += [_in_session(artifacts_by_type, case_id), _in_session(uploads_per_day, case_id)]
+    counts, recent, *grouped = await asyncio.gather(*parts)
+
+    summary = {
+        **counts,
+        "recent_uploads": [dict(r._mapping) for r in recent],
+        "approximate": approximate,
+    }
+    if breakdown:
+        by_type, per_day = grouped
+        cases: dict[str, dict] = {}
+        for row in by_type:
+            # case_key is already the case id or UNASSIGNED
+            entry = cases.setdefault(row.case_key, {"artifacts_by_type": {}, "uploads_per_day": {}})
+            entry["artifacts_by_type"][row.type] = row.count
+        for row in per_day:
+            entry = cases.setdefault(_case_key(row.case_id), {"artifacts_by_type": {}, "uploads_per_day": {}})
+            entry["uploads_per_day"][row.day.date().isoformat()] = row.count
+        summary["cases"] = cases
+    return summary
+
+
+async def get_summary(
+    approximate: bool = False,
+    case_id: uuid.UUID | None = None,
+    breakdown: bool = False,
+) -> dict:
+    key = (approximate, case_id, breakdown)
+    summary = _cache.get(key)
+    if summary is not None:
+        return summary
+    async with _locks.setdefault(key, asyncio.Lock()):
+        # whoever held the lock may have just filled it
+        summary = _cache.get(key)
+        if summary is None:
+            summary = await _build_summary(approximate, case_id, breakdown)
+            _cache.set(key, summary)
+    # waiters already hold the lock object; later callers hit the cache
+    _locks.pop(key, None)
+    return summary
+
+
+async def recount() -> dict[str, int]:
+    """Reset every counter (and per-type count) from real counts. Slow on big tables; for repairs only."""
+    async with SessionLocal() as db:
+        counts = {}
+        for table in COUNTED.values():
+            # lock out writers so the count and the trigger-maintained value line up
+            await db.execute(text(f"LOCK TABLE {table} IN SHARE MODE"))
+            value = await db.scalar(text(f"SELECT count(*) FROM {table}"))
+            await db.execute(
+                text("INSERT INTO table_counters (name, value) VALUES (:name, :value) "
+                     "ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value"),
+                {"name": table, "value": value},
+            )
+            counts[table] = value
+        # artifacts are share-locked above, so the per-type counts line up as well
+        await db.execute(text("DELETE FROM artifact_type_counts"))
+        await db.execute(text(
+            "INSERT INTO artifact_type_counts (case_key, type, value) "
+            "SELECT coalesce(case_id::text, :unassigned), coalesce(type, 'unknown'), count(*) "
+            "FROM artifacts GROUP BY 1, 2"
+        ), {"unassigned": UNASSIGNED})
+        await db.commit()
+    _cache.clear()
+    return counts
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if "--recount" in sys.argv[1:]:
+        logger.info("table counters: %s", asyncio.run(recount()))
@@ -0,0 +1,118 @@
+# app/services/embedding_cache.py
+"""
+Content-addressed embedding cache.
+
+Forensic dumps repeat the same text constantly (system log lines, forwarded messages,
+boilerplate contacts), so every embedding is looked up by a hash of the model name and the
+normalized text before the model runs: first in an in-process LRU, then in the
+`embedding_cache` table. Only texts missing from both tiers reach the model, and each
+distinct text in a batch is encoded once.
+
+A text is normalized and truncated once, and that string is both what gets hashed and what
+the model sees, so a cached vector is always the encoding of exactly its key's text.
+"""
+import hashlib
+import re
+import unicodedata
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.embeddingcache import EmbeddingCacheEntry
+
+_WHITESPACE = re.compile(r"\s+")
+
+# keeps IN (...) lists and multi-row inserts well under the bind parameter limit
+DB_CHUNK = 5000
+
+# all-MiniLM-L6-v2 truncates at 256 word pieces; don't ship more text than that to workers
+MAX_EMBED_CHARS = 2048
+
+
+def normalize_text(text: str) -> str:
+    # NFKC folds compatibility forms (full-width digits, ligatures); whitespace is collapsed.
+    # Case is kept: the hash has to stay valid for cased models too.
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def prepare_text(text: str) -> str:
+    # the exact string that is hashed and encoded
+    return normalize_text(text)[:MAX_EMBED_CHARS]
+
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, maxsize: int):
+        self.model_name = model_name
+        # float32 arrays: ~1.5 KB per 384-dim entry instead of ~12 KB as a list of floats
+        self._lru = LRUCache(maxsize)
+        self.stats = {"lru_hits": 0, "db_hits": 0, "misses": 0}
+
+    def key(self, prepared: str) -> str:
+        """Cache key of a `prepare_text` result."""
+        return hashlib.sha256(f"{self.model_name}\0{prepared}".encode("utf-8")).hexdigest()
+
+    async def embed(self, db: AsyncSession, pool, texts: list[str]) -> list[np.ndarray]:
+        """
+        Embeddings for `texts` (order preserved), running `pool` only for uncached texts.
+        Commits `db`: the lookup's transaction ends before the model runs, and new entries
+        are stored in a transaction of their own.
+        """
+        prepared = [prepare_text(t) for t in texts]
+        keys = [self.key(t) for t in prepared]
+        found: dict[str, np.ndarray] = {}
+
+        # tier 1: in-process LRU
+        for k in dict.fromkeys(keys):
+            vector = self._lru.get(k)
+            if vector is not None:
+                found[k] = vector
+        self.stats["lru_hits"] += len(found)
+
+        # tier 2: embedding_cache table (primary key lookups)
+        missing = [k for k in dict.fromkeys(keys) if k not in found]
+        for i in range(0, len(missing), DB_CHUNK):
+            result = await db.execute(
+                select(EmbeddingCacheEntry.text_hash, EmbeddingCacheEntry.embedding)
+                .where(EmbeddingCacheEntry.text_hash.in_(missing[i:i + DB_CHUNK]))
+            )
+            for k, vector in result.all():
+                vector = np.asarray(vector, dtype=np.float32)
+                found[k] = vector
+                self._lru.set(k, vector)
+                self.stats["db_hits"] += 1
+
+        # model: one encode per distinct remaining text
+        todo: dict[str, str] = {}
+        for k, text in zip(keys, prepared):
+            if k not in found and k not in todo:
+                todo[k] = text
+        # don't sit idle in a transaction while the model runs
+        await db.commit()
+        if todo:
+            self.stats["misses"] += len(todo)
+            vectors = await pool.embed(list(todo.values()))
+            rows = []
+            for k, vector in zip(todo, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                found[k] = vector
+                self._lru.set(k, vector)
+                rows.append({"text_hash": k, "embedding": vector})
+            # concurrent embedders insert overlapping keys; a common order keeps their row locks
+            # from deadlocking each other
+            rows.sort(key=lambda row: row["text_hash"])
+            for i in range(0, len(rows), DB_CHUNK):
+                await db.execute(
+                    pg_insert(EmbeddingCacheEntry)
+                    .values(rows[i:i + DB_CHUNK])
+                    .on_conflict_do_nothing(index_elements=["text_hash"])
+                )
+            await db.commit()
+
+        return [found[k] for k in keys]
+
+
+embedding_cache = EmbeddingCache(settings.EMBEDDING_MODEL, settings.EMBEDDING_CACHE_SIZE)
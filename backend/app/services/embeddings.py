@@ -0,0 +1,223 @@
+# app/services/embeddings.py
+"""
+CPU embedding stage for `Artifact.embedding`.
+
+The sentence-transformers model runs in a small process pool (one model per process,
+torch threads capped by EMBEDDING_THREADS) so encoding never blocks the event loop.
+Artifacts are pulled in large rounds, sorted by text length and cut into model batches so
+each batch pads to a similar length, then written back in one executemany UPDATE.
+Texts already seen (see embedding_cache.py) never reach the model.
+
+No transaction stays open while the model runs. A round claims its artifacts in a short
+transaction (an `embedding_claims` row each, so concurrent embedders take different rows
+after the claim commits), encodes them, and writes the vectors back and drops the claims in
+a second short transaction. Claims left by an embedder that died expire after
+EMBEDDING_CLAIM_SECONDS.
+
+The stage is resumable by construction: it only ever selects rows whose embedding is
+still NULL. To backfill everything that is pending:
+
+    python -m app.services.embeddings
+"""
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, exists, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+from app.db.session import SessionLocal
+from app.models.artifact import Artifact
+from app.models.embeddingclaim import EmbeddingClaim
+from app.services.embedding_cache import MAX_EMBED_CHARS, embedding_cache
+
+logger = logging.getLogger(__name__)
+
+EMBEDDED_ARTIFACTS = Counter("embedding_artifacts_total", "Artifacts whose embedding was written")
+EMBEDDING_ROUND_SECONDS = Histogram(
+    "embedding_round_seconds", "Time to embed and store one fetch round of artifacts",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+for _stat in ("lru_hits", "db_hits", "misses"):
+    Counter(f"embedding_cache_{_stat}_total", f"Embedding cache {_stat.replace('_', ' ')}",
+            callback=lambda stat=_stat: embedding_cache.stats[stat])
+
+# ---- runs inside a pool process ----
+_model = None
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    global _model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode(texts: list[str]) -> list[list[float]]:
+    vectors = _model.encode(
+        texts,
+        batch_size=len(texts),
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    return vectors.astype("float32").tolist()
+
+
+# ---- event-loop side ----
+class EmbeddingPool:
+    def __init__(self, model_name: str, workers: int, threads: int, batch_size: int):
+        self.model_name = model_name
+        self.workers = workers
+        self.threads = threads
+        self.batch_size = batch_size
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        if self.workers <= 0:
+            return
+        if importlib.util.find_spec("sentence_transformers") is None:
+            logger.warning("sentence-transformers is not installed; embedding stage disabled")
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name, self.threads),
+        )
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts (order preserved) using length-bucketed batches across the pool."""
+        if self._executor is None:
+            raise RuntimeError("embedding pool is not running")
+        loop = asyncio.get_running_loop()
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        buckets = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _encode, [texts[i][:MAX_EMBED_CHARS] for i in bucket])
+            for bucket in buckets
+        ))
+        out: list[list[float] | None] = [None] * len(texts)
+        for bucket, vectors in zip(buckets, results):
+            for i, vector in zip(bucket, vectors):
+                out[i] = vector
+        return out
+
+
+embedding_pool = EmbeddingPool(
+    settings.EMBEDDING_MODEL,
+    workers=settings.EMBEDDING_WORKERS,
+    threads=settings.EMBEDDING_THREADS,
+    batch_size=settings.EMBEDDING_BATCH_SIZE,
+)
+
+
+async def _claim_round(ufdr_file_id, last_id) -> list[tuple]:
+    """Take the next round of pending artifacts; returns their (id, extracted_text)."""
+    now = datetime.utcnow()
+    taken = exists().where(
+        EmbeddingClaim.artifact_id == Artifact.id,
+        EmbeddingClaim.claimed_at > now - timedelta(seconds=settings.EMBEDDING_CLAIM_SECONDS),
+    )
+    stmt = (
+        select(Artifact.id, Artifact.extracted_text)
+        .where(Artifact.embedding.is_(None))
+        .where(Artifact.extracted_text.is_not(None), Artifact.extracted_text != "")
+        .where(~taken)
+        .order_by(Artifact.id)
+        .limit(settings.EMBEDDING_FETCH_SIZE)
+        # rows another embedder is claiming right now are skipped, not waited for
+        .with_for_update(of=Artifact, skip_locked=True)
+    )
+    if ufdr_file_id is not None:
+        stmt = stmt.where(Artifact.ufdr_file_id == ufdr_file_id)
+    if last_id is not None:
+        # keyset: guarantees forward progress even if a row keeps failing
+        stmt = stmt.where(Artifact.id > last_id)
+    async with SessionLocal() as db:
+        rows = (await db.execute(stmt)).all()
+        if rows:
+            claim = pg_insert(EmbeddingClaim).values(
+                [{"artifact_id": row_id, "claimed_at": now} for row_id, _ in rows]
+            )
+            # an expired claim is taken over
+            await db.execute(claim.on_conflict_do_update(
+                index_elements=["artifact_id"], set_={"claimed_at": claim.excluded.claimed_at}
+            ))
+        await db.commit()
+    return rows
+
+
+async def embed_pending(
+    pool: EmbeddingPool,
+    ufdr_file_id=None,
+    on_progress: Callable[[int], Awaitable[None]] | None = None,
+) -> int:
+    """Fill NULL embeddings (optionally for one UFDR file). Returns the number written."""
+    done = 0
+    last_id = None
+    while True:
+        started = time.perf_counter()
+        rows = await _claim_round(ufdr_file_id, last_id)
+        if not rows:
+            break
+        ids = [row_id for row_id, _ in rows]
+        try:
+            async with SessionLocal() as db:
+                # the cache ends its transactions before the model runs
+                vectors = await embedding_cache.embed(db, pool, [text for _, text in rows])
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(Artifact),
+                    [{"id": row_id, "embedding": vector} for row_id, vector in zip(ids, vectors)],
+                )
+                await db.execute(delete(EmbeddingClaim).where(EmbeddingClaim.artifact_id.in_(ids)))
+                await db.commit()
+        except BaseException:
+            # release the round so it doesn't wait out the claim
+            async with SessionLocal() as db:
+                await db.execute(delete(EmbeddingClaim).where(EmbeddingClaim.artifact_id.in_(ids)))
+                await db.commit()
+            raise
+
+        EMBEDDED_ARTIFACTS.inc(len(rows))
+        EMBEDDING_ROUND_SECONDS.observe(time.perf_counter() - started)
+        done += len(rows)
+        last_id = ids[-1]
+        if on_progress is not None:
+            await on_progress(done)
+    return done
+
+
+async def _main() -> None:
+    embedding_pool.start()
+    try:
+        if not embedding_pool.enabled:
+            return
+        total = await embed_pending(embedding_pool)
+        logger.info("embedded %d artifacts", total)
+    finally:
+        embedding_pool.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
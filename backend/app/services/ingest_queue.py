@@ -0,0 +1,70 @@
+# app/services/ingest_queue.py
+"""
+Job queue for UFDR ingestion. Only job ids travel through the queue; the job row in
+`ingest_jobs` carries the state. The in-process asyncio queue is the default; setting
+REDIS_URL switches to a Redis list so separate worker processes can consume it.
+"""
+import abc
+import asyncio
+
+from app.core.config import settings
+
+REDIS_QUEUE_KEY = "cognis:ingest:jobs"
+
+
+class JobQueue(abc.ABC):
+    # whether unfinished jobs must be re-enqueued from the database after a restart
+    volatile = False
+
+    @abc.abstractmethod
+    async def put(self, job_id: str) -> None:
+        """Enqueue a job id."""
+
+    @abc.abstractmethod
+    async def get(self) -> str:
+        """Wait for and remove the next job id."""
+
+    async def close(self) -> None:
+        pass
+
+
+class InProcessQueue(JobQueue):
+    volatile = True
+
+    def __init__(self):
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+
+    async def put(self, job_id: str) -> None:
+        self._queue.put_nowait(job_id)
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+
+class RedisQueue(JobQueue):
+    def __init__(self, url: str, key: str = REDIS_QUEUE_KEY):
+        import redis.asyncio as redis  # only needed when REDIS_URL is configured
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._key = key
+
+    async def put(self, job_id: str) -> None:
+        await self._redis.rpush(self._key, job_id)
+
+    async def get(self) -> str:
+        while True:
+            item = await self._redis.blpop([self._key], timeout=5)
+            if item is not None:
+                return item[1]
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_queue() -> JobQueue:
+    if settings.REDIS_URL:
+        return RedisQueue(settings.REDIS_URL)
+    return InProcessQueue()
+
+
+ingest_queue: JobQueue = create_queue()
@@ -0,0 +1,372 @@
+# app/services/ingest_worker.py
+"""
+Background UFDR ingestion.
+
+Uploads only create an `IngestJob` row and push its id onto the ingest queue. Consumers
+running on the event loop hand each job to a process pool, where the CPU-bound parsing and
+bulk artifact inserts happen with a private database engine, so the API loop never blocks on it.
+Once a file's artifacts are in, the job moves to a separate embedding consumer, and the
+extraction consumer takes the next job.
+
+A consumer claims a job before running it and keeps its `heartbeat_at` fresh while it holds
+it. Only a queued job, or a running one whose heartbeat is older than INGEST_LEASE_SECONDS
+(its worker died), can be claimed, so duplicate queue entries and several app workers
+starting at once never run the same file twice. Every INGEST_SWEEP_INTERVAL the consumers
+re-enqueue jobs that no queue entry will deliver: orphaned ones, and queued ones a lease old
+(the enqueue after the job's commit failed, or the process died between the two).
+
+With REDIS_URL set, extra worker processes can be started with:
+
+    python -m app.services.ingest_worker
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import app.db.base  # noqa: F401  (register all models in spawned processes)
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+from app.db.session import SessionLocal, build_engine
+from app.models.artifact import Artifact
+from app.models.ingestjob import IngestJob
+from app.models.ufdrfile import UFDRFile
+from app.services.attachments import store_attachments
+from app.services.ingest_queue import JobQueue, ingest_queue
+from app.services.bulk import ArtifactBulkWriter
+from app.services.embeddings import EmbeddingPool, embed_pending, embedding_pool
+from app.services.storage import is_blob_key, storage
+from app.services.ufdr_parser import extract_artifacts
+
+logger = logging.getLogger(__name__)
+
+INGEST_JOBS = Counter("ingest_jobs_total", "Finished ingest jobs", ["status"])
+INGEST_ARTIFACTS = Counter("ingest_artifacts_total", "Artifacts extracted by ingest jobs")
+INGEST_EXTRACT_SECONDS = Histogram(
+    "ingest_extract_seconds", "Extraction time per ingest job (parse + bulk insert)",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+
+# ---- job submission (API side) ----
+async def submit_ingest_job(db: AsyncSession, ufdr_file_id) -> IngestJob:
+    job = IngestJob(ufdr_file_id=ufdr_file_id, status="queued", created_at=datetime.utcnow())
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    try:
+        await ingest_queue.put(str(job.id))
+    except Exception:
+        # the job row is committed; the stale-job sweep enqueues it once it is a lease old
+        logger.warning("could not enqueue ingest job %s; left for the sweep", job.id, exc_info=True)
+    return job
+
+
+async def _set_job(db: AsyncSession, job_id: str, **values) -> None:
+    await db.execute(update(IngestJob).where(IngestJob.id == job_id).values(**values))
+    await db.commit()
+
+
+# ---- runs inside a pool process ----
+def run_ingest_job(job_id: str) -> int:
+    """Process-pool entry point: parse the file and insert its artifacts. Returns artifact count."""
+    return asyncio.run(_ingest(job_id))
+
+
+async def _ingest(job_id: str) -> int:
+    # pooled connections can't cross a process boundary; use a private engine
+    engine = build_engine(poolclass=NullPool)
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with Session() as db:
+            job = await db.get(IngestJob, job_id)
+            if job is None:
+                return 0
+            if job.status == "embedding":
+                # extraction already finished before a restart; only embedding is left
+                return job.artifacts_processed
+            ufdr = await db.get(UFDRFile, job.ufdr_file_id)
+            if ufdr is None:
+                raise LookupError(f"UFDR file {job.ufdr_file_id} of ingest job {job_id} not found")
+            retry = job.started_at is not None
+            ufdr_id, case_id = ufdr.id, ufdr.case_id
+            path, filename, sha256 = ufdr.storage_path, ufdr.filename, ufdr.sha256
+            db.expunge_all()
+
+            await _set_job(db, job_id, status="running", started_at=datetime.utcnow(),
+                           artifacts_processed=0, error=None)
+            if retry:
+                # a re-run starts from a clean slate so artifacts aren't duplicated
+                await db.execute(delete(Artifact).where(Artifact.ufdr_file_id == ufdr_id))
+                await db.commit()
+
+            writer = ArtifactBulkWriter(db, case_id=case_id, ufdr_file_id=ufdr_id)
+            # (artifact id, name inside the archive) of every attachment a message names
+            attachment_refs = []
+            # files stored before blob storage keep their plain path
+            source = storage.local_copy(sha256) if is_blob_key(path) else nullcontext(path)
+            try:
+                async with source as local_path:
+                    for payload in extract_artifacts(local_path, filename):
+                        artifact_id = writer.add(payload)
+                        for name in (payload.get("raw") or {}).get("attachments") or ():
+                            attachment_refs.append((artifact_id, name))
+                        if writer.full:
+                            await _flush(db, job_id, writer)
+                    await _flush(db, job_id, writer)
+                    # artifacts are committed; attachment rows can reference them
+                    await store_attachments(db, local_path, ufdr_id, attachment_refs)
+            except Exception as exc:
+                await db.rollback()
+                await _set_job(db, job_id, status="failed", error=repr(exc)[:2000],
+                               finished_at=datetime.utcnow())
+                raise
+
+            # the pool's embedding consumer runs the embedding stage next
+            await _set_job(db, job_id, status="embedding", artifacts_processed=writer.written)
+            return writer.written
+    finally:
+        await engine.dispose()
+
+
+async def _flush(db: AsyncSession, job_id: str, writer: ArtifactBulkWriter) -> None:
+    await writer.flush()
+    await db.execute(
+        update(IngestJob).where(IngestJob.id == job_id).values(artifacts_processed=writer.written)
+    )
+    await db.commit()
+
+
+# ---- consumers (event-loop side) ----
+UNFINISHED = ["queued", "running", "embedding"]
+
+
+async def _update_job(job_id: str, **values) -> None:
+    async with SessionLocal() as db:
+        await _set_job(db, job_id, **values)
+
+
+async def _mark_failed(job_id: str, error: str) -> None:
+    async with SessionLocal() as db:
+        await db.execute(
+            update(IngestJob)
+            .where(IngestJob.id == job_id, IngestJob.status.in_(UNFINISHED))
+            .values(status="failed", error=error[:2000], finished_at=datetime.utcnow())
+        )
+        await db.commit()
+
+
+async def _embed_job(pool: EmbeddingPool, job_id: str) -> None:
+    async with SessionLocal() as db:
+        job = await db.get(IngestJob, job_id)
+        if job is None:
+            return  # its file was deleted; the job row went with it
+        ufdr_file_id = job.ufdr_file_id
+
+    async def progress(done: int) -> None:
+        await _update_job(job_id, artifacts_embedded=done)
+
+    if pool.enabled:
+        await embed_pending(pool, ufdr_file_id, on_progress=progress)
+    await _update_job(job_id, status="done", finished_at=datetime.utcnow())
+
+
+def _stale_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=settings.INGEST_LEASE_SECONDS)
+
+
+def _orphaned():
+    # held by a worker that stopped heartbeating
+    return and_(
+        IngestJob.status.in_(["running", "embedding"]),
+        or_(IngestJob.heartbeat_at.is_(None), IngestJob.heartbeat_at < _stale_cutoff()),
+    )
+
+
+async def _claim(job_id: str) -> bool:
+    """Take the job's lease. False if another live consumer holds it or it is finished."""
+    async with SessionLocal() as db:
+        result = await db.execute(
+            update(IngestJob)
+            .where(IngestJob.id == job_id, or_(IngestJob.status == "queued", _orphaned()))
+            # leaving "queued" in the same statement keeps a second consumer from claiming it
+            .values(heartbeat_at=datetime.utcnow(),
+                    status=case((IngestJob.status == "queued", "running"), else_=IngestJob.status))
+            .returning(IngestJob.id)
+        )
+        claimed = result.first() is not None
+        await db.commit()
+    return claimed
+
+
+async def _heartbeat(job_id: str) -> None:
+    while True:
+        await asyncio.sleep(settings.INGEST_HEARTBEAT_INTERVAL)
+        try:
+            await _update_job(job_id, heartbeat_at=datetime.utcnow())
+        except Exception:
+            logger.warning("heartbeat for ingest job %s failed", job_id, exc_info=True)
+
+
+async def requeue_stranded(queue: JobQueue, all_queued: bool = False) -> int:
+    """
+    Re-enqueue jobs that no queue entry will deliver: jobs whose worker died (stale
+    heartbeat), and queued jobs still unclaimed a lease after they were submitted or last
+    re-enqueued. With `all_queued`, every queued job is pushed (a volatile queue starts empty
+    after a restart). Live workers' jobs are left alone; anything pushed twice is filtered by
+    the claim.
+    """
+    now = datetime.utcnow()
+    # a queued job's heartbeat_at records when it was last re-enqueued, so each stale job
+    # is pushed once per lease however many workers sweep
+    stranded = IngestJob.status == "queued"
+    if not all_queued:
+        stranded = and_(
+            stranded, func.coalesce(IngestJob.heartbeat_at, IngestJob.created_at) < _stale_cutoff()
+        )
+    async with SessionLocal() as db:
+        queued = (await db.execute(
+            update(IngestJob).where(stranded).values(heartbeat_at=now)
+            .returning(IngestJob.id, IngestJob.created_at)
+        )).all()
+        orphaned = (await db.execute(
+            select(IngestJob.id, IngestJob.created_at).where(_orphaned())
+        )).all()
+        await db.commit()
+    rows = sorted(queued + orphaned, key=lambda row: row.created_at or now)
+    for row in rows:
+        await queue.put(str(row.id))
+    return len(rows)
+
+
+class IngestWorkerPool:
+    def __init__(self, queue: JobQueue, workers: int, embedder: EmbeddingPool):
+        self.queue = queue
+        self.workers = workers
+        self.embedder = embedder
+        self._executor: ProcessPoolExecutor | None = None
+        self._tasks: list[asyncio.Task] = []
+        # extracted jobs waiting for the embedding consumer, with their heartbeat tasks
+        self._embedding: asyncio.Queue[tuple[str, asyncio.Task]] = asyncio.Queue()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the parent holds an event loop and open DB connections
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def start(self) -> None:
+        if self.workers <= 0:
+            return
+        self._executor = self._new_executor()
+        requeued = await requeue_stranded(self.queue, all_queued=self.queue.volatile)
+        if requeued:
+            logger.info("re-queued %d unfinished ingest jobs", requeued)
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+        # one file is embedded at a time; the embedding pool parallelizes within it
+        self._tasks.append(asyncio.create_task(self._consume_embeddings()))
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # jobs left waiting stay "embedding" and are reclaimed once their lease runs out
+        while not self._embedding.empty():
+            _, heartbeat = self._embedding.get_nowait()
+            heartbeat.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(settings.INGEST_SWEEP_INTERVAL)
+            try:
+                requeued = await requeue_stranded(self.queue)
+                if requeued:
+                    logger.info("re-queued %d stranded ingest jobs", requeued)
+            except Exception:
+                logger.warning("ingest job sweep failed", exc_info=True)
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job_id = await self.queue.get()
+            try:
+                if not await _claim(job_id):
+                    logger.info("ingest job %s is finished or held by another worker; skipped", job_id)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("could not claim ingest job %s", job_id)
+                continue
+            started = time.perf_counter()
+            heartbeat = asyncio.create_task(_heartbeat(job_id))
+            try:
+                count = await loop.run_in_executor(self._executor, run_ingest_job, job_id)
+                logger.info("ingest job %s extracted %d artifacts", job_id, count)
+                # counted here: the extraction process's own metrics would die with it
+                INGEST_ARTIFACTS.inc(count)
+                INGEST_EXTRACT_SECONDS.observe(time.perf_counter() - started)
+            except asyncio.CancelledError:
+                heartbeat.cancel()
+                raise
+            except BrokenProcessPool:
+                heartbeat.cancel()
+                logger.error("ingest worker process died while running job %s", job_id)
+                await _mark_failed(job_id, "ingest worker process crashed")
+                INGEST_JOBS.inc(status="failed")
+                broken, self._executor = self._executor, self._new_executor()
+                # reap the surviving processes of the broken pool
+                broken.shutdown(wait=False, cancel_futures=True)
+            except Exception as exc:
+                heartbeat.cancel()
+                logger.exception("ingest job %s failed", job_id)
+                await _mark_failed(job_id, repr(exc))
+                INGEST_JOBS.inc(status="failed")
+            else:
+                # the lease (and its heartbeat) passes to the embedding consumer
+                self._embedding.put_nowait((job_id, heartbeat))
+
+    async def _consume_embeddings(self) -> None:
+        while True:
+            job_id, heartbeat = await self._embedding.get()
+            try:
+                await _embed_job(self.embedder, job_id)
+                INGEST_JOBS.inc(status="done")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("embedding stage of ingest job %s failed", job_id)
+                await _mark_failed(job_id, repr(exc))
+                INGEST_JOBS.inc(status="failed")
+            finally:
+                heartbeat.cancel()
+
+
+ingest_pool = IngestWorkerPool(ingest_queue, settings.INGEST_WORKERS, embedding_pool)
+
+
+async def _main() -> None:
+    embedding_pool.start()
+    await ingest_pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await ingest_pool.stop()
+        embedding_pool.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,195 @@
+# app/services/search.py
+"""
+Artifact retrieval.
+
+Keyword search runs on the generated `text_tsv` column (GIN) and is ranked with `ts_rank`.
+Queries support "quoted phrases" and trailing-* prefixes; substring matching (e.g. partial
+phone numbers) uses ILIKE, which the pg_trgm GIN index on `extracted_text` serves.
+
+Hybrid search runs both concurrently, on separate pooled connections, and merges the two
+ranked lists with reciprocal-rank fusion.
+
+Vector search is a cosine-distance top-k served by the HNSW index on
+`artifacts.embedding`. Filters on ufdr_file_id/case_id are applied inside the index scan:
+with pgvector's iterative scan enabled the scan keeps walking the graph until `k` rows pass
+the filter, instead of filtering a fixed ef_search-sized candidate list down to nothing.
+"""
+import asyncio
+import re
+from dataclasses import dataclass
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.artifact import Artifact
+from app.services.embeddings import embedding_pool
+
+
+# must match the generated column definition on Artifact.text_tsv
+TS_CONFIG = "simple"
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+# reciprocal-rank fusion constant (Cormack et al.); damps the weight of the very top ranks
+RRF_K = 60
+
+
+@dataclass
+class SearchHit:
+    id: object
+    type: str | None
+    extracted_text: str | None
+    score: float
+    # 1-based positions in the source lists (hybrid search only)
+    lexical_rank: int | None = None
+    vector_rank: int | None = None
+
+
+async def embed_query(text: str) -> list[float]:
+    if not embedding_pool.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Vector search is unavailable (embedding model not loaded)",
+        )
+    return (await embedding_pool.embed([text]))[0]
+
+
+async def _set_local(db: AsyncSession, name: str, value) -> None:
+    # transaction-scoped, so pooled connections don't keep per-request tuning
+    await db.execute(select(func.set_config(name, str(value), True)))
+
+
+async def vector_search(
+    db: AsyncSession,
+    query_vector,
+    k: int = 10,
+    ufdr_file_id=None,
+    case_id=None,
+    ef_search: int | None = None,
+) -> list[SearchHit]:
+    ef = max(ef_search or settings.VECTOR_EF_SEARCH, k)
+    await _set_local(db, "hnsw.ef_search", ef)
+    if settings.VECTOR_ITERATIVE_SCAN:
+        await _set_local(db, "hnsw.iterative_scan", settings.VECTOR_ITERATIVE_SCAN)
+
+    distance = Artifact.embedding.cosine_distance(query_vector).label("distance")
+    stmt = (
+        select(Artifact.id, Artifact.type, Artifact.extracted_text, distance)
+        .order_by(distance)
+        .limit(k)
+    )
+    if ufdr_file_id is not None:
+        stmt = stmt.where(Artifact.ufdr_file_id == ufdr_file_id)
+    if case_id is not None:
+        stmt = stmt.where(Artifact.case_id == case_id)
+
+    # NULL embeddings aren't in the index; drop them if the planner chose a seq scan
+    rows = [r for r in (await db.execute(stmt)).all() if r.distance is not None]
+    # relaxed_order may return neighbours slightly out of order
+    rows.sort(key=lambda r: r.distance)
+    return [SearchHit(r.id, r.type, r.extracted_text, 1.0 - float(r.distance)) for r in rows]
+
+
+def build_tsquery(q: str, match_all: bool = True):
+    """
+    Turn user input into a tsquery expression: "quoted phrase" -> phraseto_tsquery,
+    term* -> prefix match, anything else -> plainto_tsquery. Parts are AND-ed when
+    `match_all`, otherwise OR-ed. Returns None if nothing searchable is left.
+    """
+    parts = []
+    for phrase, term in _QUERY_TOKEN.findall(q):
+        if phrase.strip():
+            parts.append(func.phraseto_tsquery(TS_CONFIG, phrase))
+        elif term.endswith("*"):
+            words = _WORD.findall(term)
+            if words:
+                # only \w characters reach to_tsquery, so the syntax can't be broken by input
+                expr = " <-> ".join(words[:-1] + [f"{words[-1]}:*"])
+                parts.append(func.to_tsquery(TS_CONFIG, expr))
+        elif term:
+            parts.append(func.plainto_tsquery(TS_CONFIG, term))
+    if not parts:
+        return None
+    combined = parts[0]
+    for part in parts[1:]:
+        combined = combined.op("&&" if match_all else "||")(part)
+    return combined
+
+
+def text_matches(tsquery):
+    return Artifact.text_tsv.op("@@")(tsquery)
+
+
+def substring_matches(q: str):
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return Artifact.extracted_text.ilike(f"%{escaped}%", escape="\\")
+
+
+async def lexical_search(
+    db: AsyncSession,
+    q: str,
+    k: int = 10,
+    ufdr_file_id=None,
+    case_id=None,
+    match_all: bool = False,
+) -> list[SearchHit]:
+    tsquery = build_tsquery(q, match_all=match_all)
+    if tsquery is None:
+        return []
+    rank = func.ts_rank(Artifact.text_tsv, tsquery).label("rank")
+    stmt = (
+        select(Artifact.id, Artifact.type, Artifact.extracted_text, rank)
+        .where(text_matches(tsquery))
+        .order_by(rank.desc())
+        .limit(k)
+    )
+    if ufdr_file_id is not None:
+        stmt = stmt.where(Artifact.ufdr_file_id == ufdr_file_id)
+    if case_id is not None:
+        stmt = stmt.where(Artifact.case_id == case_id)
+    rows = (await db.execute(stmt)).all()
+    return [SearchHit(r.id, r.type, r.extracted_text, float(r.rank)) for r in rows]
+
+
+def reciprocal_rank_fusion(lexical: list[SearchHit], vector: list[SearchHit], k: int) -> list[SearchHit]:
+    fused: dict = {}
+    for field, hits in (("lexical_rank", lexical), ("vector_rank", vector)):
+        for rank, hit in enumerate(hits, start=1):
+            entry = fused.get(hit.id)
+            if entry is None:
+                entry = fused[hit.id] = SearchHit(hit.id, hit.type, hit.extracted_text, 0.0)
+            entry.score += 1.0 / (RRF_K + rank)
+            setattr(entry, field, rank)
+    return sorted(fused.values(), key=lambda h: h.score, reverse=True)[:k]
+
+
+async def hybrid_search(
+    q: str,
+    k: int = 10,
+    ufdr_file_id=None,
+    case_id=None,
+    ef_search: int | None = None,
+    candidates: int | None = None,
+) -> list[SearchHit]:
+    """Lexical + vector retrieval fused with RRF. Falls back to lexical only without a model."""
+    n = candidates or max(4 * k, 20)
+
+    # an AsyncSession can't run two statements at once, so each side gets its own
+    async def _lexical() -> list[SearchHit]:
+        async with SessionLocal() as db:
+            return await lexical_search(db, q, n, ufdr_file_id=ufdr_file_id, case_id=case_id)
+
+    async def _vector() -> list[SearchHit]:
+        if not embedding_pool.enabled:
+            return []
+        query_vector = await embed_query(q)
+        async with SessionLocal() as db:
+            return await vector_search(db, query_vector, n, ufdr_file_id=ufdr_file_id,
+                                       case_id=case_id, ef_search=ef_search)
+
+    lexical, vector = await asyncio.gather(_lexical(), _vector())
+    return reciprocal_rank_fusion(lexical, vector, k)
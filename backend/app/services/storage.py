@@ -0,0 +1,391 @@
+# app/services/storage.py
+"""
+Content-addressed blob storage.
+
+Every stored file (UFDR images, attachments extracted from them) is keyed by its SHA-256 and
+laid out in a two-level sharded tree, `ab/cd/abcd...`, so no directory grows unbounded.
+A blob is written once: identical content from another upload or device is not stored again.
+
+Writers stage the bytes under the storage root (`staging_path()`), hashing as they go, then
+hand the file to `put_file`, which publishes it atomically (rename into place) and read-only.
+Readers never see a partial blob.
+
+Blobs are reference counted in the `blobs` table. Triggers on the referencing tables
+(`attachments`, blob-stored `ufdr_files`) keep `refcount` current, so callers only insert
+or delete their own rows. The safe order for a writer is: insert the referencing rows and
+flush (the trigger locks the blob row), `put_file`, then commit. Blobs whose refcount has
+been 0 for STORAGE_GC_GRACE_SECONDS are removed by:
+
+    python -m app.services.storage gc [--orphans]
+
+STORAGE_BACKEND picks the backend: "local" (files under LOCAL_STORAGE_PATH, the default) or
+"s3" (any S3-compatible store; S3_ENDPOINT_URL points it at MinIO or another local stand-in).
+"""
+import abc
+import argparse
+import asyncio
+import errno
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncContextManager, AsyncIterator, Iterator
+from urllib.parse import quote
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_KEY = re.compile(r"^([0-9a-f]{2})/([0-9a-f]{2})/([0-9a-f]{64})$")
+_SHA = re.compile(r"^[0-9a-f]{64}$")
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+# blobs deleted per GC transaction
+GC_BATCH_SIZE = 500
+
+
+def blob_key(sha256: str) -> str:
+    sha256 = sha256.lower()
+    if not _SHA.match(sha256):
+        raise ValueError(f"not a SHA-256 hex digest: {sha256!r}")
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def is_blob_key(path: str | None) -> bool:
+    """True for storage paths written by this module (legacy rows hold plain file paths)."""
+    return bool(path) and _KEY.match(path) is not None
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _fsync_dir(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class BlobStorage(abc.ABC):
+    """Backend interface. Methods taking a sha256 accept the hex digest of the content."""
+
+    def __init__(self, staging_root: str):
+        # staging always lives on local disk; for the local backend it shares the filesystem
+        # with the blob tree, so publishing is a rename
+        self.staging_root = staging_root
+        os.makedirs(self.staging_root, exist_ok=True)
+
+    def key(self, sha256: str) -> str:
+        return blob_key(sha256)
+
+    def staging_path(self) -> str:
+        """A fresh path to write an incoming file to before `put_file`."""
+        return os.path.join(self.staging_root, uuid.uuid4().hex)
+
+    @abc.abstractmethod
+    async def put_file(self, src: str, sha256: str) -> bool:
+        """
+        Publish the staged file `src` as blob `sha256`. `src` is consumed either way.
+        Returns False if the blob was already stored (the new copy is discarded).
+        """
+
+    @abc.abstractmethod
+    async def exists(self, sha256: str) -> bool:
+        """Whether the blob is stored."""
+
+    @abc.abstractmethod
+    async def delete(self, sha256: str) -> None:
+        """Remove the blob; a missing blob is not an error."""
+
+    def local_path(self, sha256: str) -> str | None:
+        """Path of the blob on this machine, or None if the backend isn't a local filesystem."""
+        return None
+
+    @abc.abstractmethod
+    def local_copy(self, sha256: str) -> AsyncContextManager[str]:
+        """A readable local file with the blob's content for the duration of an `async with`."""
+
+    async def presigned_url(
+        self, sha256: str, filename: str | None = None, content_type: str | None = None,
+        disposition: str = "attachment", expires: int = 300,
+    ) -> str:
+        """
+        A time-limited URL clients can fetch the blob from directly. Only backends whose
+        `local_path` is None are asked for one.
+        """
+        raise TypeError(f"{type(self).__name__} serves blobs from local paths, not URLs")
+
+    @abc.abstractmethod
+    def iter_blobs(self) -> Iterator[tuple[str, float]]:
+        """(sha256, mtime) of every stored blob (blocking; used by the orphan sweep)."""
+
+    def sweep_staging(self, older_than: float) -> int:
+        """Remove staged files left behind by crashed writers."""
+        removed = 0
+        cutoff = time.time() - older_than
+        for entry in os.scandir(self.staging_root):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class LocalFSStorage(BlobStorage):
+    def __init__(self, root: str, fsync: bool = True):
+        self.root = os.path.abspath(root)
+        self.blob_root = os.path.join(self.root, "blobs")
+        self.fsync = fsync
+        os.makedirs(self.blob_root, exist_ok=True)
+        super().__init__(os.path.join(self.root, ".staging"))
+
+    def local_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_root, *self.key(sha256).split("/"))
+
+    def _put(self, src: str, sha256: str) -> bool:
+        dest = self.local_path(sha256)
+        if os.path.exists(dest):
+            _remove_quietly(src)
+            return False
+        shard = os.path.dirname(dest)
+        os.makedirs(shard, exist_ok=True)
+        try:
+            if self.fsync:
+                with open(src, "rb+") as f:
+                    os.fsync(f.fileno())
+            os.chmod(src, 0o444)
+            # atomic: readers see no file or the whole file. A concurrent writer of the same
+            # blob replaces identical bytes.
+            os.replace(src, dest)
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                _remove_quietly(src)
+                raise
+            self._copy_into_place(src, dest)
+        if self.fsync:
+            _fsync_dir(shard)
+        return True
+
+    def _copy_into_place(self, src: str, dest: str) -> None:
+        # staging on another filesystem: copy to a temp file next to the blob, then rename
+        tmp = f"{dest}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(src, "rb") as fin, open(tmp, "wb") as fout:
+                shutil.copyfileobj(fin, fout, COPY_CHUNK_SIZE)
+                if self.fsync:
+                    fout.flush()
+                    os.fsync(fout.fileno())
+            os.chmod(tmp, 0o444)
+            os.replace(tmp, dest)
+        finally:
+            _remove_quietly(tmp)
+            _remove_quietly(src)
+
+    async def put_file(self, src: str, sha256: str) -> bool:
+        return await run_in_threadpool(self._put, src, sha256)
+
+    async def exists(self, sha256: str) -> bool:
+        return await run_in_threadpool(os.path.exists, self.local_path(sha256))
+
+    async def delete(self, sha256: str) -> None:
+        await run_in_threadpool(_remove_quietly, self.local_path(sha256))
+
+    @asynccontextmanager
+    async def local_copy(self, sha256: str) -> AsyncIterator[str]:
+        yield self.local_path(sha256)
+
+    def iter_blobs(self) -> Iterator[tuple[str, float]]:
+        for dirpath, _, files in os.walk(self.blob_root):
+            for name in files:
+                if _SHA.match(name):
+                    try:
+                        yield name, os.path.getmtime(os.path.join(dirpath, name))
+                    except FileNotFoundError:
+                        pass
+
+
+class S3Storage(BlobStorage):
+    def __init__(self, bucket: str, prefix: str = "", staging_root: str = "."):
+        # only needed when the S3 backend is configured
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+        super().__init__(staging_root)
+
+    def object_key(self, sha256: str) -> str:
+        return self.prefix + self.key(sha256)
+
+    def _exists(self, sha256: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(sha256))
+            return True
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def _put(self, src: str, sha256: str) -> bool:
+        try:
+            if self._exists(sha256):
+                return False
+            # a single PUT (or a completed multipart upload) is atomic: the object appears whole
+            self.client.upload_file(src, self.bucket, self.object_key(sha256))
+            return True
+        finally:
+            _remove_quietly(src)
+
+    async def put_file(self, src: str, sha256: str) -> bool:
+        return await run_in_threadpool(self._put, src, sha256)
+
+    async def exists(self, sha256: str) -> bool:
+        return await run_in_threadpool(self._exists, sha256)
+
+    async def delete(self, sha256: str) -> None:
+        await run_in_threadpool(self.client.delete_object, Bucket=self.bucket, Key=self.object_key(sha256))
+
+    @asynccontextmanager
+    async def local_copy(self, sha256: str) -> AsyncIterator[str]:
+        path = self.staging_path()
+        try:
+            await run_in_threadpool(self.client.download_file, self.bucket, self.object_key(sha256), path)
+            yield path
+        finally:
+            await run_in_threadpool(_remove_quietly, path)
+
+    async def presigned_url(
+        self, sha256: str, filename: str | None = None, content_type: str | None = None,
+        disposition: str = "attachment", expires: int = 300,
+    ) -> str:
+        params = {"Bucket": self.bucket, "Key": self.object_key(sha256)}
+        if filename:
+            params["ResponseContentDisposition"] = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+        if content_type:
+            params["ResponseContentType"] = content_type
+        # signing is local, no request is made
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires)
+
+    def iter_blobs(self) -> Iterator[tuple[str, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                match = _KEY.match(obj["Key"][len(self.prefix):])
+                if match:
+                    yield match.group(3), obj["LastModified"].timestamp()
+
+
+def _build_storage() -> BlobStorage:
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "local":
+        return LocalFSStorage(settings.LOCAL_STORAGE_PATH, fsync=settings.STORAGE_FSYNC)
+    if backend == "s3":
+        if not settings.S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs S3_BUCKET")
+        return S3Storage(settings.S3_BUCKET, settings.S3_PREFIX,
+                         staging_root=os.path.join(settings.LOCAL_STORAGE_PATH, ".staging"))
+    raise RuntimeError(f"unknown STORAGE_BACKEND {settings.STORAGE_BACKEND!r}")
+
+
+storage = _build_storage()
+
+
+# ---- garbage collection ----
+async def collect_garbage(grace_seconds: float | None = None) -> int:
+    """Delete blobs that have been unreferenced for the grace period. Returns how many."""
+    from app.db.session import SessionLocal
+
+    grace = settings.STORAGE_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    cutoff = datetime.utcnow() - timedelta(seconds=grace)
+    removed = 0
+    async with SessionLocal() as db:
+        while True:
+            candidates = (await db.execute(
+                text("SELECT sha256 FROM blobs WHERE refcount <= 0 AND updated_at < :cutoff LIMIT :n"),
+                {"cutoff": cutoff, "n": GC_BATCH_SIZE},
+            )).scalars().all()
+            if not candidates:
+                break
+            for sha256 in candidates:
+                # DELETE re-checks the refcount under the row lock: a writer that referenced
+                # the blob in the meantime wins, and one that arrives now waits for our commit
+                # and then stores the blob afresh
+                deleted = await db.scalar(
+                    text("DELETE FROM blobs WHERE sha256 = :sha AND refcount <= 0 "
+                         "AND updated_at < :cutoff RETURNING sha256"),
+                    {"sha": sha256, "cutoff": cutoff},
+                )
+                if deleted:
+                    await storage.delete(sha256)
+                    removed += 1
+                await db.commit()
+            if len(candidates) < GC_BATCH_SIZE:
+                break
+    swept = await run_in_threadpool(storage.sweep_staging, grace)
+    if swept:
+        logger.info("removed %d stale staged files", swept)
+    return removed
+
+
+async def collect_orphans(grace_seconds: float | None = None) -> int:
+    """
+    Delete stored blobs with no `blobs` row, left when a writer died between `put_file` and
+    commit. Walks the whole store, so run it rarely.
+    """
+    from app.db.session import SessionLocal
+
+    grace = settings.STORAGE_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    cutoff = time.time() - grace
+    # a blob published within the grace period may belong to a transaction still in flight
+    shas = await run_in_threadpool(lambda: [sha for sha, mtime in storage.iter_blobs() if mtime < cutoff])
+    removed = 0
+    async with SessionLocal() as db:
+        for i in range(0, len(shas), GC_BATCH_SIZE):
+            batch = shas[i:i + GC_BATCH_SIZE]
+            known = set((await db.execute(
+                text("SELECT sha256 FROM blobs WHERE sha256 = ANY(:shas)"), {"shas": batch},
+            )).scalars().all())
+            await db.rollback()
+            for sha256 in batch:
+                if sha256 not in known:
+                    await storage.delete(sha256)
+                    removed += 1
+    return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blob storage maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gc = sub.add_parser("gc", help="delete unreferenced blobs")
+    gc.add_argument("--grace", type=float, default=None, help="seconds (default STORAGE_GC_GRACE_SECONDS)")
+    gc.add_argument("--orphans", action="store_true", help="also sweep stored blobs with no row")
+    args = parser.parse_args()
+
+    async def _gc() -> None:
+        logger.info("removed %d unreferenced blobs", await collect_garbage(args.grace))
+        if args.orphans:
+            logger.info("removed %d orphaned blobs", await collect_orphans(args.grace))
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_gc())
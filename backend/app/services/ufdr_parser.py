@@ -0,0 +1,195 @@
+# app/services/ufdr_parser.py
+"""
+Streaming extractor for UFDR files.
+
+A UFDR is a zip holding `report.xml` plus the extracted media. The report is read straight
+out of the archive (nothing is unpacked to disk) with `iterparse`, and every element is
+dropped from the tree as soon as it has been turned into an artifact, so memory stays
+bounded by the size of one model rather than the size of the report.
+
+Plain CSV message exports and bare XML reports are accepted as well.
+"""
+import csv
+import io
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import IO, Iterator
+
+# Cellebrite model types -> artifact type
+MODEL_KINDS = {
+    "InstantMessage": "message",
+    "SMS": "message",
+    "MMS": "message",
+    "Email": "message",
+    "Call": "call",
+    "Contact": "contact",
+    "LogEntry": "log",
+    "DeviceEvent": "log",
+    "ApplicationUsage": "log",
+    "UserAccount": "log",
+}
+
+# models whose own fields give context to the artifacts nested inside them
+CONTEXT_MODELS = {"Chat"}
+
+MAX_TEXT_LENGTH = 20000
+
+
+def _local(tag: str) -> str:
+    # '{http://pa.cellebrite.com/report/2.0}model' -> 'model'
+    return tag.rsplit("}", 1)[-1]
+
+
+def _join(*parts) -> str:
+    return " | ".join(p for p in parts if p)
+
+
+def _fields(model: ET.Element) -> dict[str, str]:
+    """Direct <field name=...> children of a model, first non-empty value each."""
+    out = {}
+    for child in model:
+        if _local(child.tag) != "field":
+            continue
+        values = [(v.text or "").strip() for v in child if _local(v.tag) == "value"]
+        values = [v for v in values if v]
+        if values:
+            out[child.get("name", "")] = values[0] if len(values) == 1 else "; ".join(values)
+    return out
+
+
+def _sub_models(model: ET.Element, name: str) -> list[ET.Element]:
+    """Models held by a <modelField>/<multiModelField name=...> child."""
+    out = []
+    for child in model:
+        if _local(child.tag) in ("modelField", "multiModelField") and child.get("name") == name:
+            out.extend(m for m in child if _local(m.tag) == "model")
+    return out
+
+
+def _party(model: ET.Element) -> str:
+    f = _fields(model)
+    ident, name = f.get("Identifier"), f.get("Name")
+    if ident and name and ident != name:
+        return f"{name} ({ident})"
+    return name or ident or ""
+
+
+def _payload(kind: str, model: ET.Element, context: dict[str, str]) -> dict:
+    f = _fields(model)
+    source = f.get("Source") or context.get("Source")
+    raw = {
+        "model_type": model.get("type"),
+        "model_id": model.get("id"),
+        "deleted_state": model.get("deleted_state"),
+        "fields": f,
+    }
+
+    if kind == "message":
+        sender = next((_party(m) for m in _sub_models(model, "From")), "")
+        recipients = [_party(m) for m in _sub_models(model, "To")]
+        attachments = [_fields(m).get("Filename") for m in _sub_models(model, "Attachments")]
+        raw.update(source=source, sender=sender, recipients=recipients,
+                   attachments=[a for a in attachments if a], chat_id=context.get("_id"))
+        text = _join(source, f"from {sender}" if sender else "",
+                     f"to {', '.join(recipients)}" if recipients else "",
+                     f.get("Subject"), f.get("Body"))
+    elif kind == "call":
+        parties = [_party(m) for m in _sub_models(model, "Parties")]
+        raw.update(source=source, parties=parties)
+        text = _join(source, f"{f.get('Type', '')} call".strip(), ", ".join(parties),
+                     f.get("TimeStamp"), f"duration {f['Duration']}" if f.get("Duration") else "")
+    elif kind == "contact":
+        entries = []
+        for entry in _sub_models(model, "Entries"):
+            ef = _fields(entry)
+            if ef.get("Value"):
+                entries.append(_join(ef.get("Category"), ef["Value"]))
+        raw.update(source=source, entries=entries)
+        text = _join(source, f.get("Name"), *entries)
+    else:
+        text = _join(*(f"{k}: {v}" for k, v in f.items()))
+
+    return {"type": kind, "extracted_text": text[:MAX_TEXT_LENGTH], "raw": raw}
+
+
+def parse_report(stream: IO[bytes]) -> Iterator[dict]:
+    """Yield artifact payloads from a Cellebrite report.xml stream."""
+    stack: list[ET.Element] = []
+    mapped_depth = 0  # number of mapped models currently open
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            stack.append(elem)
+            if tag == "model" and elem.get("type") in MODEL_KINDS:
+                mapped_depth += 1
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+        is_mapped = tag == "model" and elem.get("type") in MODEL_KINDS
+        if is_mapped:
+            mapped_depth -= 1
+
+        if mapped_depth:
+            # part of an enclosing artifact; it is read when that artifact ends
+            continue
+
+        if is_mapped:
+            context = {}
+            for ancestor in reversed(stack):
+                if _local(ancestor.tag) == "model" and ancestor.get("type") in CONTEXT_MODELS:
+                    context = _fields(ancestor)
+                    context["_id"] = ancestor.get("id")
+                    break
+            yield _payload(MODEL_KINDS[elem.get("type")], elem, context)
+
+        # fields stay until their owning model ends (context models need them for later
+        # children); everything else is dropped as soon as it has been handled
+        if parent is not None and tag not in ("field", "value"):
+            elem.clear()
+            parent.remove(elem)
+
+
+def parse_csv(stream: IO[bytes]) -> Iterator[dict]:
+    """Yield artifact payloads from a CSV export (one message per row when it has message_text)."""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline=""))
+    for row in reader:
+        row = {k: (v or "").strip() for k, v in row.items() if k}
+        if "message_text" in row:
+            text = _join(row.get("app"), f"from {row['sender']}" if row.get("sender") else "",
+                         f"to {row['recipient']}" if row.get("recipient") else "",
+                         row.get("timestamp"), row["message_text"])
+            kind = "message"
+        else:
+            text = _join(*(f"{k}: {v}" for k, v in row.items() if v))
+            kind = "log"
+        yield {"type": kind, "extracted_text": text[:MAX_TEXT_LENGTH], "raw": row}
+
+
+def _find_report(zf: zipfile.ZipFile) -> str | None:
+    candidates = [n for n in zf.namelist() if n.lower().rsplit("/", 1)[-1] == "report.xml"]
+    if not candidates:
+        candidates = [n for n in zf.namelist() if n.lower().endswith(".xml") and "/" not in n.strip("/")]
+    return min(candidates, key=len) if candidates else None
+
+
+def extract_artifacts(path: str, filename: str) -> Iterator[dict]:
+    """Yield artifact payloads (type, extracted_text, raw) for a stored UFDR file."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            report = _find_report(zf)
+            if report is None:
+                raise ValueError(f"{filename}: no report.xml found in UFDR archive")
+            with zf.open(report) as stream:
+                yield from parse_report(stream)
+        return
+
+    lower = filename.lower()
+    with open(path, "rb") as stream:
+        if lower.endswith(".csv"):
+            yield from parse_csv(stream)
+        elif lower.endswith(".xml"):
+            yield from parse_report(stream)
+        else:
+            raise ValueError(f"{filename}: unsupported UFDR format")
@@ -0,0 +1,358 @@
+# app/services/upload_sessions.py
+"""
+Resumable, chunked upload sessions for large UFDR images.
+
+Layout on disk (one directory per session under the session root):
+
+    <root>/<upload_id>/session.json   immutable session parameters
+    <root>/<upload_id>/data.part      file being assembled (chunks pwrite'd at their offset)
+    <root>/<upload_id>/chunks/<n>     marker written once chunk n is durable; holds its sha256
+    <root>/<upload_id>/chunks/<n>.lock  flock'd while a request writes chunk n
+    <root>/<upload_id>/finalized      created (O_EXCL) by the one `complete` call that wins
+
+Chunk markers are the source of truth for "what has been received", so sessions survive
+worker restarts and can be served by any worker process. Only one request at a time, in any
+worker, writes a given chunk, and once its marker exists the chunk is never written again. The whole-file SHA-256 is kept
+in memory and advanced over the contiguous prefix of received chunks as they arrive; it is
+only rebuilt from disk if this process did not see the earlier chunks. All file I/O runs in
+the threadpool, never on the event loop.
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+MIN_CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = 256 * 1024 * 1024
+SESSION_TTL_SECONDS = 72 * 3600
+
+# request bodies arrive in small pieces; coalesce them before touching the disk
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+READ_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _read_marker(path: str) -> str | None:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _try_lock(path: str) -> int | None:
+    """Non-blocking exclusive flock on `path`; returns the fd holding it, or None if taken."""
+    fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _create_exclusive(path: str) -> bool:
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+class UploadSessionStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        # upload_id -> (next chunk index, sha256 over chunks [0, next))
+        self._hashers: dict[str, tuple[int, "hashlib._Hash"]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    # ---- paths ----
+    def _dir(self, upload_id: str) -> str:
+        # upload ids are uuid hex; reject anything else so ids can't escape the root
+        try:
+            uuid.UUID(hex=upload_id)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+        return os.path.join(self.root, upload_id)
+
+    def data_path(self, upload_id: str) -> str:
+        return os.path.join(self._dir(upload_id), "data.part")
+
+    def _chunk_dir(self, upload_id: str) -> str:
+        return os.path.join(self._dir(upload_id), "chunks")
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    # ---- lifecycle ----
+    async def create(
+        self,
+        owner_id: str,
+        filename: str,
+        total_size: int,
+        chunk_size: int | None = None,
+        sha256: str | None = None,
+    ) -> dict:
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        if total_size <= 0:
+            raise HTTPException(status_code=400, detail="total_size must be positive")
+        # below the minimum only as a single chunk holding the whole (small) file
+        if chunk_size > MAX_CHUNK_SIZE or (chunk_size < MIN_CHUNK_SIZE and chunk_size < total_size):
+            raise HTTPException(
+                status_code=400,
+                detail=f"chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes",
+            )
+        chunk_size = min(chunk_size, total_size)
+
+        await run_in_threadpool(self.purge_expired)
+
+        upload_id = uuid.uuid4().hex
+        session = {
+            "upload_id": upload_id,
+            "owner_id": str(owner_id),
+            "filename": filename,
+            "total_size": total_size,
+            "chunk_size": chunk_size,
+            "num_chunks": -(-total_size // chunk_size),
+            "sha256": sha256.lower() if sha256 else None,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+
+        def _init():
+            session_dir = self._dir(upload_id)
+            os.makedirs(os.path.join(session_dir, "chunks"))
+            # sparse preallocation so chunks can be written at their offset in any order
+            with open(os.path.join(session_dir, "data.part"), "wb") as f:
+                f.truncate(total_size)
+            with open(os.path.join(session_dir, "session.json"), "w") as f:
+                json.dump(session, f)
+
+        await run_in_threadpool(_init)
+        self._hashers[upload_id] = (0, hashlib.sha256())
+        return session
+
+    async def load(self, upload_id: str, owner_id: str | None = None) -> dict:
+        path = os.path.join(self._dir(upload_id), "session.json")
+
+        def _read() -> dict:
+            with open(path) as f:
+                return json.load(f)
+
+        try:
+            session = await run_in_threadpool(_read)
+        except FileNotFoundError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+        if owner_id is not None and session["owner_id"] != str(owner_id):
+            # don't leak the existence of other users' sessions
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+        return session
+
+    def received_chunks(self, upload_id: str) -> list[int]:
+        try:
+            names = os.listdir(self._chunk_dir(upload_id))
+        except FileNotFoundError:
+            return []
+        return sorted(int(n) for n in names if n.isdigit())
+
+    @staticmethod
+    def chunk_length(session: dict, index: int) -> int:
+        start = index * session["chunk_size"]
+        return min(session["chunk_size"], session["total_size"] - start)
+
+    async def describe(self, session: dict) -> dict:
+        """Session status: received byte ranges (coalesced, end-exclusive) and missing chunks."""
+        received = await run_in_threadpool(self.received_chunks, session["upload_id"])
+        received_set = set(received)
+        ranges: list[list[int]] = []
+        for index in received:
+            start = index * session["chunk_size"]
+            end = start + self.chunk_length(session, index)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return {
+            "upload_id": session["upload_id"],
+            "filename": session["filename"],
+            "total_size": session["total_size"],
+            "chunk_size": session["chunk_size"],
+            "num_chunks": session["num_chunks"],
+            "received_bytes": sum(end - start for start, end in ranges),
+            "received_ranges": ranges,
+            "missing_chunks": [i for i in range(session["num_chunks"]) if i not in received_set],
+        }
+
+    # ---- chunk intake ----
+    async def write_chunk(
+        self,
+        session: dict,
+        index: int,
+        body: AsyncIterator[bytes],
+        expected_sha256: str | None = None,
+    ) -> dict:
+        upload_id = session["upload_id"]
+        if not 0 <= index < session["num_chunks"]:
+            raise HTTPException(status_code=400, detail="Chunk index out of range")
+        marker = os.path.join(self._chunk_dir(upload_id), str(index))
+        lock_fd = await run_in_threadpool(_try_lock, marker + ".lock")
+        if lock_fd is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Chunk {index} is being uploaded by another request",
+            )
+        try:
+            # checked under the lock: a retry racing the request that lands the chunk must
+            # not overwrite verified bytes (which may already be part of the running hash)
+            landed = await run_in_threadpool(_read_marker, marker)
+            if landed is not None:
+                return {"index": index, "size": self.chunk_length(session, index), "sha256": landed}
+            return await self._write_unmarked_chunk(session, index, marker, body, expected_sha256)
+        finally:
+            await run_in_threadpool(os.close, lock_fd)
+
+    async def _write_unmarked_chunk(
+        self,
+        session: dict,
+        index: int,
+        marker: str,
+        body: AsyncIterator[bytes],
+        expected_sha256: str | None,
+    ) -> dict:
+        upload_id = session["upload_id"]
+        expected_len = self.chunk_length(session, index)
+        offset = index * session["chunk_size"]
+
+        # if this chunk extends the hashed prefix, feed a copy of the running file hash
+        # while streaming so the bytes never have to be read back
+        prefix = self._hashers.get(upload_id)
+        pending = prefix[1].copy() if prefix and prefix[0] == index else None
+        chunk_hash = hashlib.sha256()
+
+        def _flush(fd: int, data: bytes, at: int) -> None:
+            chunk_hash.update(data)
+            if pending is not None:
+                pending.update(data)
+            os.pwrite(fd, data, at)
+
+        fd = await run_in_threadpool(os.open, self.data_path(upload_id), os.O_WRONLY)
+        written = 0
+        try:
+            buf = bytearray()
+            async for piece in body:
+                if written + len(buf) + len(piece) > expected_len:
+                    raise HTTPException(status_code=400, detail=f"Chunk {index} exceeds {expected_len} bytes")
+                buf += piece
+                if len(buf) >= WRITE_BUFFER_SIZE:
+                    await run_in_threadpool(_flush, fd, bytes(buf), offset + written)
+                    written += len(buf)
+                    buf.clear()
+            if buf:
+                await run_in_threadpool(_flush, fd, bytes(buf), offset + written)
+                written += len(buf)
+            if written != expected_len:
+                raise HTTPException(status_code=400, detail=f"Chunk {index} must be {expected_len} bytes, got {written}")
+            await run_in_threadpool(os.fsync, fd)
+        finally:
+            await run_in_threadpool(os.close, fd)
+
+        digest = chunk_hash.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != digest:
+            raise HTTPException(status_code=400, detail=f"Chunk {index} checksum mismatch")
+
+        def _mark():
+            with open(marker + ".tmp", "w") as f:
+                f.write(digest)
+            os.replace(marker + ".tmp", marker)
+
+        await run_in_threadpool(_mark)
+
+        async with self._lock(upload_id):
+            current = self._hashers.get(upload_id)
+            if pending is not None and current is not None and current[0] == index:
+                self._hashers[upload_id] = (index + 1, pending)
+            await self._advance_prefix(session)
+
+        return {"index": index, "size": written, "sha256": digest}
+
+    async def _advance_prefix(self, session: dict) -> None:
+        """Extend the running hash over any contiguous chunks that arrived out of order."""
+        upload_id = session["upload_id"]
+        received = set(await run_in_threadpool(self.received_chunks, upload_id))
+        next_index, h = self._hashers.get(upload_id) or (0, hashlib.sha256())
+        if next_index not in received:
+            self._hashers[upload_id] = (next_index, h)
+            return
+
+        def _read_range(start_index: int, stop_index: int) -> None:
+            with open(self.data_path(upload_id), "rb") as f:
+                f.seek(start_index * session["chunk_size"])
+                remaining = sum(self.chunk_length(session, i) for i in range(start_index, stop_index))
+                while remaining:
+                    data = f.read(min(READ_CHUNK_SIZE, remaining))
+                    if not data:
+                        break
+                    h.update(data)
+                    remaining -= len(data)
+
+        stop = next_index
+        while stop in received:
+            stop += 1
+        await run_in_threadpool(_read_range, next_index, stop)
+        self._hashers[upload_id] = (stop, h)
+
+    # ---- completion ----
+    async def finalize(self, session: dict) -> tuple[str, str, int]:
+        """
+        Verify the session is complete and claim it for completion; returns (assembled file
+        path, sha256, size). Only one caller, in any worker process, gets past the claim; the
+        others get a 409. The claim is released only by discarding the session.
+        """
+        upload_id = session["upload_id"]
+        async with self._lock(upload_id):
+            missing = (await self.describe(session))["missing_chunks"]
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail={"message": "Upload incomplete", "missing_chunks": missing[:100]},
+                )
+            await self._advance_prefix(session)
+            next_index, h = self._hashers[upload_id]
+            if next_index != session["num_chunks"]:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload incomplete")
+
+            file_hash = h.hexdigest()
+            if session.get("sha256") and session["sha256"] != file_hash:
+                raise HTTPException(status_code=400, detail="Assembled file does not match the declared sha256")
+
+            # the lock covers this process; O_EXCL covers the other workers
+            claimed = await run_in_threadpool(_create_exclusive, os.path.join(self._dir(upload_id), "finalized"))
+            if not claimed:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already being completed")
+        return self.data_path(upload_id), file_hash, session["total_size"]
+
+    async def discard(self, upload_id: str) -> None:
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+        await run_in_threadpool(shutil.rmtree, self._dir(upload_id), True)
+
+    def purge_expired(self, max_age: int = SESSION_TTL_SECONDS) -> None:
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                # the chunks dir mtime moves with every received chunk, so live sessions survive
+                if os.path.getmtime(os.path.join(path, "chunks")) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+                    self._hashers.pop(name, None)
+            except OSError:
+                continue
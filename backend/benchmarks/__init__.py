@@ -0,0 +1,12 @@
+# benchmarks/__init__.py
+"""
+Reproducible performance harness.
+
+    python -m benchmarks.generator bench.ufdr --messages 200000     # synthetic UFDR only
+    python -m benchmarks.run --out results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.compare results/old.json results/new.json
+
+The generator is deterministic for a given seed and configuration, so every run ingests
+byte-identical input. The runner drives the real app in-process against DATABASE_URL
+(point it at a local, disposable Postgres) and writes one JSON document per run.
+"""
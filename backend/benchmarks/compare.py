@@ -0,0 +1,64 @@
+# benchmarks/compare.py
+"""
+Diff two benchmark result files:
+
+    python -m benchmarks.compare results/base.json results/head.json
+
+Prints every numeric result side by side with the relative change. Throughputs (*_per_s)
+are better when higher, latencies and durations when lower; changes beyond --threshold in
+the bad direction are marked as regressions and make the exit status 1.
+"""
+import argparse
+import json
+import sys
+
+
+def _flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    out = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[name] = float(value)
+    return out
+
+
+def _higher_is_better(name: str) -> bool:
+    return name.endswith("_per_s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change flagged as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    if base["meta"].get("generator") != head["meta"].get("generator"):
+        print("warning: runs used different generator configs; numbers are not comparable", file=sys.stderr)
+    if base["meta"].get("upload_mode") != head["meta"].get("upload_mode"):
+        print("warning: runs used different upload modes; upload numbers are not comparable", file=sys.stderr)
+
+    a, b = _flatten(base["results"]), _flatten(head["results"])
+    regressions = 0
+    print(f"{'metric':40} {'base':>14} {'head':>14} {'change':>9}")
+    for name in sorted(a.keys() & b.keys()):
+        old, new = a[name], b[name]
+        change = (new - old) / old if old else 0.0
+        worse = -change if _higher_is_better(name) else change
+        flag = ""
+        # counts and sizes (n, artifacts, bytes) carry no direction
+        if (name.endswith("_ms") or name.endswith("seconds") or _higher_is_better(name)) and worse > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:40} {old:14.3f} {new:14.3f} {change:+8.1%}{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# benchmarks/generator.py
+"""
+Deterministic synthetic UFDR generator.
+
+Writes a zip holding `report.xml` in the Cellebrite layout app.services.ufdr_parser reads
+(chats of instant messages, contacts with entries, calls with parties) plus optional
+attachment files. The same seed and config always produce byte-identical output.
+
+`dup_ratio` is the fraction of message bodies drawn from a small pool of repeated texts
+(forwards, system notices, boilerplate), which is what the embedding cache feeds on.
+"""
+import argparse
+import hashlib
+import json
+import random
+import zipfile
+from datetime import datetime, timezone
+from dataclasses import asdict, dataclass, field
+from xml.sax.saxutils import escape, quoteattr
+
+NS = "http://pa.cellebrite.com/report/2.0"
+SOURCES = ("WhatsApp", "Telegram", "Signal", "SMS", "Facebook Messenger")
+CALL_TYPES = ("Incoming", "Outgoing", "Missed")
+# fixed epoch so timestamps don't depend on when the file is generated
+EPOCH = 1_700_000_000
+
+
+@dataclass
+class GeneratorConfig:
+    seed: int = 42
+    messages: int = 10000
+    contacts: int = 500
+    calls: int = 2000
+    chats: int = 200
+    min_words: int = 4
+    max_words: int = 40
+    dup_ratio: float = 0.3
+    dup_pool: int = 200
+    vocabulary: int = 5000
+    attachments: int = 0
+    attachment_size: int = 64 * 1024
+
+
+@dataclass
+class GeneratedUFDR:
+    path: str
+    sha256: str
+    size: int
+    artifacts: int
+    config: dict
+    # words that occur in message bodies; the runner draws search terms from these
+    sample_terms: list[str] = field(default_factory=list)
+
+
+class _Text:
+    def __init__(self, rng: random.Random, config: GeneratorConfig):
+        self.rng = rng
+        self.config = config
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        self.words = sorted({
+            "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+            for _ in range(config.vocabulary)
+        })
+        self.pool = [self._fresh() for _ in range(max(1, config.dup_pool))]
+
+    def _fresh(self) -> str:
+        n = self.rng.randint(self.config.min_words, self.config.max_words)
+        # cubed uniform skews toward low indices: a few words are very common, like real chat
+        return " ".join(self.words[int(len(self.words) * self.rng.random() ** 3)] for _ in range(n))
+
+    def body(self) -> str:
+        if self.rng.random() < self.config.dup_ratio:
+            return self.rng.choice(self.pool)
+        return self._fresh()
+
+
+def _field(name: str, value) -> str:
+    return f'<field name={quoteattr(name)}><value type="String">{escape(str(value))}</value></field>'
+
+
+def _party(name: str, ident: str) -> str:
+    return f'<model type="Party">{_field("Identifier", ident)}{_field("Name", name)}</model>'
+
+
+def _entry(category: str, value: str) -> str:
+    return f'<model type="ContactEntry">{_field("Category", category)}{_field("Value", value)}</model>'
+
+
+def _timestamp(rng: random.Random) -> str:
+    seconds = EPOCH + rng.randint(0, 365 * 86400)
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def write_ufdr(path: str, config: GeneratorConfig) -> GeneratedUFDR:
+    rng = random.Random(config.seed)
+    text = _Text(rng, config)
+    people = [
+        (f"Person {i:05d}", f"+1555{rng.randint(0, 9_999_999):07d}")
+        for i in range(max(2, config.contacts))
+    ]
+    attachment_names = [f"files/attachment_{i:06d}.bin" for i in range(config.attachments)]
+    next_id = 0
+
+    def model_id() -> str:
+        nonlocal next_id
+        next_id += 1
+        return f"m{next_id:09d}"
+
+    # fixed timestamp on every entry keeps the zip byte-identical across runs
+    def entry(name: str, compress: int) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(name, date_time=(2024, 1, 1, 0, 0, 0))
+        info.compress_type = compress
+        return info
+
+    with zipfile.ZipFile(path, "w", allowZip64=True) as zf:
+        with zf.open(entry("report.xml", zipfile.ZIP_DEFLATED), "w", force_zip64=True) as raw:
+            def out(s: str) -> None:
+                raw.write(s.encode("utf-8"))
+
+            out(f'<?xml version="1.0" encoding="utf-8"?>\n<project xmlns="{NS}"><decodedData>')
+
+            out('<modelType type="Chat">')
+            chats = max(1, config.chats)
+            per_chat, extra = divmod(config.messages, chats)
+            attachment_iter = iter(attachment_names)
+            for c in range(chats):
+                source = rng.choice(SOURCES)
+                members = rng.sample(people, k=min(len(people), rng.randint(2, 6)))
+                out(f'<model type="Chat" id="{model_id()}">{_field("Source", source)}'
+                    f'<multiModelField name="Messages">')
+                for _ in range(per_chat + (1 if c < extra else 0)):
+                    sender = rng.choice(members)
+                    recipients = [m for m in members if m is not sender]
+                    out(f'<model type="InstantMessage" id="{model_id()}">'
+                        f'{_field("Body", text.body())}{_field("TimeStamp", _timestamp(rng))}'
+                        f'<modelField name="From">{_party(*sender)}</modelField>'
+                        f'<multiModelField name="To">{"".join(_party(*r) for r in recipients)}</multiModelField>')
+                    attachment = next(attachment_iter, None) if rng.random() < 0.1 else None
+                    if attachment:
+                        out(f'<multiModelField name="Attachments"><model type="Attachment">'
+                            f'{_field("Filename", attachment)}</model></multiModelField>')
+                    out('</model>')
+                out('</multiModelField></model>')
+            out('</modelType>')
+
+            out('<modelType type="Contact">')
+            for name, ident in people[:config.contacts]:
+                entries = [_entry("Mobile", ident)]
+                if rng.random() < 0.3:
+                    entries.append(_entry("Email", f"{name.replace(' ', '.').lower()}@example.org"))
+                out(f'<model type="Contact" id="{model_id()}">{_field("Name", name)}'
+                    f'<multiModelField name="Entries">{"".join(entries)}</multiModelField></model>')
+            out('</modelType>')
+
+            out('<modelType type="Call">')
+            for _ in range(config.calls):
+                a, b = rng.sample(people, k=2)
+                out(f'<model type="Call" id="{model_id()}">{_field("Source", rng.choice(SOURCES))}'
+                    f'{_field("Type", rng.choice(CALL_TYPES))}{_field("TimeStamp", _timestamp(rng))}'
+                    f'{_field("Duration", rng.randint(0, 3600))}'
+                    f'<multiModelField name="Parties">{_party(*a)}{_party(*b)}</multiModelField></model>')
+            out('</modelType>')
+
+            out('</decodedData></project>\n')
+
+        for name in attachment_names:
+            # incompressible payload, stored as-is like real media
+            zf.writestr(entry(name, zipfile.ZIP_STORED), rng.randbytes(config.attachment_size))
+
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(4 * 1024 * 1024), b""):
+            digest.update(chunk)
+            size += len(chunk)
+
+    return GeneratedUFDR(
+        path=path,
+        sha256=digest.hexdigest(),
+        size=size,
+        artifacts=config.messages + config.contacts + config.calls,
+        config=asdict(config),
+        sample_terms=text.words[:50] + rng.sample(text.words, k=min(50, len(text.words))),
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic UFDR file")
+    parser.add_argument("path")
+    for name, default in asdict(GeneratorConfig()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = vars(parser.parse_args(argv))
+    path = args.pop("path")
+    result = write_ufdr(path, GeneratorConfig(**args))
+    summary = asdict(result)
+    summary.pop("sample_terms")
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
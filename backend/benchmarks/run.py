@@ -0,0 +1,303 @@
+# benchmarks/run.py
+"""
+End-to-end benchmark runner.
+
+Generates a synthetic UFDR (benchmarks/generator.py), then drives the real FastAPI app
+in-process (httpx ASGI transport, app lifespan running, so ingest and embedding workers are
+live) against the database in DATABASE_URL. Use a local, disposable Postgres: the runner
+creates a `bench-admin` user and deletes the uploaded file's rows (and, via the storage
+garbage collector, its blob) afterwards.
+
+Measured:
+  preflight    POST /ufdr/preflight p50/p99, before the upload (miss) and after it (hit)
+  upload       throughput (MB/s) of the path chosen with --upload-mode: one multipart
+               POST /ufdr/upload, or a resumable session on /ufdr/uploads (init, PUT the
+               chunks --upload-concurrency at a time, complete)
+  ingest       extraction rows/s (queued -> embedding) and embedding rows/s (-> done)
+  search       keyword (/artifacts/list?q=) and vector (/chat/conv?mode=vector) p50/p99
+  dashboard    /dashboard/summary first-call and steady-state p50/p99
+
+Results are one JSON document (stdout or --out), tagged with the git commit, so runs can be
+diffed with `python -m benchmarks.compare`. Requires httpx.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, fields
+from datetime import datetime
+
+import httpx
+from sqlalchemy import delete, select
+
+import app.db.base  # noqa: F401
+from app.core.config import settings
+from app.core.security import create_access_token, hash_password
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.ufdrfile import UFDRFile
+from app.models.user import User, UserRole
+from app.services.storage import collect_garbage, is_blob_key
+
+from benchmarks.generator import GeneratorConfig, write_ufdr
+
+BENCH_USER = "bench-admin"
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+    return {
+        "n": len(ordered),
+        "p50_ms": round(pct(50) * 1000, 3),
+        "p99_ms": round(pct(99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def bench_token() -> str:
+    async with SessionLocal() as db:
+        user = (await db.execute(select(User).where(User.username == BENCH_USER))).scalars().first()
+        if user is None:
+            user = User(username=BENCH_USER, email=f"{BENCH_USER}@example.org",
+                        hashed_password=hash_password(os.urandom(16).hex()), role=UserRole.admin)
+            db.add(user)
+            await db.commit()
+        return create_access_token({"sub": str(user.id), "role": user.role.value})
+
+
+async def drop_ufdr(sha256: str) -> None:
+    """
+    Remove earlier uploads of the benchmark file (artifacts and jobs cascade). Blob-stored
+    files are left to `python -m app.services.storage gc`; legacy paths are deleted here.
+    """
+    async with SessionLocal() as db:
+        rows = (await db.execute(select(UFDRFile.id, UFDRFile.storage_path)
+                                 .where(UFDRFile.sha256 == sha256))).all()
+        for _, storage_path in rows:
+            if not is_blob_key(storage_path) and storage_path and os.path.isfile(storage_path):
+                os.remove(storage_path)
+        await db.execute(delete(UFDRFile).where(UFDRFile.sha256 == sha256))
+        await db.commit()
+
+
+async def timed_post(client: httpx.AsyncClient, url: str, **json_body) -> tuple[float, httpx.Response]:
+    started = time.perf_counter()
+    response = await client.post(url, json=json_body)
+    return time.perf_counter() - started, response
+
+
+def _read_chunk(path: str, offset: int, length: int) -> tuple[bytes, str]:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    return data, hashlib.sha256(data).hexdigest()
+
+
+async def upload_chunked(client: httpx.AsyncClient, path: str, sha256: str, size: int,
+                         chunk_size: int | None, concurrency: int) -> httpx.Response:
+    """Upload through a resumable session the way a client would; returns the complete response."""
+    response = await client.post("/ufdr/uploads", json={
+        "filename": os.path.basename(path), "total_size": size, "chunk_size": chunk_size, "sha256": sha256,
+    })
+    response.raise_for_status()
+    session = response.json()
+    upload_id, chunk_size = session["upload_id"], session["chunk_size"]
+    pending = iter(range(session["num_chunks"]))
+
+    async def put_chunks() -> None:
+        for index in pending:
+            data, digest = await asyncio.to_thread(_read_chunk, path, index * chunk_size, chunk_size)
+            (await client.put(f"/ufdr/uploads/{upload_id}/chunks/{index}", content=data,
+                              headers={"X-Chunk-SHA256": digest})).raise_for_status()
+
+    await asyncio.gather(*(put_chunks() for _ in range(concurrency)))
+    return await client.post(f"/ufdr/uploads/{upload_id}/complete")
+
+
+async def timed_get(client: httpx.AsyncClient, url: str, **params) -> tuple[float, httpx.Response]:
+    started = time.perf_counter()
+    response = await client.get(url, params=params)
+    return time.perf_counter() - started, response
+
+
+async def run(args) -> dict:
+    config = GeneratorConfig(**{f.name: getattr(args, f.name) for f in fields(GeneratorConfig)})
+    workdir = args.workdir or tempfile.mkdtemp(prefix="cognis-bench-")
+    path = os.path.join(workdir, f"bench_{config.seed}.ufdr")
+
+    started = time.perf_counter()
+    generated = write_ufdr(path, config)
+    results: dict = {"generate": {"seconds": round(time.perf_counter() - started, 3),
+                                  "bytes": generated.size, "artifacts": generated.artifacts}}
+    rng = random.Random(config.seed)
+    terms = generated.sample_terms
+
+    await drop_ufdr(generated.sha256)
+    token = await bench_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     headers=headers, timeout=None) as client:
+            # ---- preflight (miss) ----
+            preflight = {"sha256": generated.sha256, "size": generated.size}
+            miss = []
+            for _ in range(args.queries):
+                elapsed, response = await timed_post(client, "/ufdr/preflight", **preflight)
+                response.raise_for_status()
+                miss.append(elapsed)
+
+            # ---- upload ----
+            started = time.perf_counter()
+            if args.upload_mode == "chunked":
+                response = await upload_chunked(client, path, generated.sha256, generated.size,
+                                                args.chunk_size, args.upload_concurrency)
+            else:
+                with open(path, "rb") as f:
+                    response = await client.post("/ufdr/upload", files={"file": (os.path.basename(path), f)})
+            upload_seconds = time.perf_counter() - started
+            response.raise_for_status()
+            body = response.json()
+            ufdr_id, job_id = body["id"], body["job_id"]
+            results["upload"] = {
+                "seconds": round(upload_seconds, 3),
+                "mb_per_s": round(generated.size / upload_seconds / 1e6, 3),
+            }
+
+            # ---- preflight (hit) ----
+            hit = []
+            for _ in range(args.queries):
+                elapsed, response = await timed_post(client, "/ufdr/preflight", **preflight)
+                response.raise_for_status()
+                hit.append(elapsed)
+            results["preflight"] = {"miss": percentiles(miss), "hit": percentiles(hit)}
+
+            # ---- ingest + embed ----
+            queued = time.perf_counter()
+            extracted_at = finished_at = None
+            job = {}
+            while finished_at is None:
+                await asyncio.sleep(args.poll_interval)
+                job = (await client.get(f"/ufdr/jobs/{job_id}")).json()
+                now = time.perf_counter()
+                if job["status"] in ("embedding", "done") and extracted_at is None:
+                    extracted_at = now
+                if job["status"] in ("done", "failed"):
+                    finished_at = now
+                if now - queued > args.timeout:
+                    raise TimeoutError(f"ingest job {job_id} still {job['status']} after {args.timeout}s")
+            if job["status"] == "failed":
+                raise RuntimeError(f"ingest job failed: {job.get('error')}")
+            extract_seconds = extracted_at - queued
+            embed_seconds = finished_at - extracted_at
+            results["ingest"] = {
+                "artifacts": job["artifacts_processed"],
+                "extract_seconds": round(extract_seconds, 3),
+                "rows_per_s": round(job["artifacts_processed"] / extract_seconds, 1),
+                # resolution is the poll interval; meaningful for runs of many seconds
+                "poll_interval": args.poll_interval,
+            }
+            results["embedding"] = {
+                "artifacts": job.get("artifacts_embedded", 0),
+                "seconds": round(embed_seconds, 3),
+                "rows_per_s": round(job.get("artifacts_embedded", 0) / embed_seconds, 1) if embed_seconds else None,
+            }
+
+            # ---- search ----
+            keyword = []
+            for _ in range(args.queries):
+                elapsed, response = await timed_get(client, f"/artifacts/list/{ufdr_id}",
+                                                    q=rng.choice(terms), limit=50)
+                response.raise_for_status()
+                keyword.append(elapsed)
+            results["keyword_search"] = percentiles(keyword)
+
+            vector = []
+            for _ in range(args.queries):
+                q = " ".join(rng.sample(terms, k=3))
+                elapsed, response = await timed_get(client, f"/chat/conv/{ufdr_id}", q=q, mode="vector", limit=10)
+                if response.status_code == 503:
+                    break  # no embedding model in this environment
+                response.raise_for_status()
+                vector.append(elapsed)
+            results["vector_search"] = percentiles(vector)
+
+            # ---- dashboard ----
+            first, response = await timed_get(client, "/dashboard/summary")
+            response.raise_for_status()
+            steady = [(await timed_get(client, "/dashboard/summary"))[0] for _ in range(args.queries)]
+            results["dashboard"] = {"first_ms": round(first * 1000, 3), **percentiles(steady)}
+
+    if not args.keep:
+        await drop_ufdr(generated.sha256)
+        # the blob was unreferenced just now, so skip the grace period
+        await collect_garbage(grace_seconds=0)
+        os.remove(path)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ingest_workers": settings.INGEST_WORKERS,
+            "embedding_workers": settings.EMBEDDING_WORKERS,
+            "upload_mode": args.upload_mode,
+            "generator": asdict(config),
+        },
+        "results": results,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run the Cognis end-to-end benchmark")
+    for name, default in asdict(GeneratorConfig()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    parser.add_argument("--queries", type=int, default=200, help="requests per latency measurement")
+    parser.add_argument("--upload-mode", choices=("multipart", "chunked"), default="multipart")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="chunked mode: bytes per chunk (server default if unset)")
+    parser.add_argument("--upload-concurrency", type=int, default=4, help="chunked mode: chunks in flight")
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=3600)
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--keep", action="store_true", help="keep the uploaded file and its rows")
+    parser.add_argument("--out", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
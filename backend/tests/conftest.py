@@ -0,0 +1,42 @@
+# tests/conftest.py
+"""
+Shared fixtures. Settings need JWT_SECRET; everything else has defaults.
+
+Tests marked `postgres` run against TEST_DATABASE_URL (a disposable database migrated with
+`alembic upgrade head`) and are skipped when it isn't set.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("LOCAL_STORAGE_PATH", tempfile.mkdtemp(prefix="cognis-test-"))
+os.environ.setdefault("INGEST_WORKERS", "0")
+os.environ.setdefault("EMBEDDING_WORKERS", "0")
+if os.environ.get("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+
+import uuid
+
+import pytest
+
+from app.core.principals import Principal
+from app.models.user import UserRole
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "postgres: needs TEST_DATABASE_URL")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get("TEST_DATABASE_URL"):
+        return
+    skip = pytest.mark.skip(reason="TEST_DATABASE_URL not set")
+    for item in items:
+        if "postgres" in item.keywords:
+            item.add_marker(skip)
+
+
+def make_principal(role: UserRole = UserRole.investigator) -> Principal:
+    user_id = uuid.uuid4()
+    return Principal(id=user_id, username=f"user-{user_id.hex[:8]}",
+                     email=f"{user_id.hex[:8]}@example.org", role=role)
@@ -0,0 +1,42 @@
+# tests/test_audit_writer.py
+import asyncio
+
+from app.services.audit_writer import AuditWriter
+
+
+class RecordingWriter(AuditWriter):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.rows: list[dict] = []
+
+    async def _write(self, batch: list[dict]) -> None:
+        self.rows.extend(batch)
+
+
+def test_stop_flushes_batch_being_accumulated():
+    async def scenario():
+        # long interval: the task is still waiting for more events when stop() comes
+        writer = RecordingWriter(maxsize=100, batch_size=50, flush_interval=60)
+        await writer.start()
+        for i in range(3):
+            writer.submit("GET", f"/items/{i}", 200)
+        await asyncio.sleep(0.05)  # let the task dequeue them into its batch
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [r["path"] for r in writer.rows] == ["/items/0", "/items/1", "/items/2"]
+    assert writer.stats["written"] == 3
+    assert writer.depth == 0
+
+
+def test_stop_flushes_queue_when_never_started():
+    async def scenario():
+        writer = RecordingWriter(maxsize=100, batch_size=2, flush_interval=60)
+        for i in range(5):
+            writer.submit("POST", "/x", 201)
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert len(writer.rows) == 5
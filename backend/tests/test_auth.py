@@ -0,0 +1,28 @@
+# tests/test_auth.py
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import auth
+from app.core.security import get_current_user
+from app.models.user import UserRole
+
+from tests.conftest import make_principal
+
+
+def _client(role: UserRole) -> TestClient:
+    app = FastAPI()
+    app.include_router(auth.router)
+    principal = make_principal(role)
+    app.dependency_overrides[get_current_user] = lambda: principal
+    return TestClient(app)
+
+
+def test_hash_pool_allows_admin():
+    response = _client(UserRole.admin).get("/auth/hash-pool")
+    assert response.status_code == 200
+    assert "waiting" in response.json()
+
+
+def test_hash_pool_rejects_investigator():
+    response = _client(UserRole.investigator).get("/auth/hash-pool")
+    assert response.status_code == 403
@@ -0,0 +1,167 @@
+# tests/test_blob_refcounts.py
+"""Refcount triggers on attachments/ufdr_files and the GC's lock ordering against writers."""
+import asyncio
+import hashlib
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import app.db.base  # noqa: F401
+from app.db.session import build_engine
+from app.models.artifact import Artifact
+from app.models.attachment import Attachment
+from app.models.ufdrfile import UFDRFile
+from app.services import storage as storage_module
+from app.services.storage import blob_key
+
+pytestmark = pytest.mark.postgres
+
+
+def _sha() -> str:
+    return hashlib.sha256(uuid.uuid4().bytes).hexdigest()
+
+
+def _run(scenario):
+    async def wrapper():
+        # a private engine per test: pooled asyncpg connections can't outlive asyncio.run
+        engine = build_engine(poolclass=NullPool)
+        Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            return await scenario(Session)
+        finally:
+            await engine.dispose()
+    return asyncio.run(wrapper())
+
+
+async def _refcounts(db, *shas) -> dict:
+    rows = await db.execute(
+        text("SELECT sha256, refcount FROM blobs WHERE sha256 = ANY(:shas)"), {"shas": list(shas)}
+    )
+    return dict(rows.all())
+
+
+async def _ufdr(db, sha: str | None = None, legacy: bool = False) -> UFDRFile:
+    sha = sha or _sha()
+    ufdr = UFDRFile(filename="test.ufdr", sha256=sha, meta={"hash": sha, "size": 10},
+                    storage_path=f"uploads/{sha[:8]}_test.ufdr" if legacy else blob_key(sha))
+    db.add(ufdr)
+    await db.flush()
+    return ufdr
+
+
+async def _artifact(db, ufdr: UFDRFile) -> uuid.UUID:
+    artifact = Artifact(ufdr_file_id=ufdr.id, type="message", extracted_text="hello")
+    db.add(artifact)
+    await db.flush()
+    return artifact.id
+
+
+def _attachment(artifact_id, ufdr_id, sha: str) -> dict:
+    return {"id": uuid.uuid4(), "artifact_id": artifact_id, "ufdr_file_id": ufdr_id,
+            "filename": "files/a.jpg", "sha256": sha, "size": 3}
+
+
+def test_refcounts_follow_inserts_and_deletes():
+    async def scenario(Session):
+        a, b = _sha(), _sha()
+        async with Session() as db:
+            ufdr = await _ufdr(db)
+            artifact_id = await _artifact(db, ufdr)
+            # one statement, two references to `a`
+            await db.execute(insert(Attachment.__table__), [
+                _attachment(artifact_id, ufdr.id, a),
+                _attachment(artifact_id, ufdr.id, a),
+                _attachment(artifact_id, ufdr.id, b),
+            ])
+            await db.commit()
+            assert await _refcounts(db, ufdr.sha256, a, b) == {ufdr.sha256: 1, a: 2, b: 1}
+
+            one = (await db.execute(text("SELECT id FROM attachments WHERE sha256 = :s LIMIT 1"),
+                                    {"s": a})).scalar()
+            await db.execute(delete(Attachment).where(Attachment.id == one))
+            await db.commit()
+            assert (await _refcounts(db, a))[a] == 1
+
+            # cascades through artifacts to attachments
+            await db.execute(delete(UFDRFile).where(UFDRFile.id == ufdr.id))
+            await db.commit()
+            assert await _refcounts(db, ufdr.sha256, a, b) == {ufdr.sha256: 0, a: 0, b: 0}
+
+            await db.execute(text("DELETE FROM blobs WHERE sha256 = ANY(:s)"), {"s": [ufdr.sha256, a, b]})
+            await db.commit()
+
+    _run(scenario)
+
+
+def test_rollback_leaves_no_reference():
+    async def scenario(Session):
+        async with Session() as db:
+            ufdr = await _ufdr(db)
+            sha = ufdr.sha256
+            await db.rollback()
+            assert await _refcounts(db, sha) == {}
+
+    _run(scenario)
+
+
+def test_legacy_paths_are_not_counted():
+    async def scenario(Session):
+        async with Session() as db:
+            ufdr = await _ufdr(db, legacy=True)
+            await db.commit()
+            assert await _refcounts(db, ufdr.sha256) == {}
+            await db.execute(delete(UFDRFile).where(UFDRFile.id == ufdr.id))
+            await db.commit()
+
+    _run(scenario)
+
+
+def test_gc_waits_for_writer_referencing_the_blob(monkeypatch, tmp_path):
+    local = storage_module.LocalFSStorage(str(tmp_path), fsync=False)
+    monkeypatch.setattr(storage_module, "storage", local)
+
+    async def scenario(Session):
+        monkeypatch.setattr("app.db.session.SessionLocal", Session)
+        sha = hashlib.sha256(b"abc").hexdigest()
+        staged = local.staging_path()
+        with open(staged, "wb") as f:
+            f.write(b"abc")
+        async with Session() as db:
+            # an unreferenced blob, past its grace period
+            await db.execute(text(
+                "INSERT INTO blobs (sha256, size, refcount, created_at, updated_at) "
+                "VALUES (:s, 3, 0, :t, :t) ON CONFLICT (sha256) DO UPDATE SET refcount = 0, updated_at = :t"
+            ), {"s": sha, "t": datetime.utcnow() - timedelta(days=1)})
+            await db.commit()
+        await local.put_file(staged, sha)
+
+        async with Session() as writer:
+            ufdr = await _ufdr(writer)
+            artifact_id = await _artifact(writer, ufdr)
+            # the trigger now holds the blob row lock until the writer commits
+            await writer.execute(insert(Attachment.__table__), [_attachment(artifact_id, ufdr.id, sha)])
+
+            gc = asyncio.create_task(storage_module.collect_garbage(grace_seconds=60))
+            await asyncio.sleep(0.5)
+            assert not gc.done(), "GC must block on the writer's row lock"
+            await writer.commit()
+            await gc
+
+            assert (await _refcounts(writer, sha))[sha] == 1
+            assert os.path.exists(local.local_path(sha))
+
+            # once unreferenced and past the grace period, it is collected
+            await writer.execute(delete(UFDRFile).where(UFDRFile.id == ufdr.id))
+            await writer.execute(text("UPDATE blobs SET updated_at = :t WHERE sha256 IN (:s, :u)"),
+                                 {"t": datetime.utcnow() - timedelta(days=1), "s": sha, "u": ufdr.sha256})
+            await writer.commit()
+        assert await storage_module.collect_garbage(grace_seconds=60) >= 1
+        assert not os.path.exists(local.local_path(sha))
+
+    _run(scenario)
@@ -0,0 +1,78 @@
+# tests/test_bulk.py
+import asyncio
+import hashlib
+import uuid
+
+import pytest
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import app.db.base  # noqa: F401
+from app.core.config import settings
+from app.db.session import build_engine
+from app.models.artifact import Artifact
+from app.models.ufdrfile import UFDRFile
+from app.services.bulk import ArtifactBulkWriter
+
+pytestmark = pytest.mark.postgres
+
+
+def _engine(driver: str):
+    if driver == "asyncpg":
+        return build_engine(poolclass=NullPool)
+    pytest.importorskip("psycopg")
+    url = make_url(settings.DATABASE_URL).set(drivername="postgresql+psycopg")
+    return create_async_engine(url, poolclass=NullPool)
+
+
+@pytest.mark.parametrize("driver, copies", [("asyncpg", True), ("psycopg", False)])
+def test_flush_writes_rows_and_returns_their_ids(driver, copies):
+    engine = _engine(driver)
+    statements: list[str] = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    async def scenario():
+        Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with Session() as db:
+                sha = hashlib.sha256(uuid.uuid4().bytes).hexdigest()
+                ufdr = UFDRFile(filename="t.ufdr", sha256=sha, storage_path=f"uploads/{sha[:8]}_t.ufdr",
+                                meta={"hash": sha, "size": 1})
+                db.add(ufdr)
+                await db.commit()
+                ufdr_id = ufdr.id
+
+                writer = ArtifactBulkWriter(db, batch_size=2, ufdr_file_id=ufdr_id)
+                ids = [writer.add({"type": "message", "extracted_text": f"hello {i}", "raw": {"n": i}})
+                       for i in range(3)]
+                assert writer.full
+                flushed = await writer.flush() + await writer.flush()
+                await db.commit()
+
+                rows = (await db.execute(
+                    select(Artifact.id, Artifact.raw).where(Artifact.ufdr_file_id == ufdr_id)
+                )).all()
+
+                # a flush belongs to the session's transaction, COPY included
+                writer.add({"type": "log", "extracted_text": "rolled back"})
+                await writer.flush()
+                await db.rollback()
+                left = await db.scalar(select(func.count()).where(Artifact.ufdr_file_id == ufdr_id))
+
+                await db.execute(delete(UFDRFile).where(UFDRFile.id == ufdr_id))
+                await db.commit()
+                return ids, flushed, writer.written, rows, left
+        finally:
+            await engine.dispose()
+
+    ids, flushed, written, rows, left = asyncio.run(scenario())
+    assert flushed == ids
+    assert written == 4
+    assert {row.id: row.raw for row in rows} == {id_: {"n": i} for i, id_ in enumerate(ids)}
+    assert left == 3
+    inserted = any(s.lstrip().upper().startswith("INSERT INTO ARTIFACTS") for s in statements)
+    assert inserted is not copies
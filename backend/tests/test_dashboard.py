@@ -0,0 +1,67 @@
+# tests/test_dashboard.py
+import asyncio
+
+import pytest
+
+from app.core.cache import LRUCache
+from app.services import dashboard
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Replace the summary build with one that counts calls and blocks until released."""
+    monkeypatch.setattr(dashboard, "_cache", LRUCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(dashboard, "_locks", {})
+    calls: list[tuple] = []
+    state = {"release": None, "fail": 0}
+
+    async def build(approximate, case_id, breakdown):
+        calls.append((approximate, case_id, breakdown))
+        await state["release"].wait()
+        if state["fail"]:
+            state["fail"] -= 1
+            raise ConnectionError("database went away")
+        return {"total_artifacts": len(calls), "approximate": approximate}
+
+    monkeypatch.setattr(dashboard, "_build_summary", build)
+    return calls, state
+
+
+def test_concurrent_misses_share_one_build(builds):
+    calls, state = builds
+
+    async def scenario():
+        state["release"] = asyncio.Event()
+        tasks = [asyncio.create_task(dashboard.get_summary()) for _ in range(20)]
+        other = asyncio.create_task(dashboard.get_summary(approximate=True))
+        await asyncio.sleep(0.01)
+        state["release"].set()
+        results = await asyncio.gather(*tasks)
+        cached = await dashboard.get_summary()
+        return results, await other, cached
+
+    results, other, cached = asyncio.run(scenario())
+    # one build per key, shared by every waiter and then served from the cache
+    assert sorted(calls) == [(False, None, False), (True, None, False)]
+    assert all(r is results[0] for r in results) and cached is results[0]
+    assert other["approximate"] is True
+    assert dashboard._locks == {}
+
+
+def test_failed_build_is_not_cached(builds):
+    calls, state = builds
+
+    async def scenario():
+        state["release"] = asyncio.Event()
+        state["fail"] = 1
+        first = asyncio.create_task(dashboard.get_summary())
+        waiter = asyncio.create_task(dashboard.get_summary())
+        await asyncio.sleep(0.01)
+        state["release"].set()
+        return await asyncio.gather(first, waiter, return_exceptions=True)
+
+    failed, retried = asyncio.run(scenario())
+    assert isinstance(failed, ConnectionError)
+    # the waiter found no summary under the lock and built its own
+    assert retried == {"total_artifacts": 2, "approximate": False}
+    assert len(calls) == 2
@@ -0,0 +1,33 @@
+# tests/test_downloads.py
+import pytest
+from fastapi import HTTPException
+
+from app.api.downloads import _etag_matches, check_file_access
+from app.models.user import UserRole
+
+from tests.conftest import make_principal
+
+
+def test_admin_can_read_any_file():
+    check_file_access(make_principal(UserRole.admin), {"hash": "x"})
+
+
+def test_uploader_can_read_own_file():
+    user = make_principal()
+    check_file_access(user, {"uploaded_by": str(user.id)})
+
+
+@pytest.mark.parametrize("meta", [None, {}, {"hash": "x", "size": 1}, {"uploaded_by": "someone-else"}])
+def test_other_users_are_denied(meta):
+    with pytest.raises(HTTPException) as exc:
+        check_file_access(make_principal(), meta)
+    assert exc.value.status_code == 403
+
+
+def test_etag_matching():
+    etag = '"abc"'
+    assert _etag_matches('"abc"', etag)
+    assert _etag_matches('W/"abc", "def"', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"def"', etag)
+    assert not _etag_matches(None, etag)
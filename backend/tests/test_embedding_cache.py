@@ -0,0 +1,54 @@
+# tests/test_embedding_cache.py
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Insert
+
+from app.services.embedding_cache import MAX_EMBED_CHARS, EmbeddingCache
+
+
+class FakeSession:
+    def __init__(self):
+        self.inserted: list[str] = []
+
+    async def execute(self, stmt):
+        if isinstance(stmt, Insert):
+            params = stmt.compile(dialect=postgresql.dialect()).params
+            hashes = {k: v for k, v in params.items() if k.startswith("text_hash")}
+            # multi-row binds are text_hash_m0, text_hash_m1, ...
+            self.inserted += [hashes[k] for k in sorted(hashes, key=lambda k: int(k.rsplit("_m", 1)[-1]))]
+
+        class Result:
+            def all(self):
+                return []
+        return Result()
+
+    async def commit(self):
+        pass
+
+
+class RecordingPool:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    async def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+def test_model_sees_the_text_that_was_hashed():
+    head = "x" * MAX_EMBED_CHARS
+    texts = [head + " tail one", head + " tail two", "Hello \n  world", "Hello world", "ｈｉ", "b", "a"]
+    cache = EmbeddingCache("test-model", maxsize=100)
+    db, pool = FakeSession(), RecordingPool()
+
+    vectors = asyncio.run(cache.embed(db, pool, texts))
+
+    # texts equal after normalization and truncation are one key and one encode
+    (sent,) = pool.calls
+    assert sent == [head, "Hello world", "hi", "b", "a"]
+    assert [v[0] for v in vectors] == [MAX_EMBED_CHARS, MAX_EMBED_CHARS, 11, 11, 2, 1, 1]
+    assert db.inserted == sorted(db.inserted) and len(db.inserted) == 5
+    # second pass is served by the LRU
+    asyncio.run(cache.embed(db, pool, texts))
+    assert len(pool.calls) == 1
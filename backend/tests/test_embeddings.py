@@ -0,0 +1,85 @@
+# tests/test_embeddings.py
+import asyncio
+import hashlib
+import uuid
+
+import pytest
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import app.db.base  # noqa: F401
+from app.db.session import build_engine
+from app.models.artifact import Artifact
+from app.models.embeddingclaim import EmbeddingClaim
+from app.models.ufdrfile import UFDRFile
+from app.services import embeddings
+
+pytestmark = pytest.mark.postgres
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_embed_pending_encodes_claimed_rows_outside_a_transaction(monkeypatch, fails):
+    async def scenario():
+        engine = build_engine(poolclass=NullPool)
+        Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        monkeypatch.setattr(embeddings, "SessionLocal", Session)
+        seen = {}
+
+        class Pool:
+            async def embed(self, texts):
+                async with Session() as db:
+                    seen["idle_in_transaction"] = await db.scalar(
+                        select(func.count()).select_from(text("pg_stat_activity"))
+                        .where(text("datname = current_database() AND state = 'idle in transaction'"))
+                    )
+                    seen["claims"] = await db.scalar(
+                        select(func.count()).where(EmbeddingClaim.artifact_id.in_(ids))
+                    )
+                # a second embedder running meanwhile finds nothing left to take
+                seen["concurrent"] = await embeddings._claim_round(ufdr_id, None)
+                if fails:
+                    raise RuntimeError("model crashed")
+                return [[float(len(t))] + [0.0] * 383 for t in texts]
+
+        try:
+            async with Session() as db:
+                sha = hashlib.sha256(uuid.uuid4().bytes).hexdigest()
+                ufdr = UFDRFile(filename="t.ufdr", sha256=sha, storage_path=f"uploads/{sha[:8]}_t.ufdr",
+                                meta={"hash": sha, "size": 1})
+                db.add(ufdr)
+                await db.flush()
+                ufdr_id = ufdr.id
+                artifacts = [Artifact(ufdr_file_id=ufdr_id, type="message", extracted_text=f"{uuid.uuid4()} {i}")
+                             for i in range(3)]
+                db.add_all(artifacts + [Artifact(ufdr_file_id=ufdr_id, type="log", extracted_text="")])
+                await db.commit()
+                ids = [a.id for a in artifacts]
+
+            if fails:
+                with pytest.raises(RuntimeError):
+                    await embeddings.embed_pending(Pool(), ufdr_file_id=ufdr_id)
+                written = None
+            else:
+                written = await embeddings.embed_pending(Pool(), ufdr_file_id=ufdr_id)
+
+            async with Session() as db:
+                filled = await db.scalar(
+                    select(func.count()).where(Artifact.id.in_(ids), Artifact.embedding.is_not(None))
+                )
+                claims = await db.scalar(select(func.count()).where(EmbeddingClaim.artifact_id.in_(ids)))
+                await db.execute(delete(UFDRFile).where(UFDRFile.id == ufdr_id))
+                await db.commit()
+            return written, filled, claims, seen
+        finally:
+            await engine.dispose()
+
+    written, filled, claims, seen = asyncio.run(scenario())
+    assert seen == {"idle_in_transaction": 0, "claims": 3, "concurrent": []}
+    # claims are released either way: written back, or free for the next round
+    assert claims == 0
+    if fails:
+        assert filled == 0
+    else:
+        assert written == filled == 3
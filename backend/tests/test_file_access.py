@@ -0,0 +1,63 @@
+# tests/test_file_access.py
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import artifacts, conversation
+from app.core.security import get_current_user
+from app.db.deps import get_db
+from app.models.user import UserRole
+
+from tests.conftest import make_principal
+
+UPLOADER = make_principal()
+
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+    def all(self):
+        return []
+
+
+class FakeSession:
+    """First query finds the file; anything after it (the search itself) finds nothing."""
+
+    def __init__(self, meta):
+        self.file = SimpleNamespace(id=uuid.uuid4(), meta=meta)
+        self.queries = 0
+
+    async def execute(self, *args, **kwargs):
+        self.queries += 1
+        return FakeResult(self.file if self.queries == 1 else None)
+
+
+def _client(user, meta) -> TestClient:
+    app = FastAPI()
+    app.include_router(artifacts.router)
+    app.include_router(conversation.router)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: FakeSession(meta)
+    return TestClient(app)
+
+
+URLS = [f"/artifacts/list/{uuid.uuid4()}?q=hello", f"/chat/conv/{uuid.uuid4()}?q=hello&mode=keyword"]
+
+
+@pytest.mark.parametrize("url", URLS)
+@pytest.mark.parametrize("user, meta, code", [
+    (UPLOADER, {"uploaded_by": str(UPLOADER.id)}, 200),
+    (make_principal(UserRole.admin), {"uploaded_by": str(UPLOADER.id)}, 200),
+    (make_principal(), {"uploaded_by": str(UPLOADER.id)}, 403),
+    # no recorded uploader: admin-only rather than open to everyone
+    (make_principal(), {"hash": "x"}, 403),
+])
+def test_search_endpoints_check_file_access(url, user, meta, code):
+    assert _client(user, meta).get(url).status_code == code
@@ -0,0 +1,151 @@
+# tests/test_ingest_worker.py
+import asyncio
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import app.db.base  # noqa: F401
+from app.db.session import build_engine
+from app.models.ingestjob import IngestJob
+from app.models.ufdrfile import UFDRFile
+from app.services import ingest_worker
+from app.services.ingest_queue import InProcessQueue, JobQueue
+
+
+class ListQueue(JobQueue):
+    def __init__(self):
+        self.items: list[str] = []
+
+    async def put(self, job_id: str) -> None:
+        self.items.append(job_id)
+
+    async def get(self) -> str:
+        raise NotImplementedError
+
+
+@pytest.mark.postgres
+def test_sweep_requeues_stranded_and_orphaned_jobs_once_per_lease(monkeypatch):
+    async def scenario():
+        engine = build_engine(poolclass=NullPool)
+        Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        monkeypatch.setattr(ingest_worker, "SessionLocal", Session)
+        now = datetime.utcnow()
+        old = now - timedelta(hours=1)
+        try:
+            async with Session() as db:
+                sha = hashlib.sha256(uuid.uuid4().bytes).hexdigest()
+                ufdr = UFDRFile(filename="t.ufdr", sha256=sha, storage_path=f"uploads/{sha[:8]}_t.ufdr",
+                                meta={"hash": sha, "size": 1})
+                db.add(ufdr)
+                await db.flush()
+                jobs = {
+                    "fresh": IngestJob(ufdr_file_id=ufdr.id, status="queued", created_at=now),
+                    "stranded": IngestJob(ufdr_file_id=ufdr.id, status="queued", created_at=old),
+                    "orphaned": IngestJob(ufdr_file_id=ufdr.id, status="embedding", created_at=old,
+                                          heartbeat_at=old),
+                    "live": IngestJob(ufdr_file_id=ufdr.id, status="running", created_at=old,
+                                      heartbeat_at=now),
+                    "done": IngestJob(ufdr_file_id=ufdr.id, status="done", created_at=old),
+                }
+                db.add_all(jobs.values())
+                await db.commit()
+                ids = {name: str(job.id) for name, job in jobs.items()}
+
+            queue = ListQueue()
+            await ingest_worker.requeue_stranded(queue)
+            first = set(queue.items)
+            queue.items.clear()
+            await ingest_worker.requeue_stranded(queue)
+            second = set(queue.items)
+            queue.items.clear()
+            await ingest_worker.requeue_stranded(queue, all_queued=True)
+            restart = set(queue.items)
+
+            async with Session() as db:
+                await db.execute(delete(UFDRFile).where(UFDRFile.id == ufdr.id))
+                await db.commit()
+            return ids, first, second, restart
+        finally:
+            await engine.dispose()
+
+    ids, first, second, restart = asyncio.run(scenario())
+    assert first == {ids["stranded"], ids["orphaned"]}
+    # the stranded job was just re-enqueued; only the orphan comes back before another lease
+    assert second == {ids["orphaned"]}
+    assert restart == {ids["fresh"], ids["stranded"], ids["orphaned"]}
+
+
+def test_submit_survives_a_failed_enqueue(monkeypatch):
+    class BrokenQueue(ListQueue):
+        async def put(self, job_id: str) -> None:
+            raise ConnectionError("redis is down")
+
+    class FakeSession:
+        def add(self, job):
+            job.id = uuid.uuid4()
+
+        async def commit(self):
+            pass
+
+        async def refresh(self, job):
+            pass
+
+    monkeypatch.setattr(ingest_worker, "ingest_queue", BrokenQueue())
+    job = asyncio.run(ingest_worker.submit_ingest_job(FakeSession(), uuid.uuid4()))
+    # committed and left for the sweep
+    assert job.status == "queued"
+
+
+def test_embedding_does_not_hold_up_extraction(monkeypatch):
+    embedding_started = asyncio.Event()
+    release_embedding = asyncio.Event()
+    extracted: list[str] = []
+
+    async def claim(job_id):
+        return True
+
+    async def heartbeat(job_id):
+        await asyncio.Event().wait()
+
+    async def embed(pool, job_id):
+        embedding_started.set()
+        await release_embedding.wait()
+
+    def run(job_id):
+        extracted.append(job_id)
+        return 1
+
+    monkeypatch.setattr(ingest_worker, "_claim", claim)
+    monkeypatch.setattr(ingest_worker, "_heartbeat", heartbeat)
+    monkeypatch.setattr(ingest_worker, "_embed_job", embed)
+    monkeypatch.setattr(ingest_worker, "run_ingest_job", run)
+
+    async def scenario():
+        pool = ingest_worker.IngestWorkerPool(InProcessQueue(), workers=1, embedder=None)
+        pool._executor = ThreadPoolExecutor(max_workers=1)
+        tasks = [asyncio.create_task(pool._consume()), asyncio.create_task(pool._consume_embeddings())]
+        try:
+            await pool.queue.put("a")
+            await asyncio.wait_for(embedding_started.wait(), 5)
+            # "a" is still embedding; the single extraction consumer moves on to "b"
+            await pool.queue.put("b")
+            for _ in range(100):
+                if extracted == ["a", "b"]:
+                    break
+                await asyncio.sleep(0.01)
+            return list(extracted)
+        finally:
+            release_embedding.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            pool._executor.shutdown()
+
+    assert asyncio.run(scenario()) == ["a", "b"]
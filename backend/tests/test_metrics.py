@@ -0,0 +1,38 @@
+# tests/test_metrics.py
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import metrics as metrics_route
+from app.core import metrics
+from app.core.config import settings
+
+
+def test_callback_counter_renders_as_counter():
+    total = {"n": 0}
+    counter = metrics.Counter("test_callback_events_total", "Test events", callback=lambda: total["n"])
+    total["n"] = 7
+    rendered = counter.render()
+    assert "# TYPE test_callback_events_total counter" in rendered
+    assert "test_callback_events_total 7\n" in rendered
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.include_router(metrics_route.router)
+    return TestClient(app)
+
+
+def test_metrics_disabled_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    assert _client().get("/metrics").status_code == 404
+
+
+def test_metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    client = _client()
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
@@ -0,0 +1,138 @@
+# tests/test_principals.py
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import app.db.base  # noqa: F401
+from app.core import principals
+from app.core.principals import REDIS_KEY_PREFIX, Principal, PrincipalCache
+from app.db.session import build_engine
+from app.models.user import User, UserRole
+
+from tests.conftest import make_principal
+
+
+class FakeRedis:
+    def __init__(self, fail: bool = False):
+        self.data: dict[str, str] = {}
+        self.fail = fail
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis is down")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        if self.fail:
+            raise ConnectionError("redis is down")
+        self.data[key] = value
+
+    async def delete(self, key):
+        if self.fail:
+            raise ConnectionError("redis is down")
+        self.data.pop(key, None)
+
+
+def _cache(redis=None) -> PrincipalCache:
+    cache = PrincipalCache(maxsize=10, ttl=60, local_ttl=60)
+    cache._redis = redis
+    return cache
+
+
+def test_invalidate_clears_both_tiers():
+    async def scenario():
+        redis = FakeRedis()
+        cache, other_worker = _cache(redis), _cache(redis)
+        principal = make_principal(UserRole.admin)
+        sub = str(principal.id)
+        await cache.set(sub, principal)
+        shared = await other_worker.get(sub)
+        await cache.invalidate(principal.id)
+        return shared, await cache.get(sub), redis.data, cache.stats
+
+    shared, after, data, stats = asyncio.run(scenario())
+    assert isinstance(shared, Principal) and shared.role is UserRole.admin
+    assert after is None and data == {}
+    assert stats["invalidations"] == 1
+
+
+def test_redis_outage_falls_back_to_the_database():
+    async def scenario():
+        cache = _cache(FakeRedis(fail=True))
+        principal = make_principal()
+        await cache.set(str(principal.id), principal)
+        await cache.invalidate(principal.id)
+        return await cache.get(str(principal.id))
+
+    assert asyncio.run(scenario()) is None
+
+
+@pytest.mark.postgres
+def test_committed_role_and_password_changes_invalidate(monkeypatch):
+    async def scenario():
+        engine = build_engine(poolclass=NullPool)
+        Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        redis = FakeRedis()
+        cache = _cache(redis)
+        monkeypatch.setattr(principals, "principal_cache", cache)
+
+        async def cached(user) -> bool:
+            await cache.set(str(user.id), Principal(user.id, user.username, user.email, user.role))
+            return await cache.get(str(user.id)) is not None
+
+        async def still_cached(user) -> bool:
+            await asyncio.sleep(0)  # the Redis delete runs as a task on the loop
+            return await cache.get(str(user.id)) is not None and REDIS_KEY_PREFIX + str(user.id) in redis.data
+
+        seen = {}
+        try:
+            async with Session() as db:
+                name = f"user-{uuid.uuid4().hex[:8]}"
+                user = User(username=name, email=f"{name}@example.org", hashed_password="x",
+                            role=UserRole.investigator)
+                db.add(user)
+                await db.commit()
+
+                assert await cached(user)
+                user.role = UserRole.admin
+                await db.flush()
+                seen["flushed"] = await still_cached(user)
+                await db.rollback()
+                await db.refresh(user)
+                seen["rolled_back"] = await still_cached(user)
+
+                user.role = UserRole.admin
+                await db.commit()
+                seen["role"] = await still_cached(user)
+
+                assert await cached(user)
+                user.email = f"new-{name}@example.org"
+                await db.commit()
+                seen["email"] = await still_cached(user)
+
+                assert await cached(user)
+                user.hashed_password = "y"
+                await db.commit()
+                seen["password"] = await still_cached(user)
+
+                # bulk statements bypass ORM events; callers invalidate explicitly
+                assert await cached(user)
+                await db.execute(update(User).where(User.id == user.id).values(role=UserRole.investigator))
+                await db.commit()
+                seen["bulk"] = await still_cached(user)
+            return seen
+        finally:
+            async with Session() as db:
+                await db.execute(delete(User).where(User.username == name))
+                await db.commit()
+            await engine.dispose()
+
+    assert asyncio.run(scenario()) == {
+        "flushed": True, "rolled_back": True, "role": False, "email": False,
+        "password": False, "bulk": True,
+    }
@@ -0,0 +1,94 @@
+# tests/test_search.py
+import asyncio
+import re
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.pool import NullPool
+
+from app.db.session import build_engine
+from app.services.search import RRF_K, SearchHit, build_tsquery, reciprocal_rank_fusion
+
+
+def _sql(expr) -> str:
+    # bound values inlined for readability; REGCONFIG has no literal renderer of its own
+    compiled = expr.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    for name, value in compiled.params.items():
+        sql = sql.replace(f"%({name})s", repr(value))
+    return re.sub(r"::\w+", "", sql)
+
+
+def test_tsquery_parts_by_token_kind():
+    assert _sql(build_tsquery('  "call me" ')) == "phraseto_tsquery('simple', 'call me')"
+    assert _sql(build_tsquery("wha*")) == "to_tsquery('simple', 'wha:*')"
+    # punctuation never reaches to_tsquery; words of a prefix term stay adjacent
+    assert _sql(build_tsquery("+1-555*")) == "to_tsquery('simple', '1 <-> 555:*')"
+    assert _sql(build_tsquery("bitcoin")) == "plainto_tsquery('simple', 'bitcoin')"
+    assert _sql(build_tsquery('"call me" wha* x')) == (
+        "(phraseto_tsquery('simple', 'call me') && to_tsquery('simple', 'wha:*')) && plainto_tsquery('simple', 'x')"
+    )
+    assert _sql(build_tsquery('"call me" wha*', match_all=False)) == (
+        "phraseto_tsquery('simple', 'call me') || to_tsquery('simple', 'wha:*')"
+    )
+
+
+@pytest.mark.parametrize("q", ["", "   ", '""', "*", "!?*"])
+def test_tsquery_is_none_without_searchable_text(q):
+    assert build_tsquery(q) is None
+
+
+@pytest.mark.postgres
+@pytest.mark.parametrize("q, match_all, expected", [
+    ('"call me"', True, [True, False, False]),
+    ("wha*", True, [False, True, True]),
+    ('"call me" whatsapp*', True, [False, False, False]),
+    ('"call me" whatsapp*', False, [True, True, False]),
+    ("+1-555*", True, [False, False, True]),
+    ('what"s & | ! (', True, [False, False, False]),
+])
+def test_tsquery_matches_in_postgres(q, match_all, expected):
+    documents = ["please call me later", "sent via WhatsApp", "whats up 1 5550001"]
+
+    async def scenario():
+        engine = build_engine(poolclass=NullPool)
+        try:
+            async with engine.connect() as conn:
+                tsquery = build_tsquery(q, match_all=match_all)
+                return [
+                    await conn.scalar(select(
+                        postgresql.to_tsvector("simple", doc).op("@@")(tsquery)
+                    ))
+                    for doc in documents
+                ]
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(scenario()) == expected
+
+
+def _hits(*ids: str) -> list[SearchHit]:
+    return [SearchHit(id_, "message", f"text {id_}", score=1.0 - i / 10) for i, id_ in enumerate(ids)]
+
+
+def test_rrf_rewards_agreement_and_dedups():
+    fused = reciprocal_rank_fusion(_hits("a", "b", "c"), _hits("c", "d", "a"), k=10)
+
+    # a and c tie (1st + 3rd) and the stable sort keeps lexical order; both beat single-list hits
+    assert [h.id for h in fused] == ["a", "c", "b", "d"]
+    by_id = {h.id: h for h in fused}
+    assert (by_id["a"].lexical_rank, by_id["a"].vector_rank) == (1, 3)
+    assert (by_id["b"].lexical_rank, by_id["b"].vector_rank) == (2, None)
+    assert (by_id["d"].lexical_rank, by_id["d"].vector_rank) == (None, 2)
+    assert by_id["a"].score == pytest.approx(1 / (RRF_K + 1) + 1 / (RRF_K + 3))
+    assert by_id["d"].extracted_text == "text d"
+
+
+def test_rrf_uses_ranks_not_source_scores_and_truncates_to_k():
+    lexical = _hits("x", "y")
+    lexical[1].score = 1000.0
+    # one list alone keeps its order; a hit found by both outranks any single-list hit
+    assert [h.id for h in reciprocal_rank_fusion(lexical, [], k=10)] == ["x", "y"]
+    assert [h.id for h in reciprocal_rank_fusion(lexical, _hits("z", "y"), k=2)] == ["y", "x"]
+    assert reciprocal_rank_fusion([], [], k=5) == []
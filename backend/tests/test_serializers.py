@@ -0,0 +1,27 @@
+# tests/test_serializers.py
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.api import serializers
+
+
+class DriverUUID(uuid.UUID):
+    """Stands in for asyncpg's UUID type, a uuid.UUID subclass."""
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_dumps_renders_driver_types(monkeypatch, fast):
+    if fast:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serializers, "orjson", None)
+    row_id = uuid.uuid4()
+    out = serializers.dumps({"id": DriverUUID(str(row_id)), "plain": row_id, "score": Decimal("1.5"),
+                             "at": datetime(2026, 10, 18, 12, 0, 1)})
+
+    assert json.loads(out) == {"id": str(row_id), "plain": str(row_id), "score": "1.5",
+                               "at": "2026-10-18T12:00:01"}
@@ -0,0 +1,99 @@
+# tests/test_storage.py
+import asyncio
+import hashlib
+import os
+import stat
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.services.storage import BlobStorage, LocalFSStorage, S3Storage, blob_key, is_blob_key
+
+
+def _stage(storage: BlobStorage, data: bytes) -> tuple[str, str]:
+    path = storage.staging_path()
+    with open(path, "wb") as f:
+        f.write(data)
+    return path, hashlib.sha256(data).hexdigest()
+
+
+def test_blob_key_is_sharded():
+    sha = hashlib.sha256(b"x").hexdigest()
+    assert blob_key(sha) == f"{sha[:2]}/{sha[2:4]}/{sha}"
+    assert is_blob_key(blob_key(sha))
+    assert not is_blob_key("uploads/1234abcd_file.ufdr")
+    with pytest.raises(ValueError):
+        blob_key("../../etc/passwd")
+
+
+def test_put_file_is_read_only_and_deduplicated(tmp_path):
+    storage = LocalFSStorage(str(tmp_path), fsync=False)
+
+    async def scenario():
+        first, sha = _stage(storage, b"evidence")
+        assert await storage.put_file(first, sha) is True
+        second, _ = _stage(storage, b"evidence")
+        assert await storage.put_file(second, sha) is False
+        return first, second, sha
+
+    first, second, sha = asyncio.run(scenario())
+    path = storage.local_path(sha)
+    assert not os.path.exists(first) and not os.path.exists(second)
+    assert open(path, "rb").read() == b"evidence"
+    assert not os.stat(path).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    assert [s for s, _ in storage.iter_blobs()] == [sha]
+
+
+def test_incomplete_backend_fails_at_construction(tmp_path):
+    class Partial(BlobStorage):
+        async def put_file(self, src, sha256):
+            return True
+
+    with pytest.raises(TypeError):
+        Partial(str(tmp_path))
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """An S3 bucket served in-process by moto."""
+    moto = pytest.importorskip("moto")
+    pytest.importorskip("boto3")
+    for name, value in (("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing"),
+                        ("AWS_DEFAULT_REGION", "us-east-1")):
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        yield
+
+
+def test_s3_storage_round_trip(s3, tmp_path):
+    storage = S3Storage("evidence", prefix="blobs/", staging_root=str(tmp_path))
+    storage.client.create_bucket(Bucket="evidence")
+
+    async def scenario():
+        staged, sha = _stage(storage, b"evidence")
+        stored = await storage.put_file(staged, sha)
+        again, _ = _stage(storage, b"evidence")
+        deduplicated = not await storage.put_file(again, sha)
+        async with storage.local_copy(sha) as path:
+            with open(path, "rb") as f:
+                copied = f.read()
+        url = await storage.presigned_url(sha, filename="chat export.txt", content_type="text/plain")
+        listed = [s for s, _ in storage.iter_blobs()]
+        await storage.delete(sha)
+        return staged, again, sha, stored, deduplicated, path, copied, url, listed, await storage.exists(sha)
+
+    staged, again, sha, stored, deduplicated, path, copied, url, listed, exists = asyncio.run(scenario())
+    # staged files are consumed either way, and the local copy is gone after the block
+    assert stored and deduplicated
+    assert not any(os.path.exists(p) for p in (staged, again, path))
+    assert copied == b"evidence"
+    assert listed == [sha]
+    assert not exists
+
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    # bucket in the host or in the path, depending on the addressing style
+    assert parsed.path.endswith(f"/blobs/{blob_key(sha)}")
+    assert query["response-content-disposition"] == ["attachment; filename*=UTF-8''chat%20export.txt"]
+    assert query["response-content-type"] == ["text/plain"]
+    assert {"Signature", "X-Amz-Signature"} & query.keys()
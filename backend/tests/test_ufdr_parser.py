@@ -0,0 +1,91 @@
+# tests/test_ufdr_parser.py
+import io
+import tracemalloc
+import zipfile
+
+from app.services.ufdr_parser import extract_artifacts, parse_report
+
+NS = "http://pa.cellebrite.com/report/2.0"
+
+
+def _field(name: str, value: str) -> str:
+    return f'<field name="{name}"><value>{value}</value></field>'
+
+
+def _party(name: str, ident: str) -> str:
+    return f'<model type="Party">{_field("Name", name)}{_field("Identifier", ident)}</model>'
+
+
+def _message(i: int) -> str:
+    return (
+        f'<model type="InstantMessage" id="m{i}">{_field("Body", f"message {i}")}'
+        f'<modelField name="From">{_party("Alice", "+15550001")}</modelField>'
+        f'<multiModelField name="To">{_party("Bob", "+15550002")}</multiModelField>'
+        f'<multiModelField name="Attachments"><model type="Attachment">{_field("Filename", f"files/{i}.jpg")}'
+        f'</model></multiModelField></model>'
+    )
+
+
+def _report(*models: str) -> bytes:
+    return (f'<?xml version="1.0"?><project xmlns="{NS}"><decodedData>'
+            f'<modelType type="Chat">{"".join(models)}</modelType></decodedData></project>').encode()
+
+
+def _chat(*messages: str) -> str:
+    return (f'<model type="Chat" id="c1">{_field("Source", "WhatsApp")}'
+            f'<multiModelField name="Messages">{"".join(messages)}</multiModelField></model>')
+
+
+def test_messages_inherit_their_chat_context():
+    call = (f'<model type="Call" id="k1">{_field("Type", "Outgoing")}{_field("Duration", "00:01:02")}'
+            f'<multiModelField name="Parties">{_party("Bob", "+15550002")}</multiModelField></model>')
+    artifacts = list(parse_report(io.BytesIO(_report(_chat(_message(1), _message(2)), call))))
+
+    assert [a["type"] for a in artifacts] == ["message", "message", "call"]
+    first = artifacts[0]
+    assert first["raw"]["source"] == "WhatsApp"
+    assert first["raw"]["chat_id"] == "c1"
+    assert first["raw"]["sender"] == "Alice (+15550001)"
+    assert first["raw"]["recipients"] == ["Bob (+15550002)"]
+    assert first["raw"]["attachments"] == ["files/1.jpg"]
+    assert first["extracted_text"] == "WhatsApp | from Alice (+15550001) | to Bob (+15550002) | message 1"
+    # sub-models (parties, attachments) are part of their message, not artifacts of their own
+    assert "Outgoing call" in artifacts[2]["extracted_text"]
+    assert "duration 00:01:02" in artifacts[2]["extracted_text"]
+
+
+def test_archive_csv_and_bare_xml_inputs(tmp_path):
+    report = _report(_chat(_message(1)))
+    archive = tmp_path / "image.ufdr"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("files/1.jpg", b"jpeg")
+        zf.writestr("report.xml", report)
+    bare = tmp_path / "report.xml"
+    bare.write_bytes(report)
+    export = tmp_path / "messages.csv"
+    export.write_text("app,sender,recipient,timestamp,message_text\nSignal,alice,bob,2024-01-01,hi there\n")
+
+    from_archive = list(extract_artifacts(str(archive), "image.ufdr"))
+    assert from_archive == list(extract_artifacts(str(bare), "report.xml"))
+    assert [a["raw"]["model_id"] for a in from_archive] == ["m1"]
+
+    (row,) = extract_artifacts(str(export), "messages.csv")
+    assert row["type"] == "message"
+    assert row["extracted_text"] == "Signal | from alice | to bob | 2024-01-01 | hi there"
+
+
+def _peak_memory(n: int) -> int:
+    stream = io.BytesIO(_report(_chat(*(_message(i) for i in range(n)))))
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in parse_report(stream))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        assert count == n
+
+
+def test_memory_stays_flat_as_the_report_grows():
+    small, large = _peak_memory(500), _peak_memory(5000)
+    # a retained tree would grow ~10x; a streamed one stays near the parser's own buffers
+    assert large < small * 2
@@ -0,0 +1,85 @@
+# tests/test_upload_sessions.py
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.upload_sessions import MAX_CHUNK_SIZE, UploadSessionStore
+
+
+async def _body(data: bytes):
+    yield data
+
+
+def test_concurrent_finalize_has_one_winner(tmp_path):
+    store = UploadSessionStore(str(tmp_path))
+    data = b"0123456789"
+
+    async def scenario():
+        session = await store.create(owner_id="u1", filename="a.ufdr", total_size=len(data))
+        await store.write_chunk(session, 0, _body(data))
+        loaded = await store.load(session["upload_id"], owner_id="u1")
+        return await asyncio.gather(store.finalize(loaded), store.finalize(loaded), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    wins = [r for r in results if not isinstance(r, BaseException)]
+    losses = [r for r in results if isinstance(r, HTTPException)]
+    assert len(wins) == 1 and len(losses) == 1
+    assert wins[0][1] == hashlib.sha256(data).hexdigest()
+    assert losses[0].status_code == 409
+
+
+def test_load_hides_other_owners_sessions(tmp_path):
+    store = UploadSessionStore(str(tmp_path))
+
+    async def scenario():
+        session = await store.create(owner_id="u1", filename="a.ufdr", total_size=10)
+        with pytest.raises(HTTPException) as exc:
+            await store.load(session["upload_id"], owner_id="u2")
+        return exc.value.status_code
+
+    assert asyncio.run(scenario()) == 404
+
+
+def test_chunk_size_is_bounded_and_clamped(tmp_path):
+    store = UploadSessionStore(str(tmp_path))
+
+    async def scenario():
+        with pytest.raises(HTTPException):
+            await store.create(owner_id="u1", filename="a.ufdr", total_size=10, chunk_size=MAX_CHUNK_SIZE + 1)
+        return await store.create(owner_id="u1", filename="a.ufdr", total_size=10, chunk_size=MAX_CHUNK_SIZE)
+
+    session = asyncio.run(scenario())
+    assert (session["chunk_size"], session["num_chunks"]) == (10, 1)
+
+
+def test_concurrent_retry_cannot_overwrite_a_landed_chunk(tmp_path):
+    store = UploadSessionStore(str(tmp_path))
+    good, corrupt = b"0123456789", b"xxxxxxxxxx"
+
+    async def scenario():
+        session = await store.create(owner_id="u1", filename="a.ufdr", total_size=len(good))
+        release = asyncio.Event()
+
+        async def slow_body():
+            await release.wait()
+            yield good
+
+        first = asyncio.create_task(store.write_chunk(session, 0, slow_body()))
+        await asyncio.sleep(0.1)
+        with pytest.raises(HTTPException) as busy:
+            await store.write_chunk(session, 0, _body(corrupt))
+        release.set()
+        await first
+        # the retry after the chunk landed is answered from its marker, not written
+        retried = await store.write_chunk(session, 0, _body(corrupt))
+        return busy.value.status_code, retried
+
+    status_code, retried = asyncio.run(scenario())
+    assert status_code == 409
+    assert retried["sha256"] == hashlib.sha256(good).hexdigest()
+    upload_id = os.listdir(tmp_path)[0]
+    with open(store.data_path(upload_id), "rb") as f:
+        assert f.read() == good
@@ -0,0 +1,61 @@
+# tests/test_uploads.py
+import asyncio
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api import uploads
+from app.api.uploads import receive_file
+
+BOUNDARY = "----cognis-boundary"
+
+
+def _form(*parts: tuple[str, str | None, bytes]) -> bytes:
+    body = b""
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += (f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n").encode() + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _request(body: bytes, piece: int = 7, content_type: str | None = None) -> Request:
+    content_type = content_type or f"multipart/form-data; boundary={BOUNDARY}"
+    messages = [
+        {"type": "http.request", "body": body[i:i + piece], "more_body": i + piece < len(body)}
+        for i in range(0, len(body), piece)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {"type": "http", "method": "POST", "headers": [(b"content-type", content_type.encode())]}
+    return Request(scope, receive)
+
+
+def test_file_part_is_streamed_and_hashed(tmp_path, monkeypatch):
+    # small flush threshold so the file goes out in several writes
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 16)
+    data = bytes(range(256)) * 4
+    body = _form(("case", None, b"42"), ("file", "image.ufdr", data), ("file", "second.ufdr", b"x"))
+    dest = tmp_path / "staged"
+
+    filename, sha256, size = asyncio.run(receive_file(_request(body), str(dest)))
+
+    assert filename == "image.ufdr"
+    assert (sha256, size) == (hashlib.sha256(data).hexdigest(), len(data))
+    assert dest.read_bytes() == data
+
+
+@pytest.mark.parametrize("body, content_type, code", [
+    (_form(("other", "a.ufdr", b"abc")), None, 422),
+    (b"file=abc", "application/x-www-form-urlencoded", 400),
+    (_form(("file", "a.ufdr", b"abc"))[:-30], None, 400),
+])
+def test_rejects_bodies_without_a_complete_file_part(tmp_path, body, content_type, code):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(receive_file(_request(body, content_type=content_type), str(tmp_path / "staged")))
+    assert exc.value.status_code == code